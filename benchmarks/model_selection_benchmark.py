@@ -0,0 +1,313 @@
+"""
+Model selection benchmark: cost of every model and grid point of model.yaml at fixed data sizes.
+
+The raw dataset is feature engineered like data ingestion and split once. Synthetic scale-ups
+resample training rows with replacement and jitter their numerical columns. The preprocessor
+of DataTransformation is fitted on the original training rows and applied to every size.
+Every (size, model, grid point) is fitted in a forked worker so its peak RSS is its own, and records:
+fit time, peak RSS, single row and batch predict latency percentiles, pickled artifact size
+and test accuracy.
+
+usage:
+    python benchmarks/model_selection_benchmark.py run [--data-file Visadataset.csv] [--scale-factors 1 4]
+        [--max-grid-points 4] [--output model_selection_benchmark.json]
+    python benchmarks/model_selection_benchmark.py compare <baseline.json> <candidate.json> [--threshold 0.25]
+        exits with status 1 when the candidate regresses
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import multiprocessing
+from datetime import date, datetime
+import dill
+import numpy as np
+import pandas as pd
+import scipy
+import sklearn
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, train_test_split
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visa.constant import *
+from visa.config.configuration import Configuartion
+from visa.entity.artifact_entity import DataValidationArtifact
+from visa.entity.model_factory import ModelFactory
+from visa.components.data_transformation import DataTransformation
+from visa.components.data_ingestion import read_raw_file
+from visa.utils.utils import read_yaml_file
+
+# lower is better, a candidate above baseline * (1 + threshold) is a regression
+# and differs from it by more than the metric noise floor
+LOWER_IS_BETTER_METRICS = ["fit_seconds", "peak_rss_bytes", "fit_rss_bytes", "single_row_latency_ms.p50",
+                           "single_row_latency_ms.p95", "single_row_latency_ms.p99", "batch_latency_ms.p50",
+                           "batch_latency_ms.p95", "artifact_bytes"]
+RSS_NOISE_FLOOR_BYTES = 4 * 2 ** 20
+# higher is better, a candidate below baseline - accuracy tolerance is a regression
+ACCURACY_METRIC = "accuracy"
+NUMERICAL_JITTER = 0.05
+
+# features of every size, set before workers are forked so they share them instead of receiving copies
+_BENCHMARK_DATA = {}
+
+
+def get_datasets(data_file_path: str, schema_file_path: str, scale_factors: list, test_size: float = 0.2,
+                 random_state: int = 42) -> dict:
+    """
+    return: scale factor -> (X_train, y_train), with the shared "test" split (X_test, y_test)
+    """
+    schema = read_yaml_file(file_path=schema_file_path)
+    target_column_name = schema[TARGET_COLUMN_KEY]
+    dataframe = read_raw_file(data_file_path, current_year=date.today().year)
+    train_df, test_df = train_test_split(dataframe, test_size=test_size, random_state=random_state,
+                                         stratify=dataframe[target_column_name])
+
+    data_transformation = DataTransformation(
+        data_transformation_config=Configuartion().get_data_transformation_config(),
+        data_ingestion_artifact=None,
+        data_validation_artifact=DataValidationArtifact(schema_file_path=schema_file_path, is_validated=True,
+                                                        message="benchmark", report_file_path=None,
+                                                        validation_timings=None, train_file_path=None,
+                                                        test_file_path=None))
+    preprocessor = data_transformation.get_data_transformer_object()
+    preprocessor.fit(train_df.drop(columns=[target_column_name]))
+
+    rng = np.random.default_rng(random_state)
+    numerical_columns = [column for column in schema[NUMERICAL_COLUMN_KEY] if column in train_df.columns]
+    datasets = {"test": (preprocessor.transform(test_df.drop(columns=[target_column_name])),
+                         np.asarray(test_df[target_column_name]))}
+    for scale_factor in scale_factors:
+        scaled_df = train_df
+        if scale_factor != 1:
+            rows = rng.choice(train_df.shape[0], size=int(round(train_df.shape[0] * scale_factor)), replace=True)
+            scaled_df = train_df.iloc[rows].reset_index(drop=True)
+            jitter = rng.normal(1.0, NUMERICAL_JITTER, size=(scaled_df.shape[0], len(numerical_columns)))
+            scaled_df[numerical_columns] = scaled_df[numerical_columns] * jitter
+        datasets[scale_factor] = (preprocessor.transform(scaled_df.drop(columns=[target_column_name])),
+                                  np.asarray(scaled_df[target_column_name]))
+    return datasets
+
+
+def get_benchmark_points(model_config_path: str, max_grid_points: int = None, random_state: int = 42) -> list:
+    """
+    return: [(model name, estimator, grid point)] for every model of model.yaml
+    """
+    model_factory = ModelFactory(model_config_path=model_config_path)
+    rng = np.random.default_rng(random_state)
+    points = []
+    for initialized_model in model_factory.get_initialized_model_list():
+        grid_points = list(ParameterGrid(initialized_model.param_grid_search))
+        if max_grid_points is not None and len(grid_points) > max_grid_points:
+            grid_points = [grid_points[index] for index in
+                           sorted(rng.choice(len(grid_points), size=max_grid_points, replace=False))]
+        points.extend((initialized_model.model_name, initialized_model.model, grid_point)
+                      for grid_point in grid_points)
+    return points
+
+
+def reset_peak_rss():
+    # linux only: resets VmHWM to the current RSS, so the peak measured is the one of the benchmark point
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def get_proc_status_bytes(field: str) -> int:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def get_peak_rss_bytes() -> int:
+    peak_rss = get_proc_status_bytes("VmHWM")
+    if peak_rss is not None:
+        return peak_rss
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def get_percentiles(values_seconds: list, percentiles=(50, 95, 99)) -> dict:
+    return {f"p{percentile}": round(float(np.percentile(values_seconds, percentile)) * 1000, 4)
+            for percentile in percentiles}
+
+
+def run_benchmark_point(scale_factor, estimator, grid_point: dict, single_rows: int, batch_repeats: int) -> dict:
+    X_train, y_train = _BENCHMARK_DATA[scale_factor]
+    X_test, y_test = _BENCHMARK_DATA["test"]
+    model = clone(estimator).set_params(**grid_point)
+
+    reset_peak_rss()
+    rss_before_fit = get_proc_status_bytes("VmRSS")
+    start_time = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start_time
+    peak_rss_bytes = get_peak_rss_bytes()
+
+    batch_times = []
+    for _ in range(batch_repeats):
+        start_time = time.perf_counter()
+        y_pred = model.predict(X_test)
+        batch_times.append(time.perf_counter() - start_time)
+    single_row_times = []
+    for row in range(min(single_rows, X_test.shape[0])):
+        single_row = X_test[row: row + 1]
+        start_time = time.perf_counter()
+        model.predict(single_row)
+        single_row_times.append(time.perf_counter() - start_time)
+
+    return {"fit_seconds": round(fit_seconds, 6),
+            "peak_rss_bytes": peak_rss_bytes,
+            # memory the fit itself added on top of the process and the data
+            "fit_rss_bytes": None if rss_before_fit is None else max(0, peak_rss_bytes - rss_before_fit),
+            "single_row_latency_ms": get_percentiles(single_row_times),
+            "batch_latency_ms": get_percentiles(batch_times, percentiles=(50, 95)),
+            "artifact_bytes": len(dill.dumps(model)),
+            "accuracy": round(float(np.mean(y_pred == y_test)), 6)}
+
+
+def run(args):
+    scale_factors = [int(scale_factor) if float(scale_factor).is_integer() else scale_factor
+                     for scale_factor in args.scale_factors]
+    _BENCHMARK_DATA.update(get_datasets(data_file_path=args.data_file, schema_file_path=args.schema_file,
+                                        scale_factors=scale_factors))
+    points = get_benchmark_points(model_config_path=args.model_config, max_grid_points=args.max_grid_points)
+    print(f"{len(points)} grid points x {len(scale_factors)} sizes, test rows: {_BENCHMARK_DATA['test'][0].shape[0]}")
+
+    # forked workers share the features and report their own peak RSS, other platforms run in process
+    use_fork = args.isolate and "fork" in multiprocessing.get_all_start_methods()
+    results = []
+    for scale_factor in scale_factors:
+        n_rows = _BENCHMARK_DATA[scale_factor][0].shape[0]
+        for model_name, estimator, grid_point in points:
+            point_args = (scale_factor, estimator, grid_point, args.single_rows, args.batch_repeats)
+            if use_fork:
+                with multiprocessing.get_context("fork").Pool(processes=1) as pool:
+                    metrics = pool.apply(run_benchmark_point, point_args)
+            else:
+                metrics = run_benchmark_point(*point_args)
+            results.append({"model": model_name, "params": grid_point, "scale_factor": scale_factor,
+                            "train_rows": n_rows, **metrics})
+            print(f"{model_name} x{scale_factor} {grid_point}: fit {metrics['fit_seconds']:.3f}s "
+                  f"rss {metrics['peak_rss_bytes'] / 2 ** 20:.1f}MiB "
+                  f"row p50 {metrics['single_row_latency_ms']['p50']:.3f}ms "
+                  f"batch p50 {metrics['batch_latency_ms']['p50']:.1f}ms "
+                  f"size {metrics['artifact_bytes'] / 1024:.0f}KiB acc {metrics['accuracy']:.4f}")
+
+    output = {"metadata": {"created_at": datetime.now().isoformat(timespec="seconds"),
+                           "data_file": os.path.abspath(args.data_file),
+                           "model_config": os.path.abspath(args.model_config),
+                           "isolated": use_fork,
+                           "python": platform.python_version(), "platform": platform.platform(),
+                           "cpu_count": os.cpu_count(),
+                           "versions": {"sklearn": sklearn.__version__, "numpy": np.__version__,
+                                        "scipy": scipy.__version__, "pandas": pd.__version__}},
+              "results": results}
+    with open(args.output, "w") as output_file:
+        json.dump(output, output_file, indent=2, default=str)
+    print(f"results saved at: {os.path.abspath(args.output)}")
+
+
+def get_metric(result: dict, metric: str):
+    value = result
+    for key in metric.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def get_result_key(result: dict) -> str:
+    return json.dumps([result["model"], result["params"], result["scale_factor"]], sort_keys=True, default=str)
+
+
+def get_noise_floor(metric: str, args):
+    """
+    Smallest absolute increase of metric reported as a regression, timer and allocator noise stays below it
+    """
+    if metric == "fit_seconds":
+        return args.min_delta_seconds
+    if "latency_ms" in metric:
+        return args.min_delta_ms
+    if "rss" in metric:
+        return RSS_NOISE_FLOOR_BYTES
+    return 0
+
+
+def compare(args) -> int:
+    """
+    return: number of regressions of candidate against baseline
+    """
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline = {get_result_key(result): result for result in json.load(baseline_file)["results"]}
+        candidate = {get_result_key(result): result for result in json.load(candidate_file)["results"]}
+
+    regressions = 0
+    for key in sorted(set(baseline) & set(candidate)):
+        for metric in LOWER_IS_BETTER_METRICS + [ACCURACY_METRIC]:
+            baseline_value, candidate_value = get_metric(baseline[key], metric), get_metric(candidate[key], metric)
+            if baseline_value is None or candidate_value is None:
+                continue
+            if metric == ACCURACY_METRIC:
+                is_regression = candidate_value < baseline_value - args.accuracy_tolerance
+            else:
+                is_regression = candidate_value > baseline_value * (1 + args.threshold) \
+                                and candidate_value - baseline_value > get_noise_floor(metric, args)
+            change = (candidate_value - baseline_value) / baseline_value if baseline_value else 0.0
+            if is_regression or args.verbose:
+                print(f"{'REGRESSION' if is_regression else 'ok':>10}  {key}  {metric}: "
+                      f"{baseline_value} -> {candidate_value} ({change:+.1%})")
+            regressions += is_regression
+    for key in sorted(set(baseline) ^ set(candidate)):
+        print(f"{'missing':>10}  {key}  only in {'baseline' if key in baseline else 'candidate'}")
+    print(f"{regressions} regression(s) over {len(set(baseline) & set(candidate))} common benchmark points")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model selection candidates of model.yaml")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="benchmark every model and grid point")
+    run_parser.add_argument("--data-file", default=os.path.join(ROOT_DIR, "Visadataset.csv"), help="raw dataset")
+    run_parser.add_argument("--schema-file", default=os.path.join(ROOT_DIR, "config", "schema.yaml"))
+    run_parser.add_argument("--model-config", default=os.path.join(ROOT_DIR, "config", "model.yaml"))
+    run_parser.add_argument("--scale-factors", nargs="+", type=float, default=[1, 4],
+                            help="training set sizes as multiples of the original training rows")
+    run_parser.add_argument("--max-grid-points", type=int, default=None, help="grid points sampled per model")
+    run_parser.add_argument("--single-rows", type=int, default=200, help="rows timed one by one")
+    run_parser.add_argument("--batch-repeats", type=int, default=5, help="timed predictions of the test set")
+    run_parser.add_argument("--no-isolate", dest="isolate", action="store_false",
+                            help="run points in process, peak RSS is then the process peak")
+    run_parser.add_argument("--output", default="model_selection_benchmark.json")
+
+    compare_parser = subparsers.add_parser("compare", help="flag regressions of a run against a baseline run")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.25,
+                                help="relative increase of a cost metric reported as regression")
+    compare_parser.add_argument("--min-delta-seconds", type=float, default=0.05,
+                                help="smallest fit time increase reported as regression")
+    compare_parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                                help="smallest predict latency increase reported as regression")
+    compare_parser.add_argument("--accuracy-tolerance", type=float, default=0.005)
+    compare_parser.add_argument("--verbose", action="store_true", help="print every compared metric")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(1 if compare(args) else 0)
+
+
+if __name__ == "__main__":
+    main()
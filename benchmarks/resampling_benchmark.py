@@ -0,0 +1,71 @@
+"""
+Resampling benchmark: time taken and size of resampled data for every resampling strategy.
+
+Features are built once with the preprocessor of DataTransformation, then every strategy
+resamples the same matrix.
+
+usage:
+    python benchmarks/resampling_benchmark.py --train-file <ingested train file>
+        [--strategies smoteenn smote random_under] [--n-jobs 2] [--output resampling_benchmark.yaml]
+"""
+import os
+import sys
+import argparse
+import numpy as np
+import scipy.sparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visa.constant import *
+from visa.config.configuration import Configuartion
+from visa.entity.artifact_entity import DataValidationArtifact
+from visa.components.data_transformation import DataTransformation
+from visa.entity.resampling import get_resampler, resample
+from visa.utils.utils import read_yaml_file, write_yaml_file, load_data
+
+
+def get_features(train_file_path: str, schema_file_path: str):
+    config = Configuartion()
+    data_transformation = DataTransformation(
+        data_transformation_config=config.get_data_transformation_config(),
+        data_ingestion_artifact=None,
+        data_validation_artifact=DataValidationArtifact(schema_file_path=schema_file_path, is_validated=True,
+                                                        message="benchmark", report_file_path=None,
+                                                        validation_timings=None, train_file_path=train_file_path,
+                                                        test_file_path=None))
+    target_column_name = read_yaml_file(file_path=schema_file_path)[TARGET_COLUMN_KEY]
+    train_df = load_data(file_path=train_file_path, schema_file_path=schema_file_path)
+    target = np.array(train_df[target_column_name])
+    features = data_transformation.get_data_transformer_object().fit_transform(
+        train_df.drop(columns=[target_column_name]))
+    return features, target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark resampling strategies")
+    parser.add_argument("--train-file", required=True, help="ingested train file (csv/parquet/feather)")
+    parser.add_argument("--schema-file", default=os.path.join(ROOT_DIR, "config", "schema.yaml"))
+    parser.add_argument("--strategies", nargs="+", default=RESAMPLING_STRATEGIES, choices=RESAMPLING_STRATEGIES)
+    parser.add_argument("--n-jobs", type=int, default=None, help="parallel jobs of neighbour searches")
+    parser.add_argument("--output", default="resampling_benchmark.yaml")
+    args = parser.parse_args()
+
+    features, target = get_features(train_file_path=args.train_file, schema_file_path=args.schema_file)
+    print(f"features: {features.shape} sparse: {scipy.sparse.issparse(features)}")
+
+    results = {}
+    for strategy in args.strategies:
+        _, _, summary = resample(resampler=get_resampler(strategy=strategy, n_jobs=args.n_jobs),
+                                 X=features, y=target, strategy=strategy)
+        results[strategy] = dict(summary._asdict())
+        print(f"{strategy:>14}: {summary.resampling_time:>10.3f}s  rows {summary.rows_before} -> {summary.rows_after}"
+              f"  classes {summary.class_counts_after}")
+
+    write_yaml_file(file_path=os.path.abspath(args.output),
+                    data={"train_file": os.path.abspath(args.train_file), "n_jobs": args.n_jobs,
+                          "n_features": int(features.shape[1]), "results": results})
+    print(f"results saved at: {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import os
+import sys
+from visa.constant import *
+from visa.logger import logging
+from visa.exception import CustomException
+from visa.entity.config_entity import DataDriftConfig
+from visa.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataDriftArtifact
+from visa.entity.data_sketch import DataSketch
+from visa.utils.utils import read_yaml_file, write_yaml_file
+
+
+class DataDrift:
+
+    def __init__(self, data_drift_config: DataDriftConfig,
+                 data_ingestion_artifact: DataIngestionArtifact,
+                 data_validation_artifact: DataValidationArtifact):
+        try:
+            logging.info(f"{'>>' * 30}Data Drift log started.{'<<' * 30} ")
+            self.data_drift_config = data_drift_config
+            self.data_ingestion_artifact = data_ingestion_artifact
+            self.data_validation_artifact = data_validation_artifact
+            dataset_schema = read_yaml_file(file_path=self.data_validation_artifact.schema_file_path)
+            target_column_name = dataset_schema[TARGET_COLUMN_KEY]
+            self.numerical_columns = self.data_drift_config.numerical_columns
+            self.categorical_columns = [column for column, dtype in dataset_schema[DATASET_SCHEMA_COLUMNS_KEY].items()
+                                        if dtype == "category" and column != target_column_name]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_reference_sketch_file_path(self) -> str:
+        """
+        Sketch saved next to the current best model, None when there is no model yet
+        """
+        try:
+            model_evaluation_file_path = self.data_drift_config.model_evaluation_file_path
+            if not os.path.exists(model_evaluation_file_path):
+                return None
+            model_eval_content = read_yaml_file(file_path=model_evaluation_file_path) or dict()
+            if BEST_MODEL_KEY not in model_eval_content:
+                return None
+            model_path = model_eval_content[BEST_MODEL_KEY][MODEL_PATH_KEY]
+            reference_sketch_file_path = os.path.join(os.path.dirname(model_path), DATA_DRIFT_SKETCH_FILE_NAME)
+            if not os.path.exists(reference_sketch_file_path):
+                logging.info(f"Best model [{model_path}] has no data sketch next to it")
+                return None
+            return reference_sketch_file_path
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def build_train_sketch(self) -> DataSketch:
+        try:
+            train_sketch = DataSketch.from_files(file_paths=[self.data_validation_artifact.train_file_path],
+                                                 numerical_columns=self.numerical_columns,
+                                                 categorical_columns=self.categorical_columns,
+                                                 n_bins=self.data_drift_config.n_bins)
+            train_sketch.save(file_path=self.data_drift_config.sketch_file_path)
+            return train_sketch
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_drift_report(self, reference_sketch: DataSketch) -> dict:
+        """
+        Compare the ingested batch (train and test) with the reference sketch
+        """
+        try:
+            current_sketch = DataSketch.from_files(file_paths=[self.data_validation_artifact.train_file_path,
+                                                               self.data_validation_artifact.test_file_path],
+                                                   numerical_columns=self.numerical_columns,
+                                                   categorical_columns=self.categorical_columns,
+                                                   bin_edges=reference_sketch.get_bin_edges())
+            column_drifts = reference_sketch.compare(current_sketch=current_sketch,
+                                                     psi_threshold=self.data_drift_config.psi_threshold,
+                                                     ks_threshold=self.data_drift_config.ks_threshold)
+            return {
+                "reference_row_count": reference_sketch.row_count,
+                "current_row_count": current_sketch.row_count,
+                "psi_threshold": self.data_drift_config.psi_threshold,
+                "ks_threshold": self.data_drift_config.ks_threshold,
+                "columns": {column_drift.column: {"psi": round(column_drift.psi, 6),
+                                                  "ks": None if column_drift.ks is None else round(column_drift.ks, 6),
+                                                  "is_drifted": bool(column_drift.is_drifted)}
+                            for column_drift in column_drifts}
+            }
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def initiate_data_drift(self) -> DataDriftArtifact:
+        try:
+            self.build_train_sketch()
+
+            reference_sketch_file_path = self.get_reference_sketch_file_path()
+            if reference_sketch_file_path is None:
+                message = "No reference sketch found, drift check skipped"
+                logging.info(message)
+                drift_report = {"reference_sketch_file_path": None, "columns": {}}
+            else:
+                logging.info(f"Comparing ingested data with reference sketch: [{reference_sketch_file_path}]")
+                drift_report = self.get_drift_report(reference_sketch=DataSketch.load(reference_sketch_file_path))
+                drift_report["reference_sketch_file_path"] = reference_sketch_file_path
+                message = "Data drift check performed"
+            write_yaml_file(file_path=self.data_drift_config.report_file_path, data=drift_report)
+
+            drifted_columns = [column for column, column_drift in drift_report["columns"].items()
+                               if column_drift["is_drifted"]]
+            if len(drifted_columns) > 0:
+                logging.info(f"Data drift detected in columns: {drifted_columns}")
+                if self.data_drift_config.fail_on_drift:
+                    raise Exception(f"Data drift detected in columns: {drifted_columns}, "
+                                    f"check report: [{self.data_drift_config.report_file_path}]")
+
+            data_drift_artifact = DataDriftArtifact(sketch_file_path=self.data_drift_config.sketch_file_path,
+                                                    report_file_path=self.data_drift_config.report_file_path,
+                                                    is_drift_detected=len(drifted_columns) > 0,
+                                                    drifted_columns=drifted_columns,
+                                                    message=message)
+            logging.info(f"Data drift artifact: {data_drift_artifact}")
+            return data_drift_artifact
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def __del__(self):
+        logging.info(f"{'>>' * 30}Data Drift log completed.{'<<' * 30} \n\n")
@@ -1,5 +1,9 @@
 import os
 import sys
+import glob
+import time
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from six.moves import urllib
 import numpy as np
 import pandas as pd
@@ -7,12 +11,92 @@ from visa.constant import *
 from visa.logger import logging
 from visa.entity.config_entity import DataIngestionConfig
 from visa.entity.artifact_entity import DataIngestionArtifact
+from visa.entity.download_cache import DownloadCache
+from visa.entity.dataframe_writer import DataFrameWriter
 from visa.config.configuration import Configuartion
 from visa.exception import CustomException
-from visa.utils.utils import read_yaml_file
+from visa.utils.utils import read_yaml_file, write_yaml_file, write_dataframe, append_data_file, read_dataframe, \
+    get_file_format, link_or_copy_file
 from sklearn.model_selection import train_test_split
 from datetime import date
 
+HASH_SPLIT_BUCKETS = 10000
+
+
+def engineer_features(us_visa_dataframe: pd.DataFrame, current_year: int) -> pd.DataFrame:
+    """
+    Derive company_age, drop id/year columns and encode case_status as 1 (Denied) / 0
+    us_visa_dataframe: raw dataframe or a chunk of it
+    current_year: int year used to compute company_age
+    """
+    us_visa_dataframe[COLUMN_COMPANY_AGE] = current_year-us_visa_dataframe[COLUMN_YEAR_ESTB]
+
+    us_visa_dataframe.drop([COLUMN_ID,COLUMN_YEAR_ESTB], axis=1, inplace=True)
+    us_visa_dataframe[COLUMN_CASE_STATUS] = np.where(us_visa_dataframe[COLUMN_CASE_STATUS] == 'Denied', 1,0)
+    return us_visa_dataframe
+
+
+def get_test_split_mask(case_ids: pd.Series, test_size: float) -> np.ndarray:
+    """
+    Assign rows to the test split from a stable hash of case_id.
+    hash_pandas_object uses a fixed hash key, so a case_id lands in the same split
+    on every run, in every chunk and on every machine.
+    case_ids: pd.Series of case_id values
+    test_size: float fraction of rows sent to the test split
+    return: boolean mask, True for test rows
+    """
+    hashed_ids = pd.util.hash_pandas_object(case_ids.astype(str), index=False).to_numpy()
+    return (hashed_ids % HASH_SPLIT_BUCKETS) < int(round(test_size * HASH_SPLIT_BUCKETS))
+
+
+def read_raw_file(raw_file_path: str, current_year: int) -> pd.DataFrame:
+    """
+    Read a whole raw file (compression inferred from extension) and engineer its features
+    """
+    try:
+        us_visa_dataframe = pd.read_csv(raw_file_path, compression="infer")
+        return engineer_features(us_visa_dataframe, current_year=current_year)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def split_raw_file(raw_file_path: str, train_file_path: str, test_file_path: str, index_file_path: str,
+                   column_schema: dict, chunk_size: int, test_size: float, current_year: int,
+                   ingested_case_ids: set = None) -> tuple:
+    """
+    Stream a raw file (gzip/zstd/... decompressed on the fly) in chunks, split rows by hash of case_id
+    and write train rows, test rows and the (case_id, split) index of written rows.
+    Runs in ingestion worker processes, one call per raw file.
+    ingested_case_ids: set of case_id to skip (incremental mode)
+    return: (rows read from raw file, train rows written, test rows written)
+    """
+    try:
+        row_count = 0
+        with DataFrameWriter(train_file_path, schema=column_schema) as train_writer, \
+                DataFrameWriter(test_file_path, schema=column_schema) as test_writer, \
+                DataFrameWriter(index_file_path) as index_writer:
+            for us_visa_chunk in pd.read_csv(raw_file_path, chunksize=chunk_size, compression="infer",
+                                             dtype={COLUMN_ID: str}):
+                row_count += len(us_visa_chunk)
+                if ingested_case_ids is not None:
+                    us_visa_chunk = us_visa_chunk.drop_duplicates(subset=[COLUMN_ID])
+                    us_visa_chunk = us_visa_chunk[~us_visa_chunk[COLUMN_ID].isin(ingested_case_ids)].copy()
+                    ingested_case_ids.update(us_visa_chunk[COLUMN_ID])
+
+                is_test_row = get_test_split_mask(us_visa_chunk[COLUMN_ID], test_size=test_size)
+                index_writer.write(pd.DataFrame({
+                    COLUMN_ID: us_visa_chunk[COLUMN_ID].to_numpy(),
+                    DATA_INGESTION_SPLIT_COLUMN: np.where(is_test_row, "test", "train")
+                }))
+                us_visa_chunk = engineer_features(us_visa_chunk, current_year=current_year)
+
+                # header/schema is written with the first chunk even if one side of it is empty
+                train_writer.write(us_visa_chunk[~is_test_row])
+                test_writer.write(us_visa_chunk[is_test_row])
+        return row_count, train_writer.row_count, test_writer.row_count
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
 
 class DataIngestion:
 
@@ -36,9 +120,16 @@ class DataIngestion:
 
             raw_file_path = os.path.join(raw_data_dir, us_visa_file_name)
 
-            logging.info(
-                f"Downloading file from :[{download_url}] into :[{raw_file_path}]")
-            urllib.request.urlretrieve(download_url, raw_file_path)
+            download_cache_dir = self.data_ingestion_config.download_cache_dir
+            if download_cache_dir is not None:
+                logging.info(
+                    f"Fetching file from :[{download_url}] through download cache :[{download_cache_dir}]")
+                DownloadCache(cache_dir=download_cache_dir).materialize(source=download_url,
+                                                                        dst_file_path=raw_file_path)
+            else:
+                logging.info(
+                    f"Downloading file from :[{download_url}] into :[{raw_file_path}]")
+                urllib.request.urlretrieve(download_url, raw_file_path)
             logging.info(
                 f"File :[{raw_file_path}] has been downloaded successfully.")
             return raw_file_path
@@ -46,54 +137,408 @@ class DataIngestion:
         except Exception as e:
             raise CustomException(e, sys) from e
         
-    def split_data_as_train_test(self) -> DataIngestionArtifact:
+    def collect_raw_files(self) -> list:
+        """
+        Place every file matching raw_data_glob into raw_data_dir (through the download cache when enabled)
+        return: list of raw file paths
+        """
         try:
             raw_data_dir = self.data_ingestion_config.raw_data_dir
-            
-            file_name = os.listdir(raw_data_dir)[0]
+            os.makedirs(raw_data_dir, exist_ok=True)
+
+            raw_data_glob = os.path.join(ROOT_DIR, self.data_ingestion_config.raw_data_glob)
+            source_file_paths = sorted(glob.glob(raw_data_glob))
+            if len(source_file_paths) == 0:
+                raise Exception(f"No raw file matches pattern: [{raw_data_glob}]")
+            file_names = [os.path.basename(file_path) for file_path in source_file_paths]
+            if len(set(file_names)) != len(file_names):
+                raise Exception(f"Raw files matching [{raw_data_glob}] must have distinct file names")
 
-            us_visa_file_path = os.path.join(raw_data_dir, file_name)
+            download_cache_dir = self.data_ingestion_config.download_cache_dir
+            download_cache = DownloadCache(cache_dir=download_cache_dir) if download_cache_dir is not None else None
+            raw_file_paths = []
+            for source_file_path, file_name in zip(source_file_paths, file_names):
+                raw_file_path = os.path.join(raw_data_dir, file_name)
+                if download_cache is not None:
+                    download_cache.materialize(source=source_file_path, dst_file_path=raw_file_path)
+                else:
+                    link_or_copy_file(src_file_path=source_file_path, dst_file_path=raw_file_path)
+                raw_file_paths.append(raw_file_path)
+            logging.info(f"[{len(raw_file_paths)}] raw files matching [{raw_data_glob}] placed in :[{raw_data_dir}]")
+            return raw_file_paths
+        except Exception as e:
+            raise CustomException(e, sys) from e
 
-            logging.info(f"Reading csv file: [{us_visa_file_path}]")
+    def get_raw_file_paths(self) -> list:
+        try:
+            raw_data_dir = self.data_ingestion_config.raw_data_dir
+            return [os.path.join(raw_data_dir, file_name) for file_name in sorted(os.listdir(raw_data_dir))]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def run_on_raw_files(self, function, raw_file_paths: list, **kwargs) -> list:
+        """
+        Call function(raw_file_path, ...) for every raw file, on a process pool of
+        ingestion_workers processes when there is more than one file
+        return: results in raw_file_paths order
+        """
+        try:
+            ingestion_workers = min(self.data_ingestion_config.ingestion_workers, len(raw_file_paths))
+            if ingestion_workers <= 1:
+                return [function(raw_file_path, **kwargs_) for raw_file_path, kwargs_ in
+                        zip(raw_file_paths, self._get_kwargs_per_file(raw_file_paths, kwargs))]
+            logging.info(f"Processing [{len(raw_file_paths)}] raw files on [{ingestion_workers}] worker processes")
+            with ProcessPoolExecutor(max_workers=ingestion_workers) as executor:
+                futures = [executor.submit(function, raw_file_path, **kwargs_) for raw_file_path, kwargs_ in
+                           zip(raw_file_paths, self._get_kwargs_per_file(raw_file_paths, kwargs))]
+                return [future.result() for future in futures]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def _get_kwargs_per_file(raw_file_paths: list, kwargs: dict) -> list:
+        # list valued kwargs hold one value per raw file, other kwargs are shared
+        return [{key: value[index] if isinstance(value, list) else value for key, value in kwargs.items()}
+                for index in range(len(raw_file_paths))]
+
+    def log_throughput(self, raw_file_paths: list, row_count: int, start_time: float) -> str:
+        elapsed_time = max(time.time() - start_time, 1e-9)
+        input_size = sum(os.path.getsize(raw_file_path) for raw_file_path in raw_file_paths) / (1024 * 1024)
+        throughput = f"{row_count} rows from {len(raw_file_paths)} files ({input_size:.2f} MB) " \
+                     f"in {elapsed_time:.2f}s: {row_count / elapsed_time:.0f} rows/s, {input_size / elapsed_time:.2f} MB/s"
+        logging.info(f"Ingestion throughput: {throughput}")
+        return throughput
+
+    def split_parts(self, raw_file_paths: list, ingested_case_ids: set = None):
+        """
+        Split every raw file into its own train/test/index part files under a parts directory
+        return: (parts dir, train part paths, test part paths, index part paths, row counts per raw file)
+        """
+        try:
+            parts_dir = os.path.join(os.path.dirname(self.data_ingestion_config.ingested_train_dir),
+                                     DATA_INGESTION_PARTS_DIR_NAME)
+            file_extension = FILE_FORMAT_EXTENSIONS[self.data_ingestion_config.ingested_file_format]
+            train_part_paths, test_part_paths, index_part_paths = [], [], []
+            for index in range(len(raw_file_paths)):
+                train_part_paths.append(os.path.join(parts_dir, f"train_{index:05d}{file_extension}"))
+                test_part_paths.append(os.path.join(parts_dir, f"test_{index:05d}{file_extension}"))
+                index_part_paths.append(os.path.join(parts_dir, f"index_{index:05d}.csv"))
+
+            part_row_counts = self.run_on_raw_files(split_raw_file, raw_file_paths,
+                                               train_file_path=train_part_paths,
+                                               test_file_path=test_part_paths,
+                                               index_file_path=index_part_paths,
+                                               column_schema=self.get_column_schema(),
+                                               chunk_size=self.data_ingestion_config.chunk_size,
+                                               test_size=self.data_ingestion_config.test_size,
+                                               current_year=date.today().year,
+                                               ingested_case_ids=ingested_case_ids)
+            return parts_dir, train_part_paths, test_part_paths, index_part_paths, part_row_counts
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def merge_parts(self, part_paths: list, dst_file_path: str, keep_masks: list = None):
+        """
+        Concatenate part files into dst file, parts are streamed one at a time
+        keep_masks: optional list (one per part) of boolean row masks, None keeps every row of a part
+        """
+        try:
+            keep_masks = keep_masks if keep_masks is not None else [None] * len(part_paths)
+            if get_file_format(dst_file_path) == FILE_FORMAT_CSV and all(mask is None for mask in keep_masks):
+                # plain csv parts are concatenated without being parsed
+                if os.path.exists(dst_file_path):
+                    os.remove(dst_file_path)
+                for part_path in part_paths:
+                    append_data_file(part_path, dst_file_path)
+                return
+            with DataFrameWriter(dst_file_path, schema=self.get_column_schema()) as writer:
+                for part_path, keep_mask in zip(part_paths, keep_masks):
+                    part_dataframe = read_dataframe(part_path)
+                    if keep_mask is not None:
+                        part_dataframe = part_dataframe[keep_mask]
+                    writer.write(part_dataframe)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_ingested_file_name(self) -> str:
+        """
+        Name of ingested train/test file: dataset file name of the schema with extension of ingested_file_format.
+        Raw data may come as many shards, ingested files are always named after the dataset.
+        """
+        try:
+            schema_file_name = read_yaml_file(self.data_ingestion_config.schema_file_path)[SCHEMA_FILE_NAME_KEY]
+            file_extension = FILE_FORMAT_EXTENSIONS[self.data_ingestion_config.ingested_file_format]
+            return f"{os.path.splitext(schema_file_name)[0]}{file_extension}"
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_column_schema(self) -> dict:
+        try:
+            return read_yaml_file(self.data_ingestion_config.schema_file_path)[DATASET_SCHEMA_COLUMNS_KEY]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def split_data_as_train_test(self) -> DataIngestionArtifact:
+        try:
+            if self.data_ingestion_config.ingestion_mode == INGESTION_MODE_STREAMING:
+                return self.split_data_as_train_test_streaming()
+            if self.data_ingestion_config.ingestion_mode == INGESTION_MODE_INCREMENTAL:
+                return self.split_data_as_train_test_incremental()
+
+            start_time = time.time()
+            raw_file_paths = self.get_raw_file_paths()
+
+            logging.info(f"Reading csv files: {raw_file_paths}")
 
             # creating the date object of today's date
             todays_date = date.today()
             current_year= todays_date.year
             
-            us_visa_dataframe = pd.read_csv(us_visa_file_path)
-            
-            us_visa_dataframe[COLUMN_COMPANY_AGE] = current_year-us_visa_dataframe[COLUMN_YEAR_ESTB]
-            
-            us_visa_dataframe.drop([COLUMN_ID,COLUMN_YEAR_ESTB], axis=1, inplace=True)
-            us_visa_dataframe[COLUMN_CASE_STATUS] = np.where(us_visa_dataframe[COLUMN_CASE_STATUS] == 'Denied', 1,0)
+            us_visa_dataframe = pd.concat(self.run_on_raw_files(read_raw_file, raw_file_paths,
+                                                                current_year=current_year),
+                                          ignore_index=True)
                         
             logging.info(f"Splitting data into train and test")
 
             train_set = None
             test_set = None
 
-            train_set, test_set = train_test_split(us_visa_dataframe, test_size=0.2, random_state=42)
+            train_set, test_set = train_test_split(us_visa_dataframe, test_size=self.data_ingestion_config.test_size,
+                                                   random_state=42)
+
+            ingested_file_name = self.get_ingested_file_name()
 
             train_file_path = os.path.join(self.data_ingestion_config.ingested_train_dir,
-                                           file_name)
+                                           ingested_file_name)
 
             test_file_path = os.path.join(self.data_ingestion_config.ingested_test_dir,
-                                          file_name)
+                                          ingested_file_name)
+
+            column_schema = self.get_column_schema()
 # ***********************************************************************************************
             if train_set is not None:
                 os.makedirs(self.data_ingestion_config.ingested_train_dir, exist_ok=True)
                 logging.info(f"Exporting training dataset to file: [{train_file_path}]")
-                train_set.to_csv(train_file_path, index=False)
+                write_dataframe(train_set, file_path=train_file_path, schema=column_schema)
 
             if test_set is not None:
                 os.makedirs(self.data_ingestion_config.ingested_test_dir, exist_ok=True)
                 logging.info(f"Exporting test dataset to file: [{test_file_path}]")
-                test_set.to_csv(test_file_path, index=False)
+                write_dataframe(test_set, file_path=test_file_path, schema=column_schema)
+
+            throughput = self.log_throughput(raw_file_paths, row_count=len(us_visa_dataframe), start_time=start_time)
+
+            data_ingestion_artifact = DataIngestionArtifact(train_file_path=train_file_path,
+                                                            test_file_path=test_file_path,
+                                                            is_ingested=True,
+                                                            message=f"Data ingestion completed successfully. {throughput}",
+                                                            rows_added=len(us_visa_dataframe)
+                                                            )
+            logging.info(f"Data Ingestion artifact:[{data_ingestion_artifact}]")
+            return data_ingestion_artifact
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def split_data_as_train_test_streaming(self) -> DataIngestionArtifact:
+        """
+        Read raw files in chunks of chunk_size rows, engineer features per chunk and
+        append every chunk to train/test files, split by hash of case_id.
+        Memory usage is bounded by chunk_size (per worker) whatever the size of the raw files.
+        """
+        try:
+            start_time = time.time()
+            raw_file_paths = self.get_raw_file_paths()
+
+            ingested_file_name = self.get_ingested_file_name()
+
+            train_file_path = os.path.join(self.data_ingestion_config.ingested_train_dir,
+                                           ingested_file_name)
+
+            test_file_path = os.path.join(self.data_ingestion_config.ingested_test_dir,
+                                          ingested_file_name)
+
+            logging.info(f"Streaming csv files: {raw_file_paths} in chunks of "
+                         f"[{self.data_ingestion_config.chunk_size}] rows")
+            parts_dir, train_part_paths, test_part_paths, _, part_row_counts = self.split_parts(raw_file_paths)
+            row_count, train_row_count, test_row_count = np.sum(part_row_counts, axis=0).tolist()
+
+            self.merge_parts(train_part_paths, train_file_path)
+            self.merge_parts(test_part_paths, test_file_path)
+            shutil.rmtree(parts_dir)
+
+            logging.info(f"Exported [{train_row_count}] training rows to file: [{train_file_path}] "
+                         f"and [{test_row_count}] test rows to file: [{test_file_path}]")
+
+            throughput = self.log_throughput(raw_file_paths, row_count=row_count, start_time=start_time)
+
+            data_ingestion_artifact = DataIngestionArtifact(train_file_path=train_file_path,
+                                                            test_file_path=test_file_path,
+                                                            is_ingested=True,
+                                                            message=f"Data ingestion completed successfully. {throughput}",
+                                                            rows_added=train_row_count + test_row_count
+                                                            )
+            logging.info(f"Data Ingestion artifact:[{data_ingestion_artifact}]")
+            return data_ingestion_artifact
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def load_case_id_index(self) -> set:
+        """
+        Returns case_id values already ingested by previous incremental runs
+        """
+        try:
+            case_id_index_file_path = self.data_ingestion_config.case_id_index_file_path
+            if not os.path.exists(case_id_index_file_path):
+                return set()
+            case_id_index = pd.read_csv(case_id_index_file_path, usecols=[COLUMN_ID], dtype={COLUMN_ID: str})
+            return set(case_id_index[COLUMN_ID])
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_commit_marker_file_path(self) -> str:
+        return os.path.join(os.path.dirname(self.data_ingestion_config.case_id_index_file_path),
+                            DATA_INGESTION_COMMIT_MARKER_FILE_NAME)
+
+    @staticmethod
+    def get_staged_file_path(file_path: str) -> str:
+        # extension kept last so the staged file is read/written in the format of file_path
+        file_root, file_extension = os.path.splitext(file_path)
+        return f"{file_root}{DATA_INGESTION_STAGED_FILE_SUFFIX}{file_extension}"
+
+    def recover_incremental_commit(self):
+        """
+        Finish or discard the commit of an interrupted incremental run.
+        With a commit marker every staged file is complete and is moved into place (moves already done
+        are skipped), without one the run stopped while staging and its staged files are dropped.
+        Either way partitions and index hold the same rows afterwards.
+        """
+        try:
+            commit_marker_file_path = self.get_commit_marker_file_path()
+            if os.path.exists(commit_marker_file_path):
+                staged_file_paths = read_yaml_file(commit_marker_file_path)
+                for staged_file_path, file_path in staged_file_paths.items():
+                    if os.path.exists(staged_file_path):
+                        os.replace(staged_file_path, file_path)
+                os.remove(commit_marker_file_path)
+                logging.info(f"Completed interrupted incremental commit of: {list(staged_file_paths.values())}")
+            for file_path in [self.data_ingestion_config.case_id_index_file_path] + [
+                    os.path.join(partition_dir, self.get_ingested_file_name())
+                    for partition_dir in (self.data_ingestion_config.incremental_train_dir,
+                                          self.data_ingestion_config.incremental_test_dir)]:
+                staged_file_path = self.get_staged_file_path(file_path)
+                if os.path.exists(staged_file_path):
+                    os.remove(staged_file_path)
+                    logging.info(f"Removed uncommitted staged file: [{staged_file_path}]")
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def commit_appends(self, appends: list):
+        """
+        Append every (src file, dst file, schema) as one unit: dst + src rows are staged next to dst,
+        a commit marker listing the staged files is written atomically, then staged files replace dst.
+        A crash before the marker leaves every dst untouched, a crash after it is completed by
+        recover_incremental_commit on the next run.
+        """
+        try:
+            staged_file_paths = {}
+            for src_file_path, dst_file_path, schema in appends:
+                staged_file_path = self.get_staged_file_path(dst_file_path)
+                if os.path.exists(dst_file_path):
+                    shutil.copyfile(dst_file_path, staged_file_path)
+                append_data_file(src_file_path, staged_file_path, schema=schema)
+                staged_file_paths[staged_file_path] = dst_file_path
+
+            commit_marker_file_path = self.get_commit_marker_file_path()
+            tmp_marker_file_path = f"{commit_marker_file_path}.tmp"
+            write_yaml_file(file_path=tmp_marker_file_path, data=staged_file_paths)
+            os.replace(tmp_marker_file_path, commit_marker_file_path)
+
+            for staged_file_path, dst_file_path in staged_file_paths.items():
+                os.replace(staged_file_path, dst_file_path)
+            os.remove(commit_marker_file_path)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def split_data_as_train_test_incremental(self) -> DataIngestionArtifact:
+        """
+        Ingest only rows whose case_id is not in the on-disk case_id index.
+        New rows are split by hash of case_id (same assignment as streaming mode), written
+        to this run's ingested dir and appended to the persistent train/test partitions,
+        then recorded in the index together with their split. Partitions and index are committed together.
+        """
+        try:
+            start_time = time.time()
+            raw_file_paths = self.get_raw_file_paths()
+
+            ingested_file_name = self.get_ingested_file_name()
+
+            new_train_file_path = os.path.join(self.data_ingestion_config.ingested_train_dir,
+                                               ingested_file_name)
+            new_test_file_path = os.path.join(self.data_ingestion_config.ingested_test_dir,
+                                              ingested_file_name)
+            new_case_id_index_file_path = os.path.join(os.path.dirname(self.data_ingestion_config.ingested_train_dir),
+                                                       DATA_INGESTION_CASE_ID_INDEX_FILE_NAME)
+
+            train_file_path = os.path.join(self.data_ingestion_config.incremental_train_dir,
+                                           ingested_file_name)
+            test_file_path = os.path.join(self.data_ingestion_config.incremental_test_dir,
+                                          ingested_file_name)
+
+            column_schema = self.get_column_schema()
+
+            self.recover_incremental_commit()
+            ingested_case_ids = self.load_case_id_index()
+            logging.info(f"[{len(ingested_case_ids)}] case_id already ingested, "
+                         f"diffing csv files: {raw_file_paths} against them")
+
+            parts_dir, train_part_paths, test_part_paths, index_part_paths, part_row_counts = self.split_parts(
+                raw_file_paths, ingested_case_ids=ingested_case_ids)
+            row_count = sum(part_row_count[0] for part_row_count in part_row_counts)
+
+            # workers only deduplicate within their own file, a case_id seen in an earlier file wins
+            seen_case_ids = set()
+            train_keep_masks, test_keep_masks, index_parts = [], [], []
+            for index_part_path in index_part_paths:
+                index_part = pd.read_csv(index_part_path, dtype={COLUMN_ID: str})
+                is_new = ~index_part[COLUMN_ID].isin(seen_case_ids).to_numpy()
+                seen_case_ids.update(index_part[COLUMN_ID])
+                is_test_row = (index_part[DATA_INGESTION_SPLIT_COLUMN] == "test").to_numpy()
+                train_keep_masks.append(None if is_new.all() else is_new[~is_test_row])
+                test_keep_masks.append(None if is_new.all() else is_new[is_test_row])
+                index_parts.append(index_part[is_new])
+
+            self.merge_parts(train_part_paths, new_train_file_path, keep_masks=train_keep_masks)
+            self.merge_parts(test_part_paths, new_test_file_path, keep_masks=test_keep_masks)
+            new_case_id_index = pd.concat(index_parts, ignore_index=True)
+            new_case_id_index.to_csv(new_case_id_index_file_path, index=False)
+            shutil.rmtree(parts_dir)
+
+            test_row_count = int((new_case_id_index[DATA_INGESTION_SPLIT_COLUMN] == "test").sum())
+            train_row_count = len(new_case_id_index) - test_row_count
+
+            rows_added = train_row_count + test_row_count
+            logging.info(f"Found [{train_row_count}] new training rows and [{test_row_count}] "
+                         f"new test rows in files: {raw_file_paths}")
+
+            if rows_added > 0 or not os.path.exists(train_file_path):
+                # rows are stored and marked ingested together, a crash never leaves one without the other
+                self.commit_appends([
+                    (new_train_file_path, train_file_path, column_schema),
+                    (new_test_file_path, test_file_path, column_schema),
+                    (new_case_id_index_file_path, self.data_ingestion_config.case_id_index_file_path, None)
+                ])
+                logging.info(f"Appended new rows to partitions: [{train_file_path}] and [{test_file_path}]")
+
+            throughput = self.log_throughput(raw_file_paths, row_count=row_count, start_time=start_time)
 
             data_ingestion_artifact = DataIngestionArtifact(train_file_path=train_file_path,
                                                             test_file_path=test_file_path,
                                                             is_ingested=True,
-                                                            message=f"Data ingestion completed successfully."
+                                                            message=f"Incremental data ingestion completed successfully, "
+                                                                    f"{rows_added} new rows added. {throughput}",
+                                                            rows_added=rows_added
                                                             )
             logging.info(f"Data Ingestion artifact:[{data_ingestion_artifact}]")
             return data_ingestion_artifact
@@ -103,7 +548,10 @@ class DataIngestion:
 
     def initiate_data_ingestion(self):
         try:
-            raw_file_path = self.download_data()
+            if self.data_ingestion_config.raw_data_glob is not None:
+                self.collect_raw_files()
+            else:
+                raw_file_path = self.download_data()
             return self.split_data_as_train_test()
         except Exception as e:
             raise CustomException(e, sys)from e
\ No newline at end of file
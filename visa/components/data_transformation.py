@@ -1,17 +1,28 @@
 import os, sys
 import pandas as pd
 import numpy as np
+import scipy.sparse
 from visa.exception import CustomException
 from visa.logger import logging
 from visa.entity.config_entity import DataTransformationConfig
 from visa.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataTransformationArtifact
+from visa.entity.transformation_cache import TransformationCache, describe_estimator
+from visa.entity.transformers import OutlierCapper, DtypeCaster
+from visa.entity.resampling import get_resampler, resample
 from sklearn.compose import ColumnTransformer
-from visa.utils.utils import read_yaml_file, load_data, save_numpy_array_data, save_object
+from visa.utils.utils import read_yaml_file, write_yaml_file, load_data, save_numpy_array_data, save_object, \
+    save_feature_matrix
 from visa.constant import *
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler, OrdinalEncoder, OneHotEncoder, PowerTransformer
-from imblearn.combine import SMOTEENN
+
+TRANSFORMED_TRAIN_CACHE_NAME = "transformed_train"
+TRANSFORMED_TEST_CACHE_NAME = "transformed_test"
+TRANSFORMED_TRAIN_TARGET_CACHE_NAME = "transformed_train_target"
+TRANSFORMED_TEST_TARGET_CACHE_NAME = "transformed_test_target"
+PREPROCESSED_OBJECT_CACHE_NAME = "preprocessed_object"
+
 
 class DataTransformation:
 
@@ -39,7 +50,9 @@ class DataTransformation:
             onehot_columns = dataset_schema[ONE_HOT_COLUMN_KEY]
             transform_columns = dataset_schema[TRANSFORM_COLUMN_KEY]
 
+            # outlier limits are fitted on train and saved with the preprocessor, serving clips the same way
             num_pipeline = Pipeline(steps=[
+                ('outlier_capper', OutlierCapper(factor=1.5, min_unique_values=25)),
                 ('imputer', SimpleImputer(strategy='median')),
                 ('scaler', StandardScaler())
             ]
@@ -71,106 +84,208 @@ class DataTransformation:
                 ('onehot_pipeline', onehot_pipeline, onehot_columns),
                 ('ordinal_pipeline', ordinal_pipeline, ordinal_columns),
                 ('power_transformer', transform_pipeline, transform_columns)
-            ])
-                         
+            ],
+            # one-hot output stays sparse (CSR) through resampling, saving and training
+            sparse_threshold=1.0 if self.data_transformation_config.sparse_features else 0.0)
+
+            if self.data_transformation_config.compact_dtypes:
+                # float32 features halve the memory of every array handed to the models, also at serving time
+                preprocessor = Pipeline(steps=[
+                    ('column_transformer', preprocessor),
+                    ('dtype_caster', DtypeCaster(dtype='float32'))
+                ])
+
             return preprocessor
 
         except Exception as e:
             raise CustomException(e, sys) from e
         
-    def _remove_outliers_IQR(self, col, df):
+    def get_resampler_object(self):
+        """
+        Sampler of resampling_strategy, None when training data is used as is (class_weight, none)
+        """
         try:
-            percentile25 = df[col].quantile(0.25)
-            percentile75 = df[col].quantile(0.75)
-            iqr = percentile75 - percentile25
-            upper_limit = percentile75 + 1.5 * iqr
-            lower_limit = percentile25 - 1.5 * iqr
-            df.loc[(df[col]>upper_limit), col]= upper_limit
-            df.loc[(df[col]<lower_limit), col]= lower_limit 
-            return df
-        
+            return get_resampler(strategy=self.data_transformation_config.resampling_strategy,
+                                 n_jobs=self.data_transformation_config.resampling_n_jobs,
+                                 random_state=42)
         except Exception as e:
-            raise CustomException(e, sys) from e 
-        
-    def initiate_data_transformation(self) -> DataTransformationArtifact:
+            raise CustomException(e, sys) from e
+
+    def get_transformation_settings(self) -> dict:
+        """
+        Every setting the transformed outputs depend on besides the input files
+        """
+        try:
+            return {
+                "preprocessor": describe_estimator(self.get_data_transformer_object()),
+                "resampler": describe_estimator(self.get_resampler_object()),
+                "resample_test": self.data_transformation_config.resample_test
+            }
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_target_array(self, target: pd.Series) -> np.ndarray:
+        """
+        Target as numpy array, integer labels are downcast (int8 for 0/1) in compact mode
+        """
+        try:
+            target_arr = np.array(target)
+            if self.data_transformation_config.compact_dtypes and np.issubdtype(target_arr.dtype, np.integer):
+                target_arr = pd.to_numeric(target_arr, downcast="integer")
+            return target_arr
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def transform_data(self, transformed_train_file_path: str, transformed_test_file_path: str,
+                       transformed_train_target_file_path: str, transformed_test_target_file_path: str,
+                       preprocessing_obj_file_path: str):
+        """
+        Fit preprocessing object and resampler on ingested data and save their outputs
+        """
         try:
             logging.info(f"Obtaining preprocessing object.")
             preprocessing_obj = self.get_data_transformer_object()
 
             logging.info(f"Obtaining training and test file path.")
-            train_file_path = self.data_ingestion_artifact.train_file_path
-            test_file_path = self.data_ingestion_artifact.test_file_path
+            train_file_path = self.data_validation_artifact.train_file_path
+            test_file_path = self.data_validation_artifact.test_file_path
 
             schema_file_path = self.data_validation_artifact.schema_file_path
 
-            logging.info(f"Loading training and test data as pandas dataframe.")
-            train_df = load_data(file_path=train_file_path, schema_file_path=schema_file_path)
-
-            test_df = load_data(file_path=test_file_path, schema_file_path=schema_file_path)
-
             schema = read_yaml_file(file_path=schema_file_path)
 
             target_column_name = schema[TARGET_COLUMN_KEY]
             numerical_columns = schema[NUMERICAL_COLUMN_KEY]
-            
-            continuous_columns=[feature for feature in numerical_columns if len(train_df[feature].unique())>=25]
-            
-            for col in continuous_columns:
-                self._remove_outliers_IQR(col=col, df= train_df)
-            
-            logging.info(f"Outlier capped in train df")
-            
-            for col in continuous_columns:
-                self._remove_outliers_IQR(col=col, df= test_df)
-                
-            logging.info(f"Outlier capped in test df")            
+
+            # only columns used by the preprocessor and the target are read from ingested files
+            required_columns = numerical_columns + schema[ONE_HOT_COLUMN_KEY] + schema[ORDINAL_COLUMN_KEY] + \
+                               schema[TRANSFORM_COLUMN_KEY] + [target_column_name]
+
+            logging.info(f"Loading training and test data as pandas dataframe.")
+            compact_dtypes = self.data_transformation_config.compact_dtypes
+            train_df = load_data(file_path=train_file_path, schema_file_path=schema_file_path,
+                                 columns=required_columns, compact=compact_dtypes)
+
+            test_df = load_data(file_path=test_file_path, schema_file_path=schema_file_path,
+                                columns=required_columns, compact=compact_dtypes)
 
             logging.info(f"Splitting input and target feature from training and testing dataframe.")
             input_feature_train_df = train_df.drop(columns=[target_column_name], axis=1)
-            target_feature_train_df = train_df[target_column_name]
+            target_feature_train_df = self.get_target_array(train_df[target_column_name])
             print(input_feature_train_df)
 
             input_feature_test_df = test_df.drop(columns=[target_column_name], axis=1)
-            target_feature_test_df = test_df[target_column_name]
+            target_feature_test_df = self.get_target_array(test_df[target_column_name])
 
             logging.info(f"Applying preprocessing object on training dataframe and testing dataframe.")
             input_feature_train_arr = preprocessing_obj.fit_transform(input_feature_train_df)
             input_feature_test_arr = preprocessing_obj.transform(input_feature_test_df)
             
-            smt = SMOTEENN(random_state=42,sampling_strategy='all') # all
-            
-            input_feature_train_arr, target_feature_train_df = smt.fit_resample(input_feature_train_arr, target_feature_train_df)
-            
-            input_feature_test_arr, target_feature_test_df = smt.fit_resample(input_feature_test_arr , target_feature_test_df)
+            resampling_strategy = self.data_transformation_config.resampling_strategy
+            resampler = self.get_resampler_object()
+            logging.info(f"Resampling with strategy: [{resampling_strategy}] sampler: [{resampler}]")
+
+            input_feature_train_arr, target_feature_train_df, train_summary = resample(
+                resampler=resampler, X=input_feature_train_arr, y=target_feature_train_df, strategy=resampling_strategy)
+
+            # without test resampling models are evaluated on the real class distribution
+            test_resampler = resampler if self.data_transformation_config.resample_test else None
+            input_feature_test_arr, target_feature_test_df, test_summary = resample(
+                resampler=test_resampler, X=input_feature_test_arr, y=target_feature_test_df,
+                strategy=resampling_strategy if test_resampler is not None else RESAMPLING_STRATEGY_NONE)
+
+            write_yaml_file(file_path=self.data_transformation_config.resampling_report_file_path,
+                            data={"train": dict(train_summary._asdict()), "test": dict(test_summary._asdict())})
+            logging.info(f"Resampling report saved at: [{self.data_transformation_config.resampling_report_file_path}]")
+
+            if self.data_transformation_config.sparse_features:
+                input_feature_train_arr = scipy.sparse.csr_matrix(input_feature_train_arr)
+                input_feature_test_arr = scipy.sparse.csr_matrix(input_feature_test_arr)
+
+            if compact_dtypes:
+                # synthetic samples of SMOTE are generated in float64
+                input_feature_train_arr = input_feature_train_arr.astype(np.float32, copy=False)
+                input_feature_test_arr = input_feature_test_arr.astype(np.float32, copy=False)
 
-            train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
+            logging.info(f"Saving transformed training and test features and targets.")
 
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
+            save_feature_matrix(file_path=transformed_train_file_path, matrix=input_feature_train_arr)
+            save_feature_matrix(file_path=transformed_test_file_path, matrix=input_feature_test_arr)
+            save_numpy_array_data(file_path=transformed_train_target_file_path,
+                                  array=np.asarray(target_feature_train_df))
+            save_numpy_array_data(file_path=transformed_test_target_file_path,
+                                  array=np.asarray(target_feature_test_df))
+
+            logging.info(f"Saving preprocessing object.")
+            save_object(file_path=preprocessing_obj_file_path, obj=preprocessing_obj)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def initiate_data_transformation(self) -> DataTransformationArtifact:
+        try:
+            train_file_path = self.data_validation_artifact.train_file_path
+            test_file_path = self.data_validation_artifact.test_file_path
 
             transformed_train_dir = self.data_transformation_config.transformed_train_dir
             transformed_test_dir = self.data_transformation_config.transformed_test_dir
 
-            train_file_name = os.path.basename(train_file_path).replace(".csv", ".npz")
-            test_file_name = os.path.basename(test_file_path).replace(".csv", ".npz")
+            feature_file_extension = SPARSE_MATRIX_FILE_EXTENSION if self.data_transformation_config.sparse_features \
+                else DENSE_ARRAY_FILE_EXTENSION
+            train_file_name = os.path.splitext(os.path.basename(train_file_path))[0]
+            test_file_name = os.path.splitext(os.path.basename(test_file_path))[0]
 
-            transformed_train_file_path = os.path.join(transformed_train_dir, train_file_name)
-            transformed_test_file_path = os.path.join(transformed_test_dir, test_file_name)
+            transformed_train_file_path = os.path.join(transformed_train_dir, train_file_name + feature_file_extension)
+            transformed_test_file_path = os.path.join(transformed_test_dir, test_file_name + feature_file_extension)
+            transformed_train_target_file_path = os.path.join(
+                transformed_train_dir, train_file_name + DATA_TRANSFORMATION_TARGET_FILE_SUFFIX + DENSE_ARRAY_FILE_EXTENSION)
+            transformed_test_target_file_path = os.path.join(
+                transformed_test_dir, test_file_name + DATA_TRANSFORMATION_TARGET_FILE_SUFFIX + DENSE_ARRAY_FILE_EXTENSION)
+            preprocessing_obj_file_path = self.data_transformation_config.preprocessed_object_file_path
 
-            logging.info(f"Saving transformed training and test array.")
+            output_file_paths = {
+                TRANSFORMED_TRAIN_CACHE_NAME: transformed_train_file_path,
+                TRANSFORMED_TEST_CACHE_NAME: transformed_test_file_path,
+                TRANSFORMED_TRAIN_TARGET_CACHE_NAME: transformed_train_target_file_path,
+                TRANSFORMED_TEST_TARGET_CACHE_NAME: transformed_test_target_file_path,
+                PREPROCESSED_OBJECT_CACHE_NAME: preprocessing_obj_file_path
+            }
 
-            save_numpy_array_data(file_path=transformed_train_file_path, array=train_arr)
-            save_numpy_array_data(file_path=transformed_test_file_path, array=test_arr)
+            transformation_cache = None
+            is_cache_hit = False
+            if self.data_transformation_config.transformation_cache_dir is not None:
+                transformation_cache = TransformationCache(
+                    cache_dir=self.data_transformation_config.transformation_cache_dir)
+                cache_key = transformation_cache.get_cache_key(
+                    file_paths=[train_file_path, test_file_path, self.data_validation_artifact.schema_file_path],
+                    settings=self.get_transformation_settings())
+                logging.info(f"Transformation cache key: [{cache_key}]")
+                is_cache_hit = transformation_cache.load(cache_key=cache_key, dst_file_paths=output_file_paths)
 
-            preprocessing_obj_file_path = self.data_transformation_config.preprocessed_object_file_path
+            if is_cache_hit:
+                logging.info(f"Ingested data, schema and transformer settings unchanged, skipping fit.")
+                message = "Data transformation loaded from cache."
+            else:
+                self.transform_data(transformed_train_file_path=transformed_train_file_path,
+                                    transformed_test_file_path=transformed_test_file_path,
+                                    transformed_train_target_file_path=transformed_train_target_file_path,
+                                    transformed_test_target_file_path=transformed_test_target_file_path,
+                                    preprocessing_obj_file_path=preprocessing_obj_file_path)
+                if transformation_cache is not None:
+                    transformation_cache.store(cache_key=cache_key, src_file_paths=output_file_paths)
+                message = "Data transformation successfull."
 
-            logging.info(f"Saving preprocessing object.")
-            save_object(file_path=preprocessing_obj_file_path, obj=preprocessing_obj)
+            # class_weight strategy leaves the data as is and balances classes in the estimators instead
+            class_weight = "balanced" \
+                if self.data_transformation_config.resampling_strategy == RESAMPLING_STRATEGY_CLASS_WEIGHT else None
 
             data_transformation_artifact = DataTransformationArtifact(is_transformed=True,
-                                                                      message="Data transformation successfull.",
+                                                                      message=message,
                                                                       transformed_train_file_path=transformed_train_file_path,
                                                                       transformed_test_file_path=transformed_test_file_path,
-                                                                      preprocessed_object_file_path=preprocessing_obj_file_path
+                                                                      preprocessed_object_file_path=preprocessing_obj_file_path,
+                                                                      transformed_train_target_file_path=transformed_train_target_file_path,
+                                                                      transformed_test_target_file_path=transformed_test_target_file_path,
+                                                                      class_weight=class_weight
                                                                       )
             logging.info(f"Data transformation artifact: {data_transformation_artifact}")
             return data_transformation_artifact
@@ -1,13 +1,19 @@
 import os
 import sys
+import glob
+import time
+from concurrent.futures import ThreadPoolExecutor
 from visa.constant import *
 from visa.logger import logging
 from visa.entity.config_entity import DataValidationConfig
 from visa.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from visa.config.configuration import Configuartion
 from visa.exception import CustomException
-from visa.utils.utils import read_yaml_file
+from visa.utils.utils import read_yaml_file, write_yaml_file
 from visa.entity.raw_data_validation import IngestedDataValidation
+from visa.entity.schema_validator import SchemaValidator
+
+ROW_SCHEMA_CHECK = "row_schema"
 
 class DataValidation:
 
@@ -23,6 +29,13 @@ class DataValidation:
                 validate_path=self.data_ingestion_artifact.train_file_path, schema_path=self.schema_path)
             self.test_data = IngestedDataValidation(
                 validate_path=self.data_ingestion_artifact.test_file_path, schema_path=self.schema_path)
+            self.schema_validator = SchemaValidator(schema_file_path=self.schema_path,
+                                                    chunk_size=self.data_validation_config.chunk_size)
+            self.validation_report = None
+            self.validation_timings = None
+            # train/test files without rejected rows, the ingested files until rows are validated
+            self.validated_file_paths = {"train": self.data_ingestion_artifact.train_file_path,
+                                         "test": self.data_ingestion_artifact.test_file_path}
         except Exception as e:
             raise CustomException(e, sys) from e
 
@@ -41,59 +54,135 @@ class DataValidation:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def validate_rows(self, file_path: str, split_name: str):
+        """
+        Row level dtype/category/range validation, rejected rows are quarantined.
+        The check fails when the share of rejected rows exceeds max_rejected_ratio, below it the run goes on
+        with a clean copy of train/test files holding the accepted rows only.
+        return: (row schema check, SchemaValidationSummary with the row and null counts of the file)
+        """
+        try:
+            quarantine_file_path = os.path.join(self.data_validation_config.quarantine_dir,
+                                                f"{split_name}_{os.path.splitext(os.path.basename(file_path))[0]}.csv")
+            clean_file_path = None
+            if split_name in self.validated_file_paths:
+                clean_file_path = os.path.join(self.data_validation_config.validated_dir, split_name,
+                                               os.path.basename(file_path))
+            summary = self.schema_validator.validate_file(file_path=file_path,
+                                                          quarantine_file_path=quarantine_file_path,
+                                                          clean_file_path=clean_file_path)
+            if clean_file_path is not None:
+                self.validated_file_paths[split_name] = summary.clean_file_path
+            rejected_ratio = summary.rejected_row_count / summary.row_count if summary.row_count else 0.0
+            check = {
+                "status": rejected_ratio <= self.data_validation_config.max_rejected_ratio,
+                "detail": {"row_count": summary.row_count,
+                           "rejected_row_count": summary.rejected_row_count,
+                           "rejected_ratio": round(rejected_ratio, 6),
+                           "reason_counts": summary.reason_counts,
+                           "quarantine_file_path": summary.quarantine_file_path}
+            }
+            return check, summary
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_files_to_validate(self) -> dict:
+        """
+        Returns label -> file path of every file to validate: train, test and
+        files matching additional_validation_files patterns (extra shards, holdout sets)
+        """
+        try:
+            files_to_validate = {
+                "train": self.data_ingestion_artifact.train_file_path,
+                "test": self.data_ingestion_artifact.test_file_path
+            }
+            for file_pattern in self.data_validation_config.additional_validation_files:
+                for file_path in sorted(glob.glob(os.path.join(ROOT_DIR, file_pattern))):
+                    label = os.path.splitext(os.path.basename(file_path))[0]
+                    while label in files_to_validate:
+                        label = f"{label}_"
+                    files_to_validate[label] = file_path
+            return files_to_validate
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def validate_file(self, label: str, file_path: str):
+        """
+        Run header/column checks and row level checks of one file
+        return: (report of the file, validation time in seconds)
+        """
+        try:
+            start_time = time.time()
+            if label == "train":
+                ingested_data_validation = self.train_data
+            elif label == "test":
+                ingested_data_validation = self.test_data
+            else:
+                ingested_data_validation = IngestedDataValidation(validate_path=file_path,
+                                                                  schema_path=self.schema_path)
+            # only pipeline train/test files have to carry the dataset file name of the schema
+            file_name = os.path.basename(file_path) if label in ("train", "test") else None
+            # row level validation is the only full scan of the file, file level checks reuse its counts
+            row_schema_check, summary = self.validate_rows(file_path=file_path, split_name=label)
+            ingested_data_validation.set_column_stats(row_count=summary.row_count, null_counts=summary.null_counts)
+            report = ingested_data_validation.validate(file_name=file_name)
+            report[ROW_SCHEMA_CHECK] = row_schema_check
+            validation_time = time.time() - start_time
+            logging.info(f"Validated [{label}] file: [{file_path}] in [{validation_time:.3f}] seconds")
+            return report, validation_time
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def is_Validation_successfull(self):
         try:
             validation_status = True
             logging.info("Validation Process Started")
             if self.isFolderPathAvailable() == True:
-                train_filename = os.path.basename(
-                    self.data_ingestion_artifact.train_file_path)
-
-                is_train_filename_validated = self.train_data.validate_filename(
-                    file_name=train_filename)
-
-                is_train_column_numbers_validated = self.train_data.validate_column_length()
-
-                is_train_column_name_same = self.train_data.check_column_names()
-
-                is_train_missing_values_whole_column = self.train_data.missing_values_whole_column()
-
-                self.train_data.replace_null_values_with_null()
-
-                test_filename = os.path.basename(
-                    self.data_ingestion_artifact.test_file_path)
-
-                is_test_filename_validated = self.test_data.validate_filename(
-                    file_name=test_filename)
-
-                is_test_column_numbers_validated = self.test_data.validate_column_length()
-
-                is_test_column_name_same = self.test_data.check_column_names()
-
-                is_test_missing_values_whole_column = self.test_data.missing_values_whole_column()
-
-                self.test_data.replace_null_values_with_null()
-
-                logging.info(
-                    f"Train_set status|is Train filename validated?: {is_train_filename_validated}|is train columns validated?: {is_train_column_numbers_validated}|is train column name validated?: {is_train_column_name_same}|whole missing columns?{is_train_missing_values_whole_column}")
-                logging.info(
-                    f"Test_set status|is Test filename validated?: {is_test_filename_validated}is test col numbers validated?: {is_test_column_numbers_validated}|is test column names validated? {is_test_column_name_same}| whole missing columns? {is_test_missing_values_whole_column}")
-
-                if is_train_filename_validated & is_train_column_numbers_validated & is_train_column_name_same & is_train_missing_values_whole_column:
-                    pass
-                else:
+                files_to_validate = self.get_files_to_validate()
+
+                # checks are independent and mostly I/O bound, files are validated concurrently
+                validation_workers = max(1, min(self.data_validation_config.validation_workers,
+                                                len(files_to_validate)))
+                with ThreadPoolExecutor(max_workers=validation_workers) as executor:
+                    futures = {label: executor.submit(self.validate_file, label, file_path)
+                               for label, file_path in files_to_validate.items()}
+                    results = {label: future.result() for label, future in futures.items()}
+
+                self.validation_report = {
+                    label: {"file_path": files_to_validate[label], "checks": report}
+                    for label, (report, _) in results.items()
+                }
+                self.validation_timings = {label: round(validation_time, 6)
+                                           for label, (_, validation_time) in results.items()}
+                write_yaml_file(file_path=self.data_validation_config.report_file_path, data=self.validation_report)
+                logging.info(f"Validation report saved at: [{self.data_validation_config.report_file_path}]")
+                logging.info(f"Validation timings in seconds: {self.validation_timings}")
+
+                failed_checks = {label: [check for check, result in report.items() if not result["status"]]
+                                 for label, (report, _) in results.items()}
+
+                logging.info(f"Train_set status|failed checks: {failed_checks['train']}")
+                logging.info(f"Test_set status|failed checks: {failed_checks['test']}")
+
+                if len(failed_checks["train"]) > 0:
                     validation_status = False
                     logging.info("Check yout Training Data! Validation Failed")
                     raise ValueError(
-                        "Check your Training data! Validation failed")
+                        f"Check your Training data! Validation failed: {failed_checks['train']}")
 
-                if is_test_filename_validated & is_test_column_numbers_validated & is_test_column_name_same & is_test_missing_values_whole_column:
-                    pass
-                else:
+                if len(failed_checks["test"]) > 0:
                     validation_status = False
                     logging.info("Check your Test data! Validation failed")
                     raise ValueError(
-                        "Check your Testing data! Validation failed")
+                        f"Check your Testing data! Validation failed: {failed_checks['test']}")
+
+                failed_additional_files = {label: checks for label, checks in failed_checks.items()
+                                           if label not in ("train", "test") and len(checks) > 0}
+                if len(failed_additional_files) > 0:
+                    validation_status = False
+                    logging.info("Check your additional data files! Validation failed")
+                    raise ValueError(
+                        f"Check your additional data files! Validation failed: {failed_additional_files}")
 
                 logging.info("Validation Process Completed")
 
@@ -104,9 +193,14 @@ class DataValidation:
 
     def initiate_data_validation(self):
         try:
+            is_validated = self.is_Validation_successfull()
             data_validation_artifact = DataValidationArtifact(
-                schema_file_path=self.schema_path, is_validated=self.is_Validation_successfull(),
-                message="Data validation performed"
+                schema_file_path=self.schema_path, is_validated=is_validated,
+                message="Data validation performed",
+                report_file_path=self.data_validation_config.report_file_path,
+                validation_timings=self.validation_timings,
+                train_file_path=self.validated_file_paths["train"],
+                test_file_path=self.validated_file_paths["test"]
             )
             logging.info(
                 f"Data validation artifact: {data_validation_artifact}")
@@ -92,8 +92,8 @@ class ModelEvaluation:
             trained_model_file_path = self.model_trainer_artifact.trained_model_file_path
             trained_model_object = load_object(file_path=trained_model_file_path)
 
-            train_file_path = self.data_ingestion_artifact.train_file_path
-            test_file_path = self.data_ingestion_artifact.test_file_path
+            train_file_path = self.data_validation_artifact.train_file_path
+            test_file_path = self.data_validation_artifact.test_file_path
 
             schema_file_path = self.data_validation_artifact.schema_file_path
 
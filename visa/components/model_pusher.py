@@ -2,6 +2,11 @@ from visa.logger import logging
 from visa.exception import CustomException
 from visa.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact 
 from visa.entity.config_entity import ModelPusherConfig
+from visa.constant import DATA_DRIFT_SKETCH_FILE_NAME, NEIGHBOR_INDEX_DIR_NAME
+from visa.components.model_trainer import VisaApprovalPredictor
+from visa.entity.compiled_forest import compile_model_object
+from visa.entity.neighbor_index import NeighborIndexClassifier
+from visa.utils.utils import load_object, save_object
 import os, sys
 import shutil
 
@@ -18,6 +23,42 @@ class ModelPusher:
         except Exception as e:
             raise CustomException(e,sys) from e 
     
+    def export_compiled_model(self, evaluated_model_file_path: str, export_model_file_path: str) -> bool:
+        """
+        Save the evaluated model with its estimator replaced by its compiled counterpart
+        return: False when the estimator has no compiled implementation
+        """
+        try:
+            model = load_object(file_path=evaluated_model_file_path)
+            compiled_model = compile_model_object(model.trained_model_object)
+            if compiled_model is None:
+                logging.info(f"[{type(model.trained_model_object).__name__}] has no compiled implementation, "
+                             f"exporting it as is")
+                return False
+            save_object(file_path=export_model_file_path,
+                        obj=VisaApprovalPredictor(preprocessing_object=model.preprocessing_object,
+                                                  trained_model_object=compiled_model))
+            logging.info(f"Compiled model exported, size: [{os.path.getsize(evaluated_model_file_path)}] -> "
+                         f"[{os.path.getsize(export_model_file_path)}] bytes")
+            return True
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def export_neighbor_index(self, export_model_file_path: str):
+        """
+        Copy the neighbour index of an exported knn model next to it, the model then memory maps that copy
+        """
+        try:
+            model = load_object(file_path=export_model_file_path)
+            if not isinstance(model.trained_model_object, NeighborIndexClassifier):
+                return
+            model.trained_model_object.relocate(
+                index_dir=os.path.join(os.path.dirname(export_model_file_path), NEIGHBOR_INDEX_DIR_NAME))
+            save_object(file_path=export_model_file_path, obj=model)
+            logging.info(f"Neighbour index copied in export dir:[{model.trained_model_object.index_dir}]")
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
     def export_model(self)-> ModelPusherConfig:
         try:
             evaluated_model_file_path = self.model_evaluation_artifact.evaluated_model_path
@@ -27,10 +68,19 @@ class ModelPusher:
             logging.info(f"Exporting model file: [{export_model_file_path}]")
             os.makedirs(export_dir, exist_ok=True)
 
-            shutil.copy(src=evaluated_model_file_path, dst=export_model_file_path)
+            if not (self.model_pusher_config.compile_model
+                    and self.export_compiled_model(evaluated_model_file_path=evaluated_model_file_path,
+                                                   export_model_file_path=export_model_file_path)):
+                shutil.copy(src=evaluated_model_file_path, dst=export_model_file_path)
+                self.export_neighbor_index(export_model_file_path=export_model_file_path)
 
             logging.info(
                 f"Trained model: {evaluated_model_file_path} is copied in export dir:[{export_model_file_path}]")
+
+            sketch_file_path = os.path.join(os.path.dirname(evaluated_model_file_path), DATA_DRIFT_SKETCH_FILE_NAME)
+            if os.path.exists(sketch_file_path):
+                shutil.copy(src=sketch_file_path, dst=os.path.join(export_dir, DATA_DRIFT_SKETCH_FILE_NAME))
+                logging.info(f"Data sketch: {sketch_file_path} is copied in export dir:[{export_dir}]")
             
             model_pusher_artifact = ModelPusherArtifact(is_model_pusher=True,
                                                         export_model_file_path=export_model_file_path
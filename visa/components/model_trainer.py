@@ -1,12 +1,21 @@
 from visa.exception import CustomException
+import os
 import sys
+import shutil
 from visa.logger import logging
 from typing import List
-from visa.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact
+from visa.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, DataDriftArtifact
 from visa.entity.config_entity import ModelTrainerConfig
-from visa.utils.utils import load_numpy_array_data, save_object, load_object
+from visa.utils.utils import load_numpy_array_data, load_feature_matrix, save_object, load_object, write_yaml_file
 from visa.entity.model_factory import MetricInfoArtifact, ModelFactory, GridSearchedBestModel
 from visa.entity.model_factory import evaluate_classification_model
+from visa.entity.neighbor_index import NeighborIndexClassifier, NEIGHBOR_INDEX_BACKEND_IVF, tune_n_probe, \
+    get_neighbor_index_report
+from visa.constant import DATA_DRIFT_SKETCH_FILE_NAME, NEIGHBOR_INDEX_DIR_NAME, NEIGHBOR_INDEX_REPORT_FILE_NAME
+from sklearn.neighbors import KNeighborsClassifier
+
+# test rows the ivf recall is tuned on
+NEIGHBOR_INDEX_TUNING_ROWS = 1000
 
 #load transfomered training and testing dataset
 #reading model config file
@@ -58,34 +67,67 @@ class VisaApprovalPredictor:
 class ModelTrainer:
 
     def __init__(self, model_trainer_config: ModelTrainerConfig,
-                 data_transformation_artifact: DataTransformationArtifact):
+                 data_transformation_artifact: DataTransformationArtifact,
+                 data_drift_artifact: DataDriftArtifact = None):
         try:
             logging.info(f"{'>>' * 30}Model trainer log started.{'<<' * 30} ")
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_transformation_artifact
+            self.data_drift_artifact = data_drift_artifact
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_neighbor_index_model(self, knn: KNeighborsClassifier, x_train, y_train, x_test, y_test):
+        """
+        Build the neighbour index a selected knn is served from, next to the trained model,
+        and report its speed/accuracy trade-off on the testing dataset
+        """
+        try:
+            trained_model_dir = os.path.dirname(self.model_trainer_config.trained_model_file_path)
+            backend = self.model_trainer_config.neighbor_index_backend
+            index = NeighborIndexClassifier.from_estimator(knn=knn, X=x_train, y=y_train,
+                                                           index_dir=os.path.join(trained_model_dir,
+                                                                                  NEIGHBOR_INDEX_DIR_NAME),
+                                                           backend=backend,
+                                                           n_lists=self.model_trainer_config.neighbor_index_n_lists)
+            if index.backend == NEIGHBOR_INDEX_BACKEND_IVF:
+                tune_n_probe(index=index, knn=knn, X=x_test[:NEIGHBOR_INDEX_TUNING_ROWS],
+                             target_recall=self.model_trainer_config.neighbor_index_target_recall)
+            report = get_neighbor_index_report(knn=knn, index=index, X=x_test, y=y_test)
+            report_file_path = os.path.join(trained_model_dir, NEIGHBOR_INDEX_REPORT_FILE_NAME)
+            write_yaml_file(file_path=report_file_path, data=report)
+            logging.info(f"Neighbour index report saved at: [{report_file_path}]")
+            return index
         except Exception as e:
             raise CustomException(e, sys) from e
 
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         try:
-            logging.info(f"Loading transformed training dataset")
-            transformed_train_file_path = self.data_transformation_artifact.transformed_train_file_path
-            train_array = load_numpy_array_data(file_path=transformed_train_file_path)
+            # sparse features are kept as CSR matrices, estimators consume them without densifying.
+            # dense arrays are memory mapped read-only when mmap_mode is set, grid search workers
+            # then share one copy through the page cache
+            mmap_mode = self.model_trainer_config.mmap_mode
+            logging.info(f"Loading transformed training dataset, mmap_mode: [{mmap_mode}]")
+            x_train = load_feature_matrix(file_path=self.data_transformation_artifact.transformed_train_file_path,
+                                          mmap_mode=mmap_mode)
+            y_train = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_target_file_path,
+                                            mmap_mode=mmap_mode)
 
             logging.info(f"Loading transformed testing dataset")
-            transformed_test_file_path = self.data_transformation_artifact.transformed_test_file_path
-            test_array = load_numpy_array_data(file_path=transformed_test_file_path)
-
-            logging.info(f"Splitting training and testing input and target feature")
-            x_train, y_train, x_test, y_test = train_array[:, :-1], train_array[:, -1], test_array[:, :-1], test_array[
-                                                                                                            :, -1]
+            x_test = load_feature_matrix(file_path=self.data_transformation_artifact.transformed_test_file_path,
+                                         mmap_mode=mmap_mode)
+            y_test = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_target_file_path,
+                                           mmap_mode=mmap_mode)
 
             logging.info(f"Extracting model config file path")
             model_config_file_path = self.model_trainer_config.model_config_file_path
     
 
             logging.info(f"Initializing model factory class using above model config file: {model_config_file_path}")
-            model_factory = ModelFactory(model_config_path=model_config_file_path)
+            model_factory = ModelFactory(model_config_path=model_config_file_path,
+                                         class_weight=self.data_transformation_artifact.class_weight,
+                                         fold_cache_dir=self.model_trainer_config.fold_cache_dir,
+                                         checkpoint_dir=self.model_trainer_config.checkpoint_dir)
 
             base_accuracy = self.model_trainer_config.base_accuracy
             logging.info(f"Expected accuracy: {base_accuracy}")
@@ -102,18 +144,32 @@ class ModelTrainer:
             logging.info(f"Evaluation all trained model on training and testing dataset both")
             metric_info: MetricInfoArtifact = evaluate_classification_model(model_list=model_list, X_train=x_train,
                                                                         y_train=y_train, X_test=x_test, y_test=y_test,
-                                                                        base_accuracy=base_accuracy)
+                                                                        base_accuracy=base_accuracy,
+                                                                        n_jobs=self.model_trainer_config.evaluation_n_jobs,
+                                                                        train_sample_size=self.model_trainer_config.evaluation_train_sample_size)
             print(metric_info.model_name)
             logging.info(f"Best found model on both training and testing dataset.")
 
             preprocessing_obj = load_object(file_path=self.data_transformation_artifact.preprocessed_object_file_path)
             model_object = metric_info.model_object
+            if self.model_trainer_config.neighbor_index_backend is not None \
+                    and isinstance(model_object, KNeighborsClassifier):
+                model_object = self.get_neighbor_index_model(knn=model_object, x_train=x_train, y_train=y_train,
+                                                             x_test=x_test, y_test=y_test)
 
             trained_model_file_path = self.model_trainer_config.trained_model_file_path
             us_visa_model = VisaApprovalPredictor(preprocessing_object=preprocessing_obj,
                                                       trained_model_object=model_object)
             logging.info(f"Saving model at path: {trained_model_file_path}")
             save_object(file_path=trained_model_file_path, obj=us_visa_model)
+            # search results now live in the trained model, a rerun starts a fresh search
+            model_factory.clear_checkpoint()
+
+            if self.data_drift_artifact is not None:
+                # sketch of the training data is the drift reference once this model becomes the best model
+                sketch_file_path = os.path.join(os.path.dirname(trained_model_file_path), DATA_DRIFT_SKETCH_FILE_NAME)
+                shutil.copy(src=self.data_drift_artifact.sketch_file_path, dst=sketch_file_path)
+                logging.info(f"Saving data sketch at path: {sketch_file_path}")
 
             model_trainer_artifact = ModelTrainerArtifact(is_trained=True, message="Model Trained successfully",
                                                           trained_model_file_path=trained_model_file_path,
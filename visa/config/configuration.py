@@ -49,11 +49,56 @@ class Configuartion:
                 data_ingestion_info[DATA_INGESTION_TEST_DIR_KEY]
             )
 
+            # columnar ingested files are typed from the same schema used by data validation
+            data_validation_info = self.config_info[DATA_VALIDATION_CONFIG_KEY]
+            schema_file_path = os.path.join(ROOT_DIR,
+            data_validation_info[DATA_VALIDATION_SCHEMA_DIR_KEY],
+            data_validation_info[DATA_VALIDATION_SCHEMA_FILE_NAME_KEY]
+            )
+
+            # download cache is shared by all runs hence not time stamped
+            download_cache_dir = None
+            if data_ingestion_info.get(DATA_INGESTION_DOWNLOAD_CACHE_DIR_KEY) is not None:
+                download_cache_dir = os.path.join(
+                    artifact_dir,
+                    DATA_INGESTION_ARTIFACT_DIR,
+                    data_ingestion_info[DATA_INGESTION_DOWNLOAD_CACHE_DIR_KEY]
+                )
+
+            # incremental ingestion keeps its train/test partitions and case_id index across runs
+            incremental_data_dir = os.path.join(
+                artifact_dir,
+                DATA_INGESTION_ARTIFACT_DIR,
+                data_ingestion_info.get(DATA_INGESTION_INCREMENTAL_DIR_KEY, "incremental")
+            )
+            incremental_train_dir = os.path.join(
+                incremental_data_dir,
+                data_ingestion_info[DATA_INGESTION_INGESTED_DIR_NAME_KEY],
+                data_ingestion_info[DATA_INGESTION_TRAIN_DIR_KEY]
+            )
+            incremental_test_dir = os.path.join(
+                incremental_data_dir,
+                data_ingestion_info[DATA_INGESTION_INGESTED_DIR_NAME_KEY],
+                data_ingestion_info[DATA_INGESTION_TEST_DIR_KEY]
+            )
+            case_id_index_file_path = os.path.join(incremental_data_dir, DATA_INGESTION_CASE_ID_INDEX_FILE_NAME)
+
             data_ingestion_config=DataIngestionConfig(
                 dataset_download_url=dataset_download_url,
                 raw_data_dir=raw_data_dir, 
                 ingested_train_dir=ingested_train_dir, 
-                ingested_test_dir=ingested_test_dir
+                ingested_test_dir=ingested_test_dir,
+                download_cache_dir=download_cache_dir,
+                ingestion_mode=data_ingestion_info.get(DATA_INGESTION_MODE_KEY, INGESTION_MODE_BATCH),
+                chunk_size=data_ingestion_info.get(DATA_INGESTION_CHUNK_SIZE_KEY, 100000),
+                test_size=data_ingestion_info.get(DATA_INGESTION_TEST_SIZE_KEY, 0.2),
+                ingested_file_format=data_ingestion_info.get(DATA_INGESTION_FILE_FORMAT_KEY, FILE_FORMAT_CSV),
+                schema_file_path=schema_file_path,
+                incremental_train_dir=incremental_train_dir,
+                incremental_test_dir=incremental_test_dir,
+                case_id_index_file_path=case_id_index_file_path,
+                raw_data_glob=data_ingestion_info.get(DATA_INGESTION_RAW_DATA_GLOB_KEY),
+                ingestion_workers=data_ingestion_info.get(DATA_INGESTION_WORKERS_KEY) or os.cpu_count()
             )
             logging.info(f"Data Ingestion config: {data_ingestion_config}")
             return data_ingestion_config
@@ -78,8 +123,27 @@ class Configuartion:
             data_validation_config[DATA_VALIDATION_SCHEMA_FILE_NAME_KEY]
             )
 
+            report_file_path = os.path.join(data_validation_artifact_dir,
+            data_validation_config.get(DATA_VALIDATION_REPORT_FILE_NAME_KEY, "report.yaml")
+            )
+
+            quarantine_dir = os.path.join(data_validation_artifact_dir,
+            data_validation_config.get(DATA_VALIDATION_QUARANTINE_DIR_KEY, "quarantine")
+            )
+
+            validated_dir = os.path.join(data_validation_artifact_dir,
+            data_validation_config.get(DATA_VALIDATION_VALIDATED_DIR_KEY, "validated")
+            )
+
             data_validation_config = DataValidationConfig(
-                schema_file_path=schema_file_path
+                schema_file_path=schema_file_path,
+                report_file_path=report_file_path,
+                quarantine_dir=quarantine_dir,
+                validated_dir=validated_dir,
+                max_rejected_ratio=data_validation_config.get(DATA_VALIDATION_MAX_REJECTED_RATIO_KEY, 0.0),
+                chunk_size=data_validation_config.get(DATA_VALIDATION_CHUNK_SIZE_KEY, 100000),
+                additional_validation_files=data_validation_config.get(DATA_VALIDATION_ADDITIONAL_FILES_KEY) or [],
+                validation_workers=data_validation_config.get(DATA_VALIDATION_WORKERS_KEY) or 4
             )
             logging.info(f"Data Validation config: {data_validation_config}")
             return data_validation_config
@@ -87,6 +151,42 @@ class Configuartion:
             raise CustomException(e,sys) from e
 
 
+    def get_data_drift_config(self) -> DataDriftConfig:
+        try:
+            artifact_dir = self.training_pipeline_config.artifact_dir
+
+            data_drift_artifact_dir = os.path.join(
+                artifact_dir,
+                DATA_DRIFT_ARTIFACT_DIR,
+                self.time_stamp
+            )
+            data_drift_config_info = self.config_info.get(DATA_DRIFT_CONFIG_KEY) or dict()
+
+            sketch_file_path = os.path.join(data_drift_artifact_dir, DATA_DRIFT_SKETCH_FILE_NAME)
+            report_file_path = os.path.join(data_drift_artifact_dir,
+            data_drift_config_info.get(DATA_DRIFT_REPORT_FILE_NAME_KEY, "drift_report.yaml")
+            )
+
+            # reference sketch is looked up next to the best model recorded by model evaluation
+            model_evaluation_file_path = self.get_model_evaluation_config().model_evaluation_file_path
+
+            data_drift_config = DataDriftConfig(
+                sketch_file_path=sketch_file_path,
+                report_file_path=report_file_path,
+                model_evaluation_file_path=model_evaluation_file_path,
+                numerical_columns=data_drift_config_info.get(DATA_DRIFT_NUMERICAL_COLUMNS_KEY,
+                                                             ["prevailing_wage", "no_of_employees", "company_age"]),
+                n_bins=data_drift_config_info.get(DATA_DRIFT_N_BINS_KEY, 10),
+                psi_threshold=data_drift_config_info.get(DATA_DRIFT_PSI_THRESHOLD_KEY, 0.2),
+                ks_threshold=data_drift_config_info.get(DATA_DRIFT_KS_THRESHOLD_KEY, 0.1),
+                fail_on_drift=data_drift_config_info.get(DATA_DRIFT_FAIL_ON_DRIFT_KEY, False)
+            )
+            logging.info(f"Data drift config: {data_drift_config}")
+            return data_drift_config
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+
     def get_data_transformation_config(self) -> DataTransformationConfig:
         try:
             artifact_dir = self.training_pipeline_config.artifact_dir
@@ -119,12 +219,34 @@ class Configuartion:
             data_transformation_config_info[DATA_TRANSFORMATION_TEST_DIR_NAME_KEY]
 
             )
-            
+
+            resampling_report_file_path = os.path.join(
+                data_transformation_artifact_dir,
+                data_transformation_config_info.get(DATA_TRANSFORMATION_RESAMPLING_REPORT_FILE_NAME_KEY,
+                                                    "resampling_report.yaml")
+            )
+
+            # fitted outputs are cached across runs hence not time stamped
+            transformation_cache_dir = None
+            if data_transformation_config_info.get(DATA_TRANSFORMATION_CACHE_DIR_KEY) is not None:
+                transformation_cache_dir = os.path.join(
+                    artifact_dir,
+                    DATA_TRANSFORMATION_ARTIFACT_DIR,
+                    data_transformation_config_info[DATA_TRANSFORMATION_CACHE_DIR_KEY]
+                )
 
             data_transformation_config=DataTransformationConfig(
                 preprocessed_object_file_path=preprocessed_object_file_path,
                 transformed_train_dir=transformed_train_dir,
-                transformed_test_dir=transformed_test_dir
+                transformed_test_dir=transformed_test_dir,
+                transformation_cache_dir=transformation_cache_dir,
+                sparse_features=data_transformation_config_info.get(DATA_TRANSFORMATION_SPARSE_FEATURES_KEY, True),
+                resampling_strategy=data_transformation_config_info.get(DATA_TRANSFORMATION_RESAMPLING_STRATEGY_KEY,
+                                                                        RESAMPLING_STRATEGY_SMOTEENN),
+                resample_test=data_transformation_config_info.get(DATA_TRANSFORMATION_RESAMPLE_TEST_KEY, True),
+                resampling_n_jobs=data_transformation_config_info.get(DATA_TRANSFORMATION_RESAMPLING_N_JOBS_KEY),
+                resampling_report_file_path=resampling_report_file_path,
+                compact_dtypes=data_transformation_config_info.get(DATA_TRANSFORMATION_COMPACT_DTYPES_KEY, False)
             )
 
             logging.info(f"Data transformation config: {data_transformation_config}")
@@ -157,10 +279,38 @@ class Configuartion:
 
             base_accuracy = model_trainer_config_info[MODEL_TRAINER_BASE_ACCURACY_KEY]
 
+            # fold scores are reused across runs hence not time stamped
+            fold_cache_dir = None
+            if model_trainer_config_info.get(MODEL_TRAINER_FOLD_CACHE_DIR_KEY) is not None:
+                fold_cache_dir = os.path.join(
+                    artifact_dir,
+                    MODEL_TRAINER_ARTIFACT_DIR,
+                    model_trainer_config_info[MODEL_TRAINER_FOLD_CACHE_DIR_KEY]
+                )
+
+            # an interrupted run resumes from the checkpoint of the same config and data, not time stamped either
+            checkpoint_dir = None
+            if model_trainer_config_info.get(MODEL_TRAINER_CHECKPOINT_DIR_KEY) is not None:
+                checkpoint_dir = os.path.join(
+                    artifact_dir,
+                    MODEL_TRAINER_ARTIFACT_DIR,
+                    model_trainer_config_info[MODEL_TRAINER_CHECKPOINT_DIR_KEY]
+                )
+
             model_trainer_config = ModelTrainerConfig(
                 trained_model_file_path=trained_model_file_path,
                 base_accuracy=base_accuracy,
-                model_config_file_path=model_config_file_path
+                model_config_file_path=model_config_file_path,
+                mmap_mode=model_trainer_config_info.get(MODEL_TRAINER_MMAP_MODE_KEY),
+                fold_cache_dir=fold_cache_dir,
+                checkpoint_dir=checkpoint_dir,
+                evaluation_n_jobs=model_trainer_config_info.get(MODEL_TRAINER_EVALUATION_N_JOBS_KEY),
+                evaluation_train_sample_size=model_trainer_config_info.get(
+                    MODEL_TRAINER_EVALUATION_TRAIN_SAMPLE_SIZE_KEY),
+                neighbor_index_backend=model_trainer_config_info.get(MODEL_TRAINER_NEIGHBOR_INDEX_BACKEND_KEY),
+                neighbor_index_target_recall=model_trainer_config_info.get(
+                    MODEL_TRAINER_NEIGHBOR_INDEX_TARGET_RECALL_KEY, 0.95),
+                neighbor_index_n_lists=model_trainer_config_info.get(MODEL_TRAINER_NEIGHBOR_INDEX_N_LISTS_KEY)
             )
             logging.info(f"Model trainer config: {model_trainer_config}")
             return model_trainer_config                                                                          
@@ -193,7 +343,10 @@ class Configuartion:
             export_dir_path = os.path.join(ROOT_DIR,model_pusher_config_info[MODEL_PUSHER_MODEL_EXPORT_DIR_KEY],
                                            time_stamp)
             
-            model_pusher_config = ModelPusherConfig(export_dir_path=export_dir_path)
+            model_pusher_config = ModelPusherConfig(
+                export_dir_path=export_dir_path,
+                compile_model=model_pusher_config_info.get(MODEL_PUSHER_COMPILE_MODEL_KEY, False)
+            )
             logging.info(f"Model Pusher Config{model_pusher_config}")
             return model_pusher_config
             
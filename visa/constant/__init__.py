@@ -21,6 +21,35 @@ DATA_INGESTION_RAW_DATA_DIR_KEY = "raw_data_dir"
 DATA_INGESTION_INGESTED_DIR_NAME_KEY = "ingested_dir"
 DATA_INGESTION_TRAIN_DIR_KEY = "ingested_train_dir"
 DATA_INGESTION_TEST_DIR_KEY = "ingested_test_dir"
+DATA_INGESTION_DOWNLOAD_CACHE_DIR_KEY = "download_cache_dir"
+DATA_INGESTION_MODE_KEY = "ingestion_mode"
+DATA_INGESTION_CHUNK_SIZE_KEY = "chunk_size"
+DATA_INGESTION_TEST_SIZE_KEY = "test_size"
+DATA_INGESTION_FILE_FORMAT_KEY = "ingested_file_format"
+DATA_INGESTION_INCREMENTAL_DIR_KEY = "incremental_dir"
+DATA_INGESTION_CASE_ID_INDEX_FILE_NAME = "case_id_index.csv"
+DATA_INGESTION_SPLIT_COLUMN = "split"
+DATA_INGESTION_RAW_DATA_GLOB_KEY = "raw_data_glob"
+DATA_INGESTION_WORKERS_KEY = "ingestion_workers"
+DATA_INGESTION_PARTS_DIR_NAME = "parts"
+# lists staged partition/index files of an incremental run, written once all of them are staged
+DATA_INGESTION_COMMIT_MARKER_FILE_NAME = "incremental_commit.yaml"
+DATA_INGESTION_STAGED_FILE_SUFFIX = ".staged"
+
+# Data Ingestion modes
+INGESTION_MODE_BATCH = "batch"
+INGESTION_MODE_STREAMING = "streaming"
+INGESTION_MODE_INCREMENTAL = "incremental"
+
+# Ingested data file formats
+FILE_FORMAT_CSV = "csv"
+FILE_FORMAT_PARQUET = "parquet"
+FILE_FORMAT_FEATHER = "feather"
+FILE_FORMAT_EXTENSIONS = {
+    FILE_FORMAT_CSV: ".csv",
+    FILE_FORMAT_PARQUET: ".parquet",
+    FILE_FORMAT_FEATHER: ".feather"
+}
 
 # Training pipeline related variable
 TRAINING_PIPELINE_CONFIG_KEY = "training_pipeline_config"
@@ -39,6 +68,27 @@ DATA_VALIDATION_ARTIFACT_DIR="data_validation"
 DATA_VALIDATION_CONFIG_KEY = "data_validation_config"
 DATA_VALIDATION_SCHEMA_FILE_NAME_KEY = "schema_file_path"
 DATA_VALIDATION_SCHEMA_DIR_KEY = "schema_dir"
+DATA_VALIDATION_REPORT_FILE_NAME_KEY = "report_file_name"
+DATA_VALIDATION_QUARANTINE_DIR_KEY = "quarantine_dir"
+DATA_VALIDATION_VALIDATED_DIR_KEY = "validated_dir"
+DATA_VALIDATION_MAX_REJECTED_RATIO_KEY = "max_rejected_ratio"
+DATA_VALIDATION_CHUNK_SIZE_KEY = "chunk_size"
+DATA_VALIDATION_ADDITIONAL_FILES_KEY = "additional_validation_files"
+DATA_VALIDATION_WORKERS_KEY = "validation_workers"
+
+# Data Drift related variable
+DATA_DRIFT_CONFIG_KEY = "data_drift_config"
+DATA_DRIFT_ARTIFACT_DIR = "data_drift"
+DATA_DRIFT_REPORT_FILE_NAME_KEY = "report_file_name"
+DATA_DRIFT_NUMERICAL_COLUMNS_KEY = "numerical_columns"
+DATA_DRIFT_N_BINS_KEY = "n_bins"
+DATA_DRIFT_PSI_THRESHOLD_KEY = "psi_threshold"
+DATA_DRIFT_KS_THRESHOLD_KEY = "ks_threshold"
+DATA_DRIFT_FAIL_ON_DRIFT_KEY = "fail_on_drift"
+# sketch travels with the model: trained model dir, export dir
+DATA_DRIFT_SKETCH_FILE_NAME = "data_sketch.yaml"
+NEIGHBOR_INDEX_DIR_NAME = "neighbor_index"
+NEIGHBOR_INDEX_REPORT_FILE_NAME = "neighbor_index_report.yaml"
 
 # Data Transformation related variable
 DATA_TRANSFORMATION_CONFIG_KEY = "data_transformation_config"
@@ -48,9 +98,33 @@ DATA_TRANSFORMATION_TRAIN_DIR_NAME_KEY = "transformed_train_dir"
 DATA_TRANSFORMATION_TEST_DIR_NAME_KEY = "transformed_test_dir"
 DATA_TRANSFORMATION_PREPROCESSING_DIR_KEY = "preprocessing_dir"
 DATA_TRANSFORMATION_PREPROCESSED_FILE_NAME_KEY = "preprocessed_object_file_path"
+DATA_TRANSFORMATION_CACHE_DIR_KEY = "transformation_cache_dir"
+DATA_TRANSFORMATION_SPARSE_FEATURES_KEY = "sparse_features"
+DATA_TRANSFORMATION_TARGET_FILE_SUFFIX = "_target"
+DATA_TRANSFORMATION_RESAMPLING_STRATEGY_KEY = "resampling_strategy"
+DATA_TRANSFORMATION_RESAMPLE_TEST_KEY = "resample_test"
+DATA_TRANSFORMATION_RESAMPLING_N_JOBS_KEY = "resampling_n_jobs"
+DATA_TRANSFORMATION_RESAMPLING_REPORT_FILE_NAME_KEY = "resampling_report_file_name"
+DATA_TRANSFORMATION_COMPACT_DTYPES_KEY = "compact_dtypes"
+
+# Resampling strategies of imbalanced target
+RESAMPLING_STRATEGY_SMOTEENN = "smoteenn"
+RESAMPLING_STRATEGY_SMOTE = "smote"
+RESAMPLING_STRATEGY_RANDOM_UNDER = "random_under"
+RESAMPLING_STRATEGY_RANDOM_OVER = "random_over"
+RESAMPLING_STRATEGY_CLASS_WEIGHT = "class_weight"
+RESAMPLING_STRATEGY_NONE = "none"
+RESAMPLING_STRATEGIES = [RESAMPLING_STRATEGY_SMOTEENN, RESAMPLING_STRATEGY_SMOTE, RESAMPLING_STRATEGY_RANDOM_UNDER,
+                         RESAMPLING_STRATEGY_RANDOM_OVER, RESAMPLING_STRATEGY_CLASS_WEIGHT, RESAMPLING_STRATEGY_NONE]
+
+# Transformed feature file extensions
+SPARSE_MATRIX_FILE_EXTENSION = ".npz"
+DENSE_ARRAY_FILE_EXTENSION = ".npy"
 
 TARGET_COLUMN_KEY = "target_column"
 DATASET_SCHEMA_COLUMNS_KEY = "ColumnNames"
+SCHEMA_FILE_NAME_KEY = "FileName"
+SCHEMA_COLUMN_CONSTRAINTS_KEY = "ColumnConstraints"
 
 NUMERICAL_COLUMN_KEY = "Numerical_columns"
 ONE_HOT_COLUMN_KEY = "Onehot_columns"
@@ -66,6 +140,14 @@ MODEL_TRAINER_TRAINED_MODEL_FILE_NAME_KEY ="model_file_name"
 MODEL_TRAINER_BASE_ACCURACY_KEY = "base_accuracy"
 MODEL_TRAINER_MODEL_CONFIG_DIR_KEY ="model_config_dir"
 MODEL_TRAINER_MODEL_CONFIG_FILE_NAME_KEY ="model_config_file_name"
+MODEL_TRAINER_MMAP_MODE_KEY = "mmap_mode"
+MODEL_TRAINER_FOLD_CACHE_DIR_KEY = "fold_cache_dir"
+MODEL_TRAINER_CHECKPOINT_DIR_KEY = "checkpoint_dir"
+MODEL_TRAINER_EVALUATION_N_JOBS_KEY = "evaluation_n_jobs"
+MODEL_TRAINER_EVALUATION_TRAIN_SAMPLE_SIZE_KEY = "evaluation_train_sample_size"
+MODEL_TRAINER_NEIGHBOR_INDEX_BACKEND_KEY = "neighbor_index_backend"
+MODEL_TRAINER_NEIGHBOR_INDEX_TARGET_RECALL_KEY = "neighbor_index_target_recall"
+MODEL_TRAINER_NEIGHBOR_INDEX_N_LISTS_KEY = "neighbor_index_n_lists"
 
 
 # Model Evaluation Related variable
@@ -80,3 +162,4 @@ MODEL_PATH_KEY ="model_path"
 # Model Pusher Related Variables
 MODEL_PUSHER_CONFIG_KEY ="model_pusher_config"
 MODEL_PUSHER_MODEL_EXPORT_DIR_KEY = "model_export_dir"
+MODEL_PUSHER_COMPILE_MODEL_KEY = "compile_model"
@@ -1,15 +1,20 @@
 from collections import namedtuple
 
 DataIngestionArtifact = namedtuple("DataIngestionArtifact",
-[ "train_file_path", "test_file_path", "is_ingested", "message"])
+[ "train_file_path", "test_file_path", "is_ingested", "message", "rows_added"])
 
 
 DataValidationArtifact = namedtuple("DataValidationArtifact",
-["schema_file_path","is_validated","message"])
+["schema_file_path","is_validated","message","report_file_path","validation_timings",
+ "train_file_path","test_file_path"])
+
+DataDriftArtifact = namedtuple("DataDriftArtifact",
+["sketch_file_path","report_file_path","is_drift_detected","drifted_columns","message"])
 
 DataTransformationArtifact = namedtuple("DataTransformationArtifact",
  ["is_transformed", "message", "transformed_train_file_path","transformed_test_file_path",
-     "preprocessed_object_file_path"])
+     "preprocessed_object_file_path", "transformed_train_target_file_path", "transformed_test_target_file_path",
+     "class_weight"])
 
 
 
@@ -0,0 +1,189 @@
+import sys
+import numpy as np
+import scipy.sparse
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+from visa.exception import CustomException
+from visa.logger import logging
+
+# rows traversed together, bounds the (rows, trees) node index buffer
+COMPILED_FOREST_BATCH_SIZE = 4096
+
+COMPILABLE_FOREST_CLASSES = (RandomForestClassifier, ExtraTreesClassifier)
+
+
+class CompiledForestClassifier:
+    """
+    Fitted tree ensemble flattened into contiguous NumPy node arrays.
+    Nodes of all trees are concatenated, leaves are their own children so a batch of rows walks
+    every tree at once, one tree level per step, until all (row, tree) pairs reached a leaf. Probabilities are accumulated tree after tree like
+    the sklearn forest, predictions are identical to the source estimator.
+    Only what inference needs is kept (no impurities, sample counts, estimator objects).
+    """
+
+    def __init__(self, classes, n_features_in: int, roots, feature, threshold, children_left, children_right,
+                 missing_go_to_left, leaf_value, max_depth: int):
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.missing_go_to_left = missing_go_to_left
+        self.leaf_value = leaf_value
+        self.max_depth = max_depth
+        self.is_leaf = children_left == np.arange(children_left.shape[0])
+
+    @classmethod
+    def from_estimator(cls, forest):
+        """
+        forest: fitted single output RandomForestClassifier / ExtraTreesClassifier
+        """
+        try:
+            if not isinstance(forest, COMPILABLE_FOREST_CLASSES):
+                raise Exception(f"Cannot compile [{type(forest).__name__}], "
+                                f"expected one of {[klass.__name__ for klass in COMPILABLE_FOREST_CLASSES]}")
+            if getattr(forest, "n_outputs_", 1) != 1:
+                raise Exception("Multi output forests cannot be compiled")
+
+            roots, features, thresholds, lefts, rights, missing_lefts, values = [], [], [], [], [], [], []
+            offset = 0
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                node_ids = np.arange(tree.node_count)
+                is_leaf = tree.children_left == -1
+                roots.append(offset)
+                features.append(np.where(is_leaf, 0, tree.feature))
+                thresholds.append(tree.threshold)
+                lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+                rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+                missing_left = getattr(tree, "missing_go_to_left", None)
+                missing_lefts.append(np.zeros(tree.node_count, dtype=bool) if missing_left is None
+                                     else missing_left.astype(bool))
+                # class probabilities of a node, as DecisionTreeClassifier.predict_proba normalizes them
+                value = tree.value[:, 0, :]
+                normalizer = value.sum(axis=1, keepdims=True)
+                normalizer[normalizer == 0.0] = 1.0
+                values.append(value / normalizer)
+                offset += tree.node_count
+
+            index_dtype = np.int32 if offset < np.iinfo(np.int32).max else np.int64
+            feature_dtype = np.int16 if forest.n_features_in_ < np.iinfo(np.int16).max else np.int32
+            return cls(classes=forest.classes_,
+                       n_features_in=forest.n_features_in_,
+                       roots=np.asarray(roots, dtype=index_dtype),
+                       feature=np.concatenate(features).astype(feature_dtype),
+                       threshold=np.concatenate(thresholds),
+                       children_left=np.concatenate(lefts).astype(index_dtype),
+                       children_right=np.concatenate(rights).astype(index_dtype),
+                       missing_go_to_left=np.concatenate(missing_lefts),
+                       leaf_value=np.concatenate(values),
+                       max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _get_leaves(self, X: np.ndarray) -> np.ndarray:
+        """
+        return: (rows, trees) leaf node of every row in every tree
+        """
+        n_trees = self.roots.shape[0]
+        nodes = np.tile(self.roots, X.shape[0])
+        # offset of the row in flattened X of every (row, tree) pair, pairs reaching a leaf leave the active set
+        active = np.arange(nodes.shape[0])
+        active_row_offsets = (active // n_trees) * X.shape[1]
+        X = X.ravel()
+        for _ in range(self.max_depth):
+            active_nodes = nodes[active]
+            values = X[active_row_offsets + self.feature[active_nodes]]
+            # sklearn trees compare float32 features against float64 thresholds
+            go_left = values <= self.threshold[active_nodes]
+            is_missing = np.isnan(values)
+            if is_missing.any():
+                go_left[is_missing] = self.missing_go_to_left[active_nodes[is_missing]]
+            active_nodes = np.where(go_left, self.children_left[active_nodes], self.children_right[active_nodes])
+            nodes[active] = active_nodes
+            is_internal = ~self.is_leaf[active_nodes]
+            internal_count = np.count_nonzero(is_internal)
+            if internal_count == 0:
+                break
+            # leaves loop on themselves, the active set is only compacted once it pays off
+            if internal_count < 0.75 * active.shape[0]:
+                active, active_row_offsets = active[is_internal], active_row_offsets[is_internal]
+        return nodes.reshape(-1, n_trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        try:
+            if scipy.sparse.issparse(X):
+                X = X.toarray()
+            X = np.asarray(X, dtype=np.float32)
+            if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+                raise Exception(f"X has shape {X.shape}, expected [n_samples, {self.n_features_in_}] features")
+            proba = np.zeros((X.shape[0], self.classes_.shape[0]), dtype=np.float64)
+            for start in range(0, X.shape[0], COMPILED_FOREST_BATCH_SIZE):
+                leaves = self._get_leaves(X[start: start + COMPILED_FOREST_BATCH_SIZE])
+                batch_proba = proba[start: start + COMPILED_FOREST_BATCH_SIZE]
+                for tree_index in range(leaves.shape[1]):
+                    batch_proba += self.leaf_value[leaves[:, tree_index]]
+            proba /= self.roots.shape[0]
+            return proba
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def predict(self, X) -> np.ndarray:
+        try:
+            return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def __repr__(self):
+        return f"{type(self).__name__}(n_estimators={self.roots.shape[0]}, max_depth={self.max_depth})"
+
+
+def get_probe_rows(compiled_model: CompiledForestClassifier, n_rows: int = 256, random_state: int = 42,
+                   missing_ratio: float = 0.1) -> np.ndarray:
+    """
+    Rows made of split thresholds of every feature and their next float32 value,
+    so they land on both sides of the split boundaries of the forest.
+    Infinite thresholds (splits of forests fit on missing values) are left out,
+    missing_ratio of the values are NaN to probe the missing value routing.
+    """
+    rng = np.random.default_rng(random_state)
+    probe_rows = np.zeros((n_rows, compiled_model.n_features_in_), dtype=np.float32)
+    is_split = ~compiled_model.is_leaf
+    for feature_index in range(compiled_model.n_features_in_):
+        thresholds = compiled_model.threshold[is_split & (compiled_model.feature == feature_index)]
+        thresholds = thresholds[np.isfinite(thresholds)]
+        if thresholds.shape[0] == 0:
+            continue
+        values = rng.choice(thresholds, size=n_rows).astype(np.float32)
+        probe_rows[:, feature_index] = np.where(rng.random(n_rows) < 0.5, values,
+                                                np.nextafter(values, np.float32(np.inf)))
+    if missing_ratio > 0:
+        probe_rows[rng.random(probe_rows.shape) < missing_ratio] = np.nan
+    return probe_rows
+
+
+def compile_model_object(model, verify: bool = True):
+    """
+    verify: compare compiled and source predictions on probe rows around the split thresholds
+    return: compiled counterpart of model, None when model has no compiled implementation
+    """
+    try:
+        if isinstance(model, COMPILABLE_FOREST_CLASSES) and getattr(model, "n_outputs_", 1) == 1:
+            compiled_model = CompiledForestClassifier.from_estimator(model)
+            if verify:
+                probe_rows = get_probe_rows(compiled_model)
+                try:
+                    expected_predictions = model.predict(probe_rows)
+                except ValueError:
+                    # sklearn versions without missing value support in forests reject NaN rows
+                    logging.info(f"[{model}] does not predict missing values, probing without them")
+                    probe_rows = get_probe_rows(compiled_model, missing_ratio=0.0)
+                    expected_predictions = model.predict(probe_rows)
+                if not np.array_equal(compiled_model.predict(probe_rows), expected_predictions):
+                    raise Exception(f"Compiled model predictions differ from [{model}] predictions")
+            logging.info(f"Compiled [{model}] into [{compiled_model}]")
+            return compiled_model
+        return None
+    except Exception as e:
+        raise CustomException(e, sys) from e
@@ -2,19 +2,39 @@ from collections import namedtuple
 
 
 DataIngestionConfig=namedtuple("DataIngestionConfig",
-["dataset_download_url","raw_data_dir","ingested_train_dir","ingested_test_dir"])
+["dataset_download_url","raw_data_dir","ingested_train_dir","ingested_test_dir","download_cache_dir",
+ "ingestion_mode","chunk_size","test_size","ingested_file_format","schema_file_path",
+ "incremental_train_dir","incremental_test_dir","case_id_index_file_path","raw_data_glob","ingestion_workers"])
 
 
-DataValidationConfig = namedtuple("DataValidationConfig", ["schema_file_path"])
+DataValidationConfig = namedtuple("DataValidationConfig", ["schema_file_path","report_file_path","quarantine_dir",
+                                                           "validated_dir",
+                                                           "max_rejected_ratio","chunk_size",
+                                                           "additional_validation_files","validation_workers"])
+
+DataDriftConfig = namedtuple("DataDriftConfig", ["sketch_file_path","report_file_path","model_evaluation_file_path",
+                                                 "numerical_columns","n_bins","psi_threshold","ks_threshold",
+                                                 "fail_on_drift"])
 
 DataTransformationConfig = namedtuple("DataTransformationConfig", ["transformed_train_dir",
                                                                    "transformed_test_dir",
-                                                                   "preprocessed_object_file_path"])
-
-ModelTrainerConfig = namedtuple("ModelTrainerConfig", ["trained_model_file_path","base_accuracy", "model_config_file_path"])
+                                                                   "preprocessed_object_file_path",
+                                                                   "transformation_cache_dir",
+                                                                   "sparse_features",
+                                                                   "resampling_strategy",
+                                                                   "resample_test",
+                                                                   "resampling_n_jobs",
+                                                                   "resampling_report_file_path",
+                                                                   "compact_dtypes"])
+
+ModelTrainerConfig = namedtuple("ModelTrainerConfig", ["trained_model_file_path","base_accuracy", "model_config_file_path",
+                                                       "mmap_mode", "fold_cache_dir",
+                                                       "checkpoint_dir", "evaluation_n_jobs",
+                                                       "evaluation_train_sample_size", "neighbor_index_backend",
+                                                       "neighbor_index_target_recall", "neighbor_index_n_lists"])
 
 ModelEvaluationConfig = namedtuple("ModelEvaluationConfig", ["model_evaluation_file_path","time_stamp"])
 
-ModelPusherConfig = namedtuple("ModelPusherConfig", ["export_dir_path"])
+ModelPusherConfig = namedtuple("ModelPusherConfig", ["export_dir_path", "compile_model"])
 
 TrainingPipelineConfig = namedtuple("TrainingPipelineConfig", ["artifact_dir"])
\ No newline at end of file
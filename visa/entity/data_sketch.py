@@ -0,0 +1,172 @@
+import sys
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+from visa.exception import CustomException
+from visa.logger import logging
+from visa.utils.utils import read_yaml_file, write_yaml_file, read_dataframe
+
+SKETCH_ROW_COUNT_KEY = "row_count"
+SKETCH_NUMERICAL_KEY = "numerical"
+SKETCH_CATEGORICAL_KEY = "categorical"
+SKETCH_BIN_EDGES_KEY = "bin_edges"
+SKETCH_COUNTS_KEY = "counts"
+SKETCH_NULL_COUNT_KEY = "null_count"
+
+# floor of bin proportions, keeps PSI finite when a bin is empty on one side
+PSI_EPSILON = 1e-6
+
+ColumnDrift = namedtuple("ColumnDrift", ["column", "psi", "ks", "is_drifted"])
+
+
+def get_bin_edges(values: np.ndarray, n_bins: int) -> np.ndarray:
+    """
+    Interior edges of n_bins equal frequency bins, the outer bins are open ended
+    so values outside the reference range still land in a bin
+    """
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.array([], dtype=float)
+    return np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+
+
+def get_bin_counts(values: np.ndarray, bin_edges: np.ndarray) -> np.ndarray:
+    values = values[~np.isnan(values)]
+    bin_index = np.searchsorted(bin_edges, values, side="right")
+    return np.bincount(bin_index, minlength=len(bin_edges) + 1)
+
+
+def get_proportions(counts: np.ndarray) -> np.ndarray:
+    total = counts.sum()
+    if total == 0:
+        return np.full(len(counts), 1.0 / max(len(counts), 1))
+    return counts / total
+
+
+def population_stability_index(reference_counts: np.ndarray, current_counts: np.ndarray) -> float:
+    reference = np.clip(get_proportions(reference_counts), PSI_EPSILON, None)
+    current = np.clip(get_proportions(current_counts), PSI_EPSILON, None)
+    return float(np.sum((current - reference) * np.log(current / reference)))
+
+
+def ks_statistic(reference_counts: np.ndarray, current_counts: np.ndarray) -> float:
+    """
+    Kolmogorov-Smirnov statistic evaluated at the bin edges of both histograms
+    """
+    return float(np.max(np.abs(np.cumsum(get_proportions(reference_counts))
+                               - np.cumsum(get_proportions(current_counts)))))
+
+
+class DataSketch:
+    """
+    Compact summary of a dataset used for drift checks: fixed-bin histograms of numerical
+    columns and category counts of categorical columns. A sketch is a few kilobytes of yaml,
+    so drift against the training data of a model never needs the training file itself.
+    """
+
+    def __init__(self, row_count: int, numerical: dict, categorical: dict):
+        self.row_count = row_count
+        self.numerical = numerical
+        self.categorical = categorical
+
+    @classmethod
+    def from_dataframe(cls, dataframe: pd.DataFrame, numerical_columns: list, categorical_columns: list,
+                       n_bins: int = 10, bin_edges: dict = None):
+        """
+        dataframe: pd.DataFrame data to summarize
+        bin_edges: dict column -> interior edges, computed from the data when not given.
+        Pass the edges of a reference sketch to get histograms comparable with it.
+        """
+        try:
+            numerical = {}
+            for column in numerical_columns:
+                values = pd.to_numeric(dataframe[column], errors="coerce").to_numpy(dtype=float)
+                if bin_edges is not None and column in bin_edges:
+                    column_bin_edges = np.asarray(bin_edges[column], dtype=float)
+                else:
+                    column_bin_edges = get_bin_edges(values, n_bins=n_bins)
+                numerical[column] = {
+                    SKETCH_BIN_EDGES_KEY: column_bin_edges.tolist(),
+                    SKETCH_COUNTS_KEY: get_bin_counts(values, column_bin_edges).tolist(),
+                    SKETCH_NULL_COUNT_KEY: int(np.isnan(values).sum())
+                }
+            categorical = {}
+            for column in categorical_columns:
+                values = dataframe[column]
+                counts = values.dropna().astype(str).value_counts()
+                categorical[column] = {
+                    SKETCH_COUNTS_KEY: {category: int(count) for category, count in counts.items()},
+                    SKETCH_NULL_COUNT_KEY: int(values.isna().sum())
+                }
+            return cls(row_count=len(dataframe), numerical=numerical, categorical=categorical)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @classmethod
+    def from_files(cls, file_paths: list, numerical_columns: list, categorical_columns: list,
+                   n_bins: int = 10, bin_edges: dict = None):
+        try:
+            columns = list(numerical_columns) + list(categorical_columns)
+            dataframe = pd.concat([read_dataframe(file_path=file_path, columns=columns) for file_path in file_paths],
+                                  ignore_index=True)
+            return cls.from_dataframe(dataframe=dataframe, numerical_columns=numerical_columns,
+                                      categorical_columns=categorical_columns, n_bins=n_bins, bin_edges=bin_edges)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @classmethod
+    def load(cls, file_path: str):
+        try:
+            content = read_yaml_file(file_path=file_path)
+            return cls(row_count=content[SKETCH_ROW_COUNT_KEY],
+                       numerical=content[SKETCH_NUMERICAL_KEY],
+                       categorical=content[SKETCH_CATEGORICAL_KEY])
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def save(self, file_path: str):
+        try:
+            write_yaml_file(file_path=file_path, data={SKETCH_ROW_COUNT_KEY: self.row_count,
+                                                       SKETCH_NUMERICAL_KEY: self.numerical,
+                                                       SKETCH_CATEGORICAL_KEY: self.categorical})
+            logging.info(f"Data sketch saved at: [{file_path}]")
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_bin_edges(self) -> dict:
+        return {column: histogram[SKETCH_BIN_EDGES_KEY] for column, histogram in self.numerical.items()}
+
+    def compare(self, current_sketch, psi_threshold: float, ks_threshold: float) -> list:
+        """
+        Drift of current_sketch against this (reference) sketch.
+        Numerical histograms must share the reference bin edges.
+        return: list of ColumnDrift, ks is None for categorical columns
+        """
+        try:
+            column_drifts = []
+            for column, histogram in self.numerical.items():
+                if column not in current_sketch.numerical:
+                    continue
+                current_histogram = current_sketch.numerical[column]
+                if current_histogram[SKETCH_BIN_EDGES_KEY] != histogram[SKETCH_BIN_EDGES_KEY]:
+                    raise Exception(f"Histograms of [{column}] are built on different bin edges")
+                reference_counts = np.asarray(histogram[SKETCH_COUNTS_KEY], dtype=float)
+                current_counts = np.asarray(current_histogram[SKETCH_COUNTS_KEY], dtype=float)
+                psi = population_stability_index(reference_counts, current_counts)
+                ks = ks_statistic(reference_counts, current_counts)
+                column_drifts.append(ColumnDrift(column=column, psi=psi, ks=ks,
+                                                 is_drifted=psi > psi_threshold or ks > ks_threshold))
+
+            for column, category_counts in self.categorical.items():
+                if column not in current_sketch.categorical:
+                    continue
+                reference_counts = category_counts[SKETCH_COUNTS_KEY]
+                current_counts = current_sketch.categorical[column][SKETCH_COUNTS_KEY]
+                categories = sorted(set(reference_counts) | set(current_counts))
+                psi = population_stability_index(
+                    np.array([reference_counts.get(category, 0) for category in categories], dtype=float),
+                    np.array([current_counts.get(category, 0) for category in categories], dtype=float))
+                column_drifts.append(ColumnDrift(column=column, psi=psi, ks=None, is_drifted=psi > psi_threshold))
+            return column_drifts
+        except Exception as e:
+            raise CustomException(e, sys) from e
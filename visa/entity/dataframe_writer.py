@@ -0,0 +1,114 @@
+import os
+import sys
+import pandas as pd
+from visa.constant import *
+from visa.exception import CustomException
+from visa.utils.utils import get_file_format, apply_schema_dtypes
+
+
+class DataFrameWriter:
+    """
+    Incrementally write dataframe chunks into a single csv, parquet or feather file.
+    Columnar files get a fixed arrow schema from the first non-empty chunk, typed from schema.yaml
+    (columns holding no value yet take their schema.yaml type instead of the arrow null type):
+    parquet keeps category columns dictionary encoded in every row group, feather (arrow ipc file)
+    cannot replace dictionaries between batches so category columns are stored as plain values
+    and re-typed by load_data.
+    """
+
+    def __init__(self, file_path: str, schema: dict = None):
+        try:
+            self.file_path = file_path
+            self.file_format = get_file_format(file_path)
+            self.schema = schema
+            self.row_count = 0
+            self._writer = None
+            self._arrow_schema = None
+            self._is_first_chunk = True
+            # first table seen, only used to write the file schema when every chunk was empty
+            self._empty_table = None
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _get_schema_arrow_type(self, column: str):
+        import pyarrow as pa
+        dtype = (self.schema or {}).get(column)
+        if dtype == "int":
+            return pa.int64()
+        if dtype == "float":
+            return pa.float64()
+        if dtype == "category":
+            return pa.dictionary(pa.int8(), pa.string())
+        return None
+
+    def _get_arrow_schema(self, table_schema):
+        import pyarrow as pa
+        fields = []
+        for field in table_schema:
+            field_type = field.type
+            value_type = field_type.value_type if pa.types.is_dictionary(field_type) else field_type
+            if pa.types.is_null(value_type):
+                field_type = self._get_schema_arrow_type(field.name) or field_type
+            if pa.types.is_dictionary(field_type):
+                if self.file_format == FILE_FORMAT_PARQUET:
+                    field_type = pa.dictionary(pa.int32(), field_type.value_type)
+                else:
+                    field_type = field_type.value_type
+            fields.append(pa.field(field.name, field_type))
+        return pa.schema(fields)
+
+    def write(self, dataframe: pd.DataFrame):
+        """
+        Append a chunk to the file. The first chunk defines the csv header even if it is empty,
+        columnar files are opened with the first non-empty chunk.
+        """
+        try:
+            if self.file_format == FILE_FORMAT_CSV:
+                dataframe.to_csv(self.file_path, mode="a", header=self._is_first_chunk, index=False)
+            else:
+                import pyarrow as pa
+                if self.schema is not None:
+                    dataframe = apply_schema_dtypes(dataframe, self.schema)
+                table = pa.Table.from_pandas(dataframe, preserve_index=False)
+                if self._writer is None and table.num_rows == 0:
+                    # an empty chunk types its value-less columns as null, no schema is frozen from it
+                    if self._empty_table is None:
+                        self._empty_table = table
+                else:
+                    if self._writer is None:
+                        self._open_writer(table.schema)
+                    self._writer.write_table(table.select(self._arrow_schema.names).cast(self._arrow_schema))
+            self.row_count += len(dataframe)
+            self._is_first_chunk = False
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _open_writer(self, table_schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._arrow_schema = self._get_arrow_schema(table_schema)
+        if self.file_format == FILE_FORMAT_PARQUET:
+            self._writer = pq.ParquetWriter(self.file_path, self._arrow_schema)
+        else:
+            self._writer = pa.ipc.new_file(self.file_path, self._arrow_schema)
+
+    def close(self):
+        try:
+            if self._writer is None and self._empty_table is not None:
+                # only empty chunks were written, the file still carries their columns
+                self._open_writer(self._empty_table.schema)
+            self._empty_table = None
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import stat
+import hashlib
+import tempfile
+from six.moves import urllib
+from visa.exception import CustomException
+from visa.logger import logging
+from visa.utils.utils import get_file_sha256, link_or_copy_file
+
+CACHE_BLOB_DIR = "blobs"
+CACHE_META_DIR = "meta"
+
+META_SOURCE_KEY = "source"
+META_ETAG_KEY = "etag"
+META_LAST_MODIFIED_KEY = "last_modified"
+META_SIZE_KEY = "size"
+META_MTIME_KEY = "mtime_ns"
+META_SHA256_KEY = "sha256"
+
+REMOTE_SCHEMES = ("http", "https", "ftp")
+
+
+class DownloadCache:
+    """
+    Content addressed cache for dataset downloads.
+    Every source (url, file:// url or plain path) has a meta file keyed by the source,
+    holding etag/last-modified/size/sha256 of the last fetched content.
+    Content is stored once under blobs/<sha256> and hard linked into run directories.
+    """
+
+    def __init__(self, cache_dir: str):
+        try:
+            self.cache_dir = cache_dir
+            self.blob_dir = os.path.join(cache_dir, CACHE_BLOB_DIR)
+            self.meta_dir = os.path.join(cache_dir, CACHE_META_DIR)
+            os.makedirs(self.blob_dir, exist_ok=True)
+            os.makedirs(self.meta_dir, exist_ok=True)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_dir, sha256)
+
+    def get_meta_path(self, source: str) -> str:
+        source_key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        return os.path.join(self.meta_dir, f"{source_key}.json")
+
+    def read_meta(self, source: str) -> dict:
+        try:
+            meta_path = self.get_meta_path(source)
+            if not os.path.exists(meta_path):
+                return None
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+            blob_path = self.get_blob_path(meta[META_SHA256_KEY])
+            # a meta entry is only usable while its blob is intact
+            if not os.path.exists(blob_path) or os.path.getsize(blob_path) != meta[META_SIZE_KEY]:
+                return None
+            return meta
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def write_meta(self, source: str, meta: dict):
+        try:
+            meta_path = self.get_meta_path(source)
+            tmp_path = f"{meta_path}.tmp"
+            with open(tmp_path, "w") as meta_file:
+                json.dump(meta, meta_file, indent=2)
+            os.replace(tmp_path, meta_path)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _store_blob(self, tmp_file_path: str, sha256: str) -> str:
+        """
+        Move a fully written temporary file into the blob store.
+        Identical content already present in the store is kept and the temporary file dropped.
+        """
+        blob_path = self.get_blob_path(sha256)
+        if os.path.exists(blob_path):
+            os.remove(tmp_file_path)
+        else:
+            os.replace(tmp_file_path, blob_path)
+            # blobs are shared through hard links, protect them against in place edits
+            os.chmod(blob_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        return blob_path
+
+    def _is_intact(self, meta: dict) -> bool:
+        """
+        Check a blob before it is reused, a corrupted blob is evicted so the caller fetches it again
+        """
+        if self.verify(meta[META_SHA256_KEY]):
+            return True
+        blob_path = self.get_blob_path(meta[META_SHA256_KEY])
+        logging.warning(f"Cached blob :[{blob_path}] does not match its sha256, evicting it")
+        os.remove(blob_path)
+        return False
+
+    def _fetch_local(self, source: str, file_path: str) -> dict:
+        file_stat = os.stat(file_path)
+        meta = self.read_meta(source)
+        if meta is not None and meta[META_SIZE_KEY] == file_stat.st_size \
+                and meta.get(META_MTIME_KEY) == file_stat.st_mtime_ns and self._is_intact(meta):
+            logging.info(f"Download cache hit for :[{source}] (size and mtime unchanged)")
+            return meta
+
+        fd, tmp_file_path = tempfile.mkstemp(dir=self.blob_dir, suffix=".part")
+        os.close(fd)
+        with open(file_path, "rb") as src_file, open(tmp_file_path, "wb") as dst_file:
+            sha256 = hashlib.sha256()
+            for block in iter(lambda: src_file.read(1024 * 1024), b""):
+                sha256.update(block)
+                dst_file.write(block)
+        sha256 = sha256.hexdigest()
+        self._store_blob(tmp_file_path=tmp_file_path, sha256=sha256)
+        meta = {META_SOURCE_KEY: source,
+                META_SIZE_KEY: file_stat.st_size,
+                META_MTIME_KEY: file_stat.st_mtime_ns,
+                META_SHA256_KEY: sha256}
+        logging.info(f"Download cache stored :[{source}] as blob :[{sha256}]")
+        return meta
+
+    def _fetch_remote(self, source: str) -> dict:
+        meta = self.read_meta(source)
+        request = urllib.request.Request(source)
+        if meta is not None:
+            if meta.get(META_ETAG_KEY):
+                request.add_header("If-None-Match", meta[META_ETAG_KEY])
+            if meta.get(META_LAST_MODIFIED_KEY):
+                request.add_header("If-Modified-Since", meta[META_LAST_MODIFIED_KEY])
+        try:
+            response = urllib.request.urlopen(request)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and meta is not None:
+                if self._is_intact(meta):
+                    logging.info(f"Download cache hit for :[{source}] (not modified)")
+                    return meta
+                # blob evicted, read_meta now returns None and the retry is unconditional
+                return self._fetch_remote(source=source)
+            raise
+
+        with response:
+            headers = response.headers
+            etag = headers.get("ETag")
+            last_modified = headers.get("Last-Modified")
+            content_length = headers.get("Content-Length")
+
+            # server ignored the conditional request but advertises the same content
+            if meta is not None and etag is not None and etag == meta.get(META_ETAG_KEY) \
+                    and content_length is not None and int(content_length) == meta[META_SIZE_KEY] \
+                    and self._is_intact(meta):
+                logging.info(f"Download cache hit for :[{source}] (etag unchanged)")
+                return meta
+
+            fd, tmp_file_path = tempfile.mkstemp(dir=self.blob_dir, suffix=".part")
+            sha256 = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, "wb") as dst_file:
+                for block in iter(lambda: response.read(1024 * 1024), b""):
+                    sha256.update(block)
+                    size += len(block)
+                    dst_file.write(block)
+
+        if content_length is not None and int(content_length) != size:
+            os.remove(tmp_file_path)
+            raise Exception(f"Incomplete download from [{source}]: expected {content_length} bytes got {size}")
+
+        sha256 = sha256.hexdigest()
+        self._store_blob(tmp_file_path=tmp_file_path, sha256=sha256)
+        logging.info(f"Download cache stored :[{source}] as blob :[{sha256}]")
+        return {META_SOURCE_KEY: source,
+                META_ETAG_KEY: etag,
+                META_LAST_MODIFIED_KEY: last_modified,
+                META_SIZE_KEY: size,
+                META_SHA256_KEY: sha256}
+
+    def fetch(self, source: str) -> str:
+        """
+        Make sure content of source is present in the cache, re-fetching only when it changed
+        source: str http(s)/ftp url, file:// url or plain file path
+        return: path of cached blob
+        """
+        try:
+            parsed_source = urllib.parse.urlparse(source)
+            if parsed_source.scheme in REMOTE_SCHEMES:
+                meta = self._fetch_remote(source=source)
+            else:
+                if parsed_source.scheme == "file":
+                    file_path = urllib.request.url2pathname(parsed_source.path)
+                else:
+                    file_path = source
+                source = os.path.abspath(file_path)
+                meta = self._fetch_local(source=source, file_path=source)
+            self.write_meta(source=source, meta=meta)
+            return self.get_blob_path(meta[META_SHA256_KEY])
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def materialize(self, source: str, dst_file_path: str) -> str:
+        """
+        Place content of source at dst_file_path, hard linked to the cached blob
+        source: str url or path of dataset
+        dst_file_path: str location inside run directory
+        """
+        try:
+            blob_path = self.fetch(source=source)
+            link_or_copy_file(src_file_path=blob_path, dst_file_path=dst_file_path)
+            logging.info(f"Cached blob :[{blob_path}] linked into :[{dst_file_path}]")
+            return dst_file_path
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def verify(self, sha256: str) -> bool:
+        """
+        Re-hash a cached blob and compare with its content address
+        """
+        try:
+            return get_file_sha256(self.get_blob_path(sha256)) == sha256
+        except Exception as e:
+            raise CustomException(e, sys) from e
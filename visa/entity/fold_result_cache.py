@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import hashlib
+import tempfile
+import numpy as np
+import scipy
+import scipy.sparse
+import sklearn
+from visa.exception import CustomException
+from visa.logger import logging
+from visa.entity.transformation_cache import describe_estimator
+
+FOLD_SCORE_KEY = "score"
+FOLD_FIT_TIME_KEY = "fit_time"
+
+
+def get_library_versions() -> dict:
+    """
+    Versions of the libraries fitted models and scores depend on
+    """
+    return {"sklearn": sklearn.__version__, "numpy": np.__version__, "scipy": scipy.__version__}
+
+
+def get_data_fingerprint(X, y) -> str:
+    """
+    sha256 of features (dense, memory mapped or scipy sparse) and target, computed once per search
+    """
+    try:
+        fingerprint = hashlib.sha256()
+        if scipy.sparse.issparse(X):
+            X = X.tocsr()
+            arrays = [X.data, X.indices, X.indptr]
+            fingerprint.update(f"csr:{X.shape}".encode("utf-8"))
+        else:
+            arrays = [np.asarray(X)]
+            fingerprint.update(f"dense:{np.shape(X)}".encode("utf-8"))
+        arrays.append(np.asarray(y))
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            fingerprint.update(str(array.dtype).encode("utf-8"))
+            fingerprint.update(memoryview(array).cast("B"))
+        return fingerprint.hexdigest()
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+class FoldResultCache:
+    """
+    On disk cache of cross validation fold scores shared by all runs.
+    A fold result is keyed by the data fingerprint, the estimator class and all its parameters,
+    the cv splitter and fold index, the scorer and the library versions, so only new grid points
+    or changed data are trained again.
+    """
+
+    def __init__(self, cache_dir: str):
+        try:
+            self.cache_dir = cache_dir
+            os.makedirs(cache_dir, exist_ok=True)
+            self.library_versions = get_library_versions()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_key(self, data_fingerprint: str, estimator, cv, fold_index: int, scoring) -> str:
+        try:
+            key_content = {
+                "data": data_fingerprint,
+                "estimator": describe_estimator(estimator),
+                "cv": repr(cv),
+                "fold": fold_index,
+                "scoring": repr(scoring),
+                "versions": self.library_versions
+            }
+            return hashlib.sha256(json.dumps(key_content, sort_keys=True).encode("utf-8")).hexdigest()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_file_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> dict:
+        """
+        return: cached fold result, None when absent
+        """
+        try:
+            file_path = self.get_file_path(key)
+            if not os.path.exists(file_path):
+                return None
+            with open(file_path) as result_file:
+                return json.load(result_file)
+        except Exception as e:
+            logging.info(f"Ignoring unreadable fold result [{key}]: {e}")
+            return None
+
+    def put(self, key: str, result: dict):
+        try:
+            file_path = self.get_file_path(key)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            fd, tmp_file_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".part")
+            with os.fdopen(fd, "w") as result_file:
+                json.dump(result, result_file)
+            os.replace(tmp_file_path, file_path)
+        except Exception as e:
+            raise CustomException(e, sys) from e
@@ -1,15 +1,27 @@
 import importlib
+import inspect
+import time
+import functools
 from pyexpat import model
 import numpy as np
 import yaml
 from visa.exception import CustomException
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 from collections import namedtuple
 from typing import List
 from visa.logger import logging
-from sklearn.metrics import accuracy_score, f1_score
+from sklearn.metrics import accuracy_score, f1_score, confusion_matrix
+from sklearn.utils import gen_even_slices, _safe_indexing
+from sklearn.base import clone, is_classifier
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import GridSearchCV, ParameterGrid, ParameterSampler, check_cv
+from joblib import Parallel, delayed, effective_n_jobs
+from visa.entity.fold_result_cache import FoldResultCache, get_data_fingerprint, FOLD_SCORE_KEY, FOLD_FIT_TIME_KEY
+from visa.entity.search_checkpoint import SearchCheckpoint
+from visa.entity.search_executor import get_search_executor, InProcessSearchExecutor
 
 GRID_SEARCH_KEY = 'grid_search'
 MODULE_KEY = 'module'
@@ -17,11 +29,30 @@ CLASS_KEY = 'class'
 PARAM_KEY = 'params'
 MODEL_SELECTION_KEY = 'model_selection'
 SEARCH_PARAM_GRID_KEY = "search_param_grid"
+SEARCH_EXECUTION_KEY = "search_execution"
+N_WORKERS_KEY = "n_workers"
+MODEL_WORKERS_KEY = "model_workers"
+TIME_BUDGET_SECONDS_KEY = "time_budget_seconds"
+CANDIDATE_BATCH_SIZE_KEY = "candidate_batch_size"
+SEARCH_KEY = "search"
+N_ITER_KEY = "n_iter"
+RANDOM_STATE_KEY = "random_state"
+HALVING_SEARCH_PREFIX = "Halving"
+CV_KEY = "cv"
+SCORING_KEY = "scoring"
+WARM_START_KEY = "warm_start"
+ERROR_SCORE_KEY = "error_score"
+# fold result of a failed fit or score, such results are not cached
+FOLD_ERROR_KEY = "error"
+EXECUTOR_KEY = "executor"
+# parameters an estimator supporting warm_start can grow incrementally, the ensemble size
+WARM_START_PARAMETERS = ["n_estimators"]
 
 # model_serial_number we need to discused
 
 InitializedModelDetail = namedtuple("InitializedModelDetail",
-                                    ["model_serial_number", "model", "param_grid_search", "model_name"])
+                                    ["model_serial_number", "model", "param_grid_search", "model_name",
+                                     "search_config"])
 
 GridSearchedBestModel = namedtuple("GridSearchedBestModel", ["model_serial_number",
                                                              "model",
@@ -41,18 +72,141 @@ MetricInfoArtifact = namedtuple("MetricInfoArtifact",
                                  "test_accuracy", "model_accuracy", "index_number"])
 
 
+def _fit_and_score_fold(X, y, estimator, train_index, test_index, scorer, warm_start_parameter: str = None,
+                        warm_start_values: list = None, error_score=np.nan) -> list:
+    """
+    Fit and score estimator on one fold. With a warm start parameter a single ensemble is grown
+    through the ascending warm_start_values and scored at each of them.
+    error_score: score of a failed fit/score as in sklearn searches, "raise" raises the error
+    (with warm start, the failed value and the larger ones get it)
+    return: list of fold results, one per warm start value (a single one without warm start)
+    """
+    X_train, y_train, X_test, y_test = X[train_index], y[train_index], X[test_index], y[test_index]
+    if warm_start_parameter is not None:
+        estimator.set_params(warm_start=True)
+    values = warm_start_values if warm_start_parameter is not None else [None]
+    fold_results, fit_time = [], 0.0
+    for value_index, value in enumerate(values):
+        start_time = time.perf_counter()
+        try:
+            if warm_start_parameter is not None:
+                estimator.set_params(**{warm_start_parameter: value})
+            estimator.fit(X_train, y_train)
+            # cumulative, the time a cold fit up to this value would roughly have taken
+            fit_time += time.perf_counter() - start_time
+            fold_results.append({FOLD_SCORE_KEY: float(scorer(estimator, X_test, y_test)),
+                                 FOLD_FIT_TIME_KEY: fit_time})
+        except Exception as e:
+            if isinstance(error_score, str) and error_score == "raise":
+                raise
+            fit_time += time.perf_counter() - start_time
+            error = f"{type(e).__name__}: {e}"
+            fold_results.extend({FOLD_SCORE_KEY: float(error_score), FOLD_FIT_TIME_KEY: fit_time,
+                                 FOLD_ERROR_KEY: error} for _ in values[value_index:])
+            break
+    return fold_results
+
+
+def stop_halving_search_at_deadline(search_cv, deadline: float, model_name: str):
+    """
+    Make a successive halving search skip its remaining iterations once deadline (time.monotonic) passed.
+    Iterations already run are kept, the search then refits the best candidate of the last completed
+    iteration as it does after a full run.
+    This hooks the evaluate_candidates callback sklearn passes to _run_search, the extension point of
+    BaseSearchCV. When the search class has no such hook the search runs whole and the deadline is
+    only checked before it starts.
+    """
+    run_search = getattr(search_cv, "_run_search", None)
+    if not callable(run_search) or "evaluate_candidates" not in inspect.signature(run_search).parameters:
+        logging.info(f"{type(search_cv).__name__} has no _run_search(evaluate_candidates) hook, the time budget "
+                     f"cannot stop {model_name} halving search between iterations")
+        return search_cv
+
+    # wrapped signature kept, sklearn passes keyword arguments (callback_ctx) based on it
+    @functools.wraps(run_search)
+    def _run_search(evaluate_candidates, **kwargs):
+        state = {"results": None, "iteration": 0}
+
+        def evaluate_candidates_until_deadline(candidate_params, cv=None, more_results=None, **evaluate_kwargs):
+            if state["results"] is not None and time.monotonic() >= deadline:
+                if state["iteration"] is not None:
+                    logging.info(f"Search time budget exhausted, stopping {model_name} halving search after "
+                                 f"[{state['iteration']}] iterations")
+                    state["iteration"] = None
+                return state["results"]
+            state["results"] = evaluate_candidates(candidate_params, cv, more_results=more_results, **evaluate_kwargs)
+            state["iteration"] += 1
+            return state["results"]
+
+        run_search(evaluate_candidates_until_deadline, **kwargs)
+
+    search_cv._run_search = _run_search
+    return search_cv
+
+
 # can be used in case of classification model
+def get_classification_metrics(y_true, y_pred, pos_label=1) -> dict:
+    """
+    Accuracy and f1 score of pos_label computed from a single confusion matrix
+    """
+    try:
+        labels = np.union1d(np.asarray(y_true), np.asarray(y_pred))
+        matrix = confusion_matrix(y_true, y_pred, labels=labels)
+        accuracy = np.trace(matrix) / matrix.sum()
+        f1 = 0.0
+        if pos_label in labels:
+            pos_index = int(np.searchsorted(labels, pos_label))
+            true_positive = matrix[pos_index, pos_index]
+            false_positive = matrix[:, pos_index].sum() - true_positive
+            false_negative = matrix[pos_index, :].sum() - true_positive
+            if true_positive + false_positive + false_negative > 0:
+                f1 = 2 * true_positive / (2 * true_positive + false_positive + false_negative)
+        return {"accuracy": float(accuracy), "f1": float(f1), "confusion_matrix": matrix.tolist()}
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def predict_in_chunks(model, X, n_jobs: int = None) -> np.ndarray:
+    """
+    Predict X, neighbour based models split their O(n_samples * n_train) queries in
+    row chunks run on n_jobs threads, other models predict in one call
+    """
+    try:
+        n_chunks = min(effective_n_jobs(n_jobs), X.shape[0])
+        if not hasattr(model, "kneighbors") or n_chunks <= 1:
+            return model.predict(X)
+        predictions = Parallel(n_jobs=n_chunks, prefer="threads")(
+            delayed(model.predict)(_safe_indexing(X, rows)) for rows in gen_even_slices(X.shape[0], n_chunks))
+        return np.concatenate(predictions)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_train_sample_rows(n_rows: int, train_sample_size: int = None, random_state: int = 42):
+    """
+    Sorted random rows of the training set used for the overfitting check, all rows when size is None
+    """
+    if train_sample_size is None or train_sample_size >= n_rows:
+        return slice(None)
+    return np.sort(np.random.default_rng(random_state).choice(n_rows, size=train_sample_size, replace=False))
+
+
 def evaluate_classification_model(model_list: list, X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray,
-                                  y_test: np.ndarray, base_accuracy: float = 0.6) -> MetricInfoArtifact:
+                                  y_test: np.ndarray, base_accuracy: float = 0.6, n_jobs: int = None,
+                                  train_sample_size: int = None) -> MetricInfoArtifact:
     """
     Description:
     This function compare multiple classification models and returns best model
+    Every model predicts each split once and all its metrics come from the split confusion matrix,
+    models are evaluated concurrently
     Params:
     model_list: List of model
     X_train: Training dataset input feature
     y_train: Training dataset target feature
     X_test: Testing dataset input feature
     y_test: Testing dataset input feature
+    n_jobs: threads shared by concurrent model evaluations and chunked neighbour predictions
+    train_sample_size: rows of the training set predicted for the overfitting check, None for all rows
     return
     It returned a named tuple
     
@@ -61,25 +215,34 @@ def evaluate_classification_model(model_list: list, X_train: np.ndarray, y_train
                                  "test_accuracy", "model_accuracy", "index_number"])
     """
     try:
+        train_rows = get_train_sample_rows(n_rows=X_train.shape[0], train_sample_size=train_sample_size)
+        # row indexing of arrays, sparse matrices and pandas inputs alike
+        X_train, y_train = _safe_indexing(X_train, train_rows), _safe_indexing(y_train, train_rows)
+        logging.info(f"Evaluating on [{X_train.shape[0]}] training rows and [{X_test.shape[0]}] testing rows")
+
+        n_jobs = effective_n_jobs(n_jobs)
+        model_workers = max(1, min(n_jobs, len(model_list)))
+        predict_n_jobs = max(1, n_jobs // model_workers)
+
+        def get_model_metrics(model):
+            start_time = time.perf_counter()
+            train_metrics = get_classification_metrics(y_train, predict_in_chunks(model, X_train, predict_n_jobs))
+            test_metrics = get_classification_metrics(y_test, predict_in_chunks(model, X_test, predict_n_jobs))
+            logging.info(f"[{type(model).__name__}] evaluated in [{time.perf_counter() - start_time:.3f}] seconds")
+            return train_metrics, test_metrics
+
+        with ThreadPoolExecutor(max_workers=model_workers) as executor:
+            model_metrics = list(executor.map(get_model_metrics, model_list))
 
         index_number = 0
         metric_info_artifact = None # Model accuracy is none becuase right now we didn't have any model where we can check accuracy
-        for model in model_list:
+        for model, (train_metrics, test_metrics) in zip(model_list, model_metrics):
             model_name = str(model)  # getting model name based on model object
             logging.info(f"{'>>' * 30}Started evaluating model: [{type(model).__name__}] {'<<' * 30}")
 
-            # Getting prediction for training and testing dataset
-            y_train_pred = model.predict(X_train)
-            y_test_pred = model.predict(X_test)
-
-            # Calculating r squared score on training and testing dataset
-            train_acc = accuracy_score(y_train, y_train_pred)
-            test_acc = accuracy_score(y_test, y_test_pred)
-
-
-            # Calculating mean squared error on training and testing dataset
-            train_f1 = f1_score(y_train, y_train_pred)
-            test_f1 = f1_score(y_test, y_test_pred)
+            # accuracy and f1 score on training and testing dataset
+            train_acc, test_acc = train_metrics["accuracy"], test_metrics["accuracy"]
+            train_f1, test_f1 = train_metrics["f1"], test_metrics["f1"]
 
             # Calculating harmonic mean of train_accuracy and test_accuracy
             model_accuracy = (2 * (train_acc * test_acc)) / (train_acc + test_acc)
@@ -92,8 +255,9 @@ def evaluate_classification_model(model_list: list, X_train: np.ndarray, y_train
 
             logging.info(f"{'>>' * 30} F1 Score {'<<' * 30}")
             logging.info(f"Diff test train accuracy: [{diff_test_train_acc}].")
-            logging.info(f"Train root mean squared error: [{train_f1}].")
-            logging.info(f"Test root mean squared error: [{test_f1}].")
+            logging.info(f"Train f1 score: [{train_f1}].")
+            logging.info(f"Test f1 score: [{test_f1}].")
+            logging.info(f"Test confusion matrix: {test_metrics['confusion_matrix']}")
 
             # if model accuracy is greater than base accuracy and train and test score is within certain threshold
             # we will accept that model as accepted model
@@ -160,18 +324,31 @@ def get_sample_model_config_yaml_file(export_dir: str):
 
 
 class ModelFactory:
-    def __init__(self, model_config_path: str = None, ):
+    def __init__(self, model_config_path: str = None, class_weight=None, fold_cache_dir: str = None,
+                 checkpoint_dir: str = None):
         try:
             self.config: dict = ModelFactory.read_params(model_config_path)
+            # set on every model supporting class_weight when training data is not resampled
+            self.class_weight = class_weight
 
             self.grid_search_cv_module: str = self.config[GRID_SEARCH_KEY][MODULE_KEY]
             self.grid_search_class_name: str = self.config[GRID_SEARCH_KEY][CLASS_KEY]
             self.grid_search_property_data: dict = dict(self.config[GRID_SEARCH_KEY][PARAM_KEY])
 
             self.models_initialization_config: dict = dict(self.config[MODEL_SELECTION_KEY])
+            self.search_execution_config: dict = dict(self.config.get(SEARCH_EXECUTION_KEY) or {})
 
             self.initialized_model_list = None
             self.grid_searched_best_model_list = None 
+            self.search_deadline = None
+            # cross validation fold scores reused across runs when a cache dir is given
+            self.fold_result_cache = None if fold_cache_dir is None else FoldResultCache(cache_dir=fold_cache_dir)
+            self.data_fingerprint = None
+            # finished model searches are checkpointed there, an interrupted search resumes from them
+            self.checkpoint_dir = checkpoint_dir
+            self.search_checkpoint = None
+            # runs fold fits of candidate searches, set for the duration of a search
+            self.search_executor = None
 
         except Exception as e:
             raise CustomException(e, sys) from e
@@ -214,8 +391,55 @@ class ModelFactory:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def get_worker_split(self, model_count: int):
+        """
+        Split the worker budget (search_execution.n_workers, all cores when not set) between
+        models searched at the same time and CV jobs of each search
+        return: (model_workers, cv_n_jobs)
+        """
+        try:
+            n_workers = self.search_execution_config.get(N_WORKERS_KEY) or os.cpu_count() or 1
+            model_workers = self.search_execution_config.get(MODEL_WORKERS_KEY) or min(model_count, n_workers)
+            model_workers = max(1, min(model_workers, model_count, n_workers))
+            cv_n_jobs = max(1, n_workers // model_workers)
+            logging.info(f"Worker budget: [{n_workers}], models searched concurrently: [{model_workers}], "
+                         f"cv jobs per model: [{cv_n_jobs}]")
+            return model_workers, cv_n_jobs
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def get_search_class_ref(module_name: str, class_name: str):
+        try:
+            if class_name.startswith(HALVING_SEARCH_PREFIX):
+                # successive halving searches are experimental in sklearn and have to be enabled first
+                importlib.import_module("sklearn.experimental.enable_halving_search_cv")
+            return ModelFactory.class_for_name(module_name=module_name, class_name=class_name)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_search_config(self, initialized_model: InitializedModelDetail):
+        """
+        Search class of a model entry: its own search section, else grid_search section.
+        Search params of the entry are merged over grid_search params (cv, verbose...)
+        return: (module_name, class_name, params)
+        """
+        try:
+            search_config = initialized_model.search_config or {}
+            module_name = search_config.get(MODULE_KEY, self.grid_search_cv_module)
+            class_name = search_config.get(CLASS_KEY, self.grid_search_class_name)
+            search_params = dict(self.grid_search_property_data)
+            search_params.update(search_config.get(PARAM_KEY) or {})
+            return module_name, class_name, search_params
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def is_grid_search_class(search_class_ref) -> bool:
+        return "param_grid" in inspect.signature(search_class_ref).parameters
+
     def execute_grid_search_operation(self, initialized_model: InitializedModelDetail, input_feature,
-                                      output_feature) -> GridSearchedBestModel:
+                                      output_feature, n_jobs: int = None) -> GridSearchedBestModel:
         """
         execute_grid_search_operation(): function will perform parameter search operation, and
         it will return you the best optimistic  model with the best parameter:
@@ -223,24 +447,52 @@ class ModelFactory:
         param_grid: dictionary of parameter to perform search operation
         input_feature: you're all input features
         output_feature: Target/Dependent features
+        n_jobs: CV jobs of the search, n_jobs of search params in model.yaml takes precedence
         ================================================================================
-        return: Function will return GridSearchOperation object
+        return: Function will return GridSearchOperation object, None when the time budget
+        ran out before any candidate of the model was evaluated or every candidate fit failed
         """
         try:
-            # instantiating GridSearchCV class
-            grid_search_cv_ref = ModelFactory.class_for_name(module_name=self.grid_search_cv_module,
-                                                             class_name=self.grid_search_class_name
-                                                             )
-
-            grid_search_cv = grid_search_cv_ref(estimator=initialized_model.model,
-                                                param_grid=initialized_model.param_grid_search)
-            grid_search_cv = ModelFactory.update_property_of_class(grid_search_cv,
-                                                                   self.grid_search_property_data)
-
-            message = f'{">>" * 30} f"Training {type(initialized_model.model).__name__} Started." {"<<" * 30}'
+            module_name, class_name, search_params = self.get_search_config(initialized_model)
+            search_class_ref = ModelFactory.get_search_class_ref(module_name=module_name, class_name=class_name)
+            model_name = type(initialized_model.model).__name__
+
+            if self.search_deadline is not None and time.monotonic() >= self.search_deadline:
+                logging.info(f"Search time budget exhausted, skipping {model_name}")
+                return None
+
+            # exhaustive and randomized searches honour the time budget candidate batch by candidate batch,
+            # reuse cached fold scores, grow ensembles with warm start and run fold fits on the search executor,
+            # halving searches run as a whole in process and stop between iterations at the deadline
+            if (self.search_deadline is not None or self.fold_result_cache is not None
+                or (self.search_executor is not None and not self.search_executor.runs_in_process)
+                or self.get_warm_start_parameter(initialized_model.model,
+                                                 initialized_model.param_grid_search) is not None) \
+                    and not class_name.startswith(HALVING_SEARCH_PREFIX):
+                return self.execute_candidate_search_operation(initialized_model=initialized_model,
+                                                               search_class_ref=search_class_ref,
+                                                               search_params=search_params,
+                                                               input_feature=input_feature,
+                                                               output_feature=output_feature,
+                                                               n_jobs=n_jobs)
+
+            # instantiating search class (GridSearchCV, RandomizedSearchCV, Halving*SearchCV)
+            param_grid_key = "param_grid" if ModelFactory.is_grid_search_class(search_class_ref) \
+                else "param_distributions"
+            grid_search_cv = search_class_ref(estimator=initialized_model.model,
+                                              **{param_grid_key: initialized_model.param_grid_search})
+            if n_jobs is not None:
+                grid_search_cv.n_jobs = n_jobs
+            grid_search_cv = ModelFactory.update_property_of_class(grid_search_cv, search_params)
+            if self.search_deadline is not None and class_name.startswith(HALVING_SEARCH_PREFIX):
+                grid_search_cv = stop_halving_search_at_deadline(grid_search_cv, deadline=self.search_deadline,
+                                                                 model_name=model_name)
+
+            message = f'{">>" * 30} f"Training {model_name} with {class_name} Started." {"<<" * 30}'
             logging.info(message)
             grid_search_cv.fit(input_feature, output_feature)
-            message = f'{">>" * 30} f"Training {type(initialized_model.model).__name__}" completed {"<<" * 30}'
+            message = f'{">>" * 30} f"Training {model_name}" completed {"<<" * 30}'
+            logging.info(message)
             grid_searched_best_model = GridSearchedBestModel(model_serial_number=initialized_model.model_serial_number,
                                                              model=initialized_model.model,
                                                              best_model=grid_search_cv.best_estimator_,
@@ -252,6 +504,208 @@ class ModelFactory:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def get_candidates(self, initialized_model: InitializedModelDetail, search_class_ref, search_params: dict) -> list:
+        """
+        Parameter combinations a grid (all points) or randomized (n_iter samples) search would evaluate
+        """
+        try:
+            if ModelFactory.is_grid_search_class(search_class_ref):
+                return list(ParameterGrid(initialized_model.param_grid_search))
+            return list(ParameterSampler(initialized_model.param_grid_search,
+                                         n_iter=search_params.get(N_ITER_KEY, 10),
+                                         random_state=search_params.get(RANDOM_STATE_KEY)))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_warm_start_parameter(self, estimator, param_grid) -> str:
+        """
+        Searched parameter of estimator that can be grown with warm_start instead of refit from scratch
+        return: parameter name, None when warm start does not apply or is disabled in search_execution
+        """
+        try:
+            if not self.search_execution_config.get(WARM_START_KEY, True) or not isinstance(param_grid, dict) \
+                    or WARM_START_KEY not in estimator.get_params():
+                return None
+            for parameter in WARM_START_PARAMETERS:
+                if parameter in param_grid:
+                    return parameter
+            return None
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def get_warm_start_group(candidate: dict, warm_start_parameter: str) -> tuple:
+        """
+        Candidates sharing every parameter but the warm start one share a single ensemble
+        """
+        return tuple(sorted((key, repr(value)) for key, value in candidate.items() if key != warm_start_parameter))
+
+    def evaluate_candidates(self, initialized_model: InitializedModelDetail, candidates: list, search_params: dict,
+                            input_feature, output_feature, n_jobs: int = None) -> list:
+        """
+        Cross validate candidates on the folds of search params cv
+        return: mean test score of every candidate, in candidates order
+        """
+        try:
+            scoring = search_params.get(SCORING_KEY)
+            warm_start_parameter = self.get_warm_start_parameter(initialized_model.model,
+                                                                 initialized_model.param_grid_search)
+            uses_executor = self.search_executor is not None and not self.search_executor.runs_in_process
+            if (self.fold_result_cache is not None or warm_start_parameter is not None or uses_executor) \
+                    and (scoring is None or isinstance(scoring, str)):
+                return self.evaluate_candidates_by_fold(initialized_model=initialized_model,
+                                                        candidates=candidates, search_params=search_params,
+                                                        input_feature=input_feature,
+                                                        output_feature=output_feature, n_jobs=n_jobs,
+                                                        warm_start_parameter=warm_start_parameter)
+
+            if uses_executor:
+                logging.info(f"{type(initialized_model.model).__name__}: scoring [{scoring}] is not a scorer name, "
+                             f"candidates are cross validated in process instead of on the search executor")
+            grid_search_params = inspect.signature(GridSearchCV).parameters
+            batch_search_params = {key: value for key, value in search_params.items()
+                                   if key in grid_search_params and key not in ("refit", "param_grid")}
+            if n_jobs is not None:
+                batch_search_params.setdefault("n_jobs", n_jobs)
+            batch_search = GridSearchCV(estimator=clone(initialized_model.model),
+                                        param_grid=[{key: [value] for key, value in candidate.items()}
+                                                    for candidate in candidates],
+                                        refit=False, **batch_search_params)
+            batch_search.fit(input_feature, output_feature)
+            return list(batch_search.cv_results_["mean_test_score"])
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def evaluate_candidates_by_fold(self, initialized_model: InitializedModelDetail, candidates: list,
+                                    search_params: dict, input_feature, output_feature, n_jobs: int = None,
+                                    warm_start_parameter: str = None) -> list:
+        """
+        Cross validate candidates fold by fold.
+        Fold scores of previous runs are reused when the fold result cache is enabled, only missing folds are fit.
+        With a warm start parameter, candidates differing only by it are scored on one ensemble per fold
+        grown through their values, instead of one ensemble per candidate.
+        """
+        try:
+            estimator = clone(initialized_model.model)
+            scoring = search_params.get(SCORING_KEY)
+            cv = check_cv(search_params.get(CV_KEY), output_feature, classifier=is_classifier(estimator))
+            folds = list(cv.split(input_feature, output_feature))
+            scorer = check_scoring(estimator, scoring=scoring)
+            error_score = search_params.get(ERROR_SCORE_KEY, np.nan)
+
+            fold_scores = np.full((len(candidates), len(folds)), np.nan)
+            # fold index, warm start group -> [(candidate index, cache key)], fit as one task
+            missing_folds = {}
+            for candidate_index, candidate in enumerate(candidates):
+                group = candidate_index if warm_start_parameter is None \
+                    else ModelFactory.get_warm_start_group(candidate, warm_start_parameter)
+                for fold_index in range(len(folds)):
+                    key = None
+                    if self.fold_result_cache is not None:
+                        key = self.fold_result_cache.get_key(data_fingerprint=self.data_fingerprint,
+                                                             estimator=clone(estimator).set_params(**candidate),
+                                                             cv=cv, fold_index=fold_index, scoring=scoring)
+                        fold_result = self.fold_result_cache.get(key)
+                        if fold_result is not None:
+                            fold_scores[candidate_index, fold_index] = fold_result[FOLD_SCORE_KEY]
+                            continue
+                    missing_folds.setdefault((fold_index, group), []).append((candidate_index, key))
+
+            tasks = []
+            for (fold_index, _), group_candidates in missing_folds.items():
+                if warm_start_parameter is not None:
+                    group_candidates.sort(key=lambda item: candidates[item[0]][warm_start_parameter])
+                tasks.append((fold_index, group_candidates))
+            missing_count = sum(len(group_candidates) for _, group_candidates in tasks)
+            if self.fold_result_cache is not None:
+                logging.info(f"{type(estimator).__name__}: [{fold_scores.size - missing_count}/{fold_scores.size}] "
+                             f"fold results found in cache, fitting [{missing_count}]")
+            if warm_start_parameter is not None:
+                logging.info(f"{type(estimator).__name__}: growing [{len(tasks)}] ensembles with warm start over "
+                             f"{warm_start_parameter} for [{missing_count}] candidate folds")
+
+            search_executor = self.search_executor
+            if search_executor is None:
+                search_executor = InProcessSearchExecutor()
+                search_executor.set_data(input_feature, output_feature)
+            # tasks only carry the estimator and fold indices, executors hold the training data
+            task_results = search_executor.map(_fit_and_score_fold, [
+                (clone(estimator).set_params(**candidates[group_candidates[0][0]]),
+                 folds[fold_index][0], folds[fold_index][1], scorer, warm_start_parameter,
+                 None if warm_start_parameter is None
+                 else [candidates[candidate_index][warm_start_parameter] for candidate_index, _ in group_candidates],
+                 error_score)
+                for fold_index, group_candidates in tasks], n_jobs=n_jobs)
+            failed_fits = []
+            for (fold_index, group_candidates), fold_results in zip(tasks, task_results):
+                for (candidate_index, key), fold_result in zip(group_candidates, fold_results):
+                    if FOLD_ERROR_KEY in fold_result:
+                        failed_fits.append((candidates[candidate_index], fold_index, fold_result[FOLD_ERROR_KEY]))
+                    elif key is not None:
+                        self.fold_result_cache.put(key, fold_result)
+                    fold_scores[candidate_index, fold_index] = fold_result[FOLD_SCORE_KEY]
+            if failed_fits:
+                candidate, fold_index, error = failed_fits[0]
+                logging.info(f"{type(estimator).__name__}: [{len(failed_fits)}/{fold_scores.size}] fold fits failed "
+                             f"and were scored {error_score}, e.g. {candidate} on fold [{fold_index}]: {error}")
+            return list(fold_scores.mean(axis=1))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def execute_candidate_search_operation(self, initialized_model: InitializedModelDetail, search_class_ref,
+                                           search_params: dict, input_feature, output_feature,
+                                           n_jobs: int = None) -> GridSearchedBestModel:
+        """
+        Evaluate the candidates of a grid/randomized search in batches, until the search deadline when
+        a time budget is set. Every batch is cross validated on the same folds, fold scores come from
+        the fold result cache when enabled. The best candidate found is refit at the end.
+        """
+        try:
+            model_name = type(initialized_model.model).__name__
+            candidates = self.get_candidates(initialized_model=initialized_model, search_class_ref=search_class_ref,
+                                             search_params=search_params)
+            warm_start_parameter = self.get_warm_start_parameter(initialized_model.model,
+                                                                 initialized_model.param_grid_search)
+            if warm_start_parameter is not None:
+                # keep candidates of one ensemble next to each other, so batches split as few of them as possible
+                candidates.sort(key=lambda candidate: (
+                    ModelFactory.get_warm_start_group(candidate, warm_start_parameter), candidate[warm_start_parameter]))
+            batch_size = len(candidates)
+            if self.search_deadline is not None:
+                batch_size = self.search_execution_config.get(CANDIDATE_BATCH_SIZE_KEY) or max(4, n_jobs or 1)
+
+            best_score, best_parameters, evaluated_candidates = None, None, 0
+            for batch_start in range(0, len(candidates), batch_size):
+                if self.search_deadline is not None and time.monotonic() >= self.search_deadline:
+                    logging.info(f"Search time budget exhausted, stopping {model_name} after "
+                                 f"[{evaluated_candidates}/{len(candidates)}] candidates")
+                    break
+                batch = candidates[batch_start: batch_start + batch_size]
+                mean_scores = self.evaluate_candidates(initialized_model=initialized_model, candidates=batch,
+                                                       search_params=search_params, input_feature=input_feature,
+                                                       output_feature=output_feature, n_jobs=n_jobs)
+                evaluated_candidates += len(batch)
+                if np.isnan(mean_scores).all():
+                    logging.info(f"{model_name}: every candidate of a batch failed, skipping it")
+                    continue
+                batch_best_index = int(np.nanargmax(mean_scores))
+                if best_score is None or mean_scores[batch_best_index] > best_score:
+                    best_score, best_parameters = mean_scores[batch_best_index], batch[batch_best_index]
+
+            if best_parameters is None:
+                return None
+            logging.info(f"{model_name}: evaluated [{evaluated_candidates}/{len(candidates)}] candidates, "
+                         f"refitting best parameters: {best_parameters}")
+            best_model = clone(initialized_model.model).set_params(**best_parameters)
+            best_model.fit(input_feature, output_feature)
+            return GridSearchedBestModel(model_serial_number=initialized_model.model_serial_number,
+                                         model=initialized_model.model,
+                                         best_model=best_model,
+                                         best_parameters=best_parameters,
+                                         best_score=best_score)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def get_initialized_model_list(self) -> List[InitializedModelDetail]:
         """
         This function will return a list of model details.
@@ -272,13 +726,22 @@ class ModelFactory:
                     model1 = ModelFactory.update_property_of_class(instance_ref=model1,
                                                                    property_data=model_obj_property_data)
 
+                if self.class_weight is not None:
+                    if "class_weight" in model1.get_params():
+                        model1.set_params(class_weight=self.class_weight)
+                    else:
+                        logging.info(f"{type(model1).__name__} does not support class_weight, trained unweighted")
+
                 param_grid_search = model_initialization_config[SEARCH_PARAM_GRID_KEY]
                 model_name = f"{model_initialization_config[MODULE_KEY]}.{model_initialization_config[CLASS_KEY]}"
 
+                search_config = model_initialization_config.get(SEARCH_KEY)
+
                 model_initialization_config = InitializedModelDetail(model_serial_number=model_serial_number,
                                                                      model=model1,
                                                                      param_grid_search=param_grid_search,
-                                                                     model_name=model_name
+                                                                     model_name=model_name,
+                                                                     search_config=search_config
                                                                      )
 
                 initialized_model_list.append(model_initialization_config)
@@ -290,7 +753,8 @@ class ModelFactory:
 
     def initiate_best_parameter_search_for_initialized_model(self, initialized_model: InitializedModelDetail,
                                                              input_feature,
-                                                             output_feature) -> GridSearchedBestModel:
+                                                             output_feature,
+                                                             n_jobs: int = None) -> GridSearchedBestModel:
         """
         initiate_best_model_parameter_search(): function will perform parameter search operation, and
         it will return you the best optimistic  model with the best parameter:
@@ -302,9 +766,21 @@ class ModelFactory:
         return: Function will return a GridSearchOperation
         """
         try:
-            return self.execute_grid_search_operation(initialized_model=initialized_model,
-                                                      input_feature=input_feature,
-                                                      output_feature=output_feature)
+            if self.search_checkpoint is not None:
+                grid_searched_best_model = self.search_checkpoint.load(initialized_model.model_serial_number)
+                if grid_searched_best_model is not None:
+                    logging.info(f"Resuming {initialized_model.model_serial_number} from checkpoint, "
+                                 f"best score: {grid_searched_best_model.best_score}")
+                    return grid_searched_best_model
+
+            grid_searched_best_model = self.execute_grid_search_operation(initialized_model=initialized_model,
+                                                                          input_feature=input_feature,
+                                                                          output_feature=output_feature,
+                                                                          n_jobs=n_jobs)
+            # a search cut short by the time budget is not final, it is searched again on resume
+            if self.search_checkpoint is not None and grid_searched_best_model is not None:
+                self.search_checkpoint.save(initialized_model.model_serial_number, grid_searched_best_model)
+            return grid_searched_best_model
         except Exception as e:
             raise CustomException(e, sys) from e
 
@@ -314,14 +790,45 @@ class ModelFactory:
                                                               output_feature) -> List[GridSearchedBestModel]:
 
         try:
-            self.grid_searched_best_model_list = []
-            for initialized_model_list in initialized_model_list:
-                grid_searched_best_model = self.initiate_best_parameter_search_for_initialized_model(
-                    initialized_model=initialized_model_list,
-                    input_feature=input_feature,
-                    output_feature=output_feature
-                )
-                self.grid_searched_best_model_list.append(grid_searched_best_model)
+            # global wall clock budget shared by all model searches
+            time_budget_seconds = self.search_execution_config.get(TIME_BUDGET_SECONDS_KEY)
+            self.search_deadline = None if time_budget_seconds is None else time.monotonic() + time_budget_seconds
+            executor_config = self.search_execution_config.get(EXECUTOR_KEY) or {}
+            # data fingerprint also keys the training data executor workers receive
+            self.data_fingerprint = get_data_fingerprint(input_feature, output_feature)
+            if self.checkpoint_dir is not None:
+                self.search_checkpoint = SearchCheckpoint(checkpoint_dir=self.checkpoint_dir,
+                                                          data_fingerprint=self.data_fingerprint,
+                                                          model_config=self.config,
+                                                          class_weight=self.class_weight)
+                # candidate fold scores are checkpointed too when no shared fold result cache is configured
+                if self.fold_result_cache is None:
+                    self.fold_result_cache = FoldResultCache(cache_dir=self.search_checkpoint.fold_result_dir)
+            model_workers, cv_n_jobs = self.get_worker_split(model_count=len(initialized_model_list))
+            self.search_executor = get_search_executor(executor_config)
+            try:
+                # shipped once to every executor worker
+                self.search_executor.set_data(input_feature, output_feature, data_key=self.data_fingerprint)
+                # searches spend their time in joblib workers, executor workers and native code,
+                # threads are enough to overlap them
+                with ThreadPoolExecutor(max_workers=model_workers) as executor:
+                    futures = [executor.submit(self.initiate_best_parameter_search_for_initialized_model,
+                                               initialized_model=initialized_model,
+                                               input_feature=input_feature,
+                                               output_feature=output_feature,
+                                               n_jobs=cv_n_jobs)
+                               for initialized_model in initialized_model_list]
+                    # results keep model.yaml order whatever the completion order
+                    grid_searched_best_model_list = [future.result() for future in futures]
+            finally:
+                self.search_executor.close()
+                self.search_executor = None
+            self.grid_searched_best_model_list = [grid_searched_best_model
+                                                  for grid_searched_best_model in grid_searched_best_model_list
+                                                  if grid_searched_best_model is not None]
+            if len(self.grid_searched_best_model_list) == 0:
+                raise Exception(f"No model searched: search time budget of [{time_budget_seconds}] seconds "
+                                f"exhausted or every candidate fit failed")
             return self.grid_searched_best_model_list
         except Exception as e:
             raise CustomException(e, sys) from e
@@ -358,6 +865,17 @@ class ModelFactory:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def clear_checkpoint(self):
+        """
+        Drop the search checkpoint, to be called once the trained model is saved
+        """
+        try:
+            if self.search_checkpoint is not None:
+                self.search_checkpoint.clear()
+                self.search_checkpoint = None
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def get_best_model(self, X, y, base_accuracy=0.6) -> BestModel:
         try:
             logging.info("Started Initializing model from config file")
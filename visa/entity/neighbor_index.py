@@ -0,0 +1,286 @@
+import os
+import sys
+import time
+import shutil
+import numpy as np
+import scipy.sparse
+from sklearn.cluster import KMeans
+from sklearn.neighbors import KDTree, BallTree, KNeighborsClassifier
+from visa.exception import CustomException
+from visa.logger import logging
+
+NEIGHBOR_INDEX_BACKEND_TREE = "tree"
+NEIGHBOR_INDEX_BACKEND_IVF = "ivf"
+NEIGHBOR_INDEX_BACKENDS = [NEIGHBOR_INDEX_BACKEND_TREE, NEIGHBOR_INDEX_BACKEND_IVF]
+
+# ivf searches are euclidean, other metrics keep the exact tree backend
+IVF_METRICS = ["euclidean", "l2"]
+TREE_STATE_FILE_PREFIX = "tree_state_"
+NUMPY_FILE_EXTENSION = ".npy"
+
+
+def _to_dense(X) -> np.ndarray:
+    if scipy.sparse.issparse(X):
+        X = X.toarray()
+    return np.ascontiguousarray(X, dtype=np.float64)
+
+
+class NeighborIndexClassifier:
+    """
+    k nearest neighbours classifier served from a neighbour index built once at training time.
+    Index arrays are saved as .npy files in index_dir and memory mapped read-only when the pickled
+    classifier is loaded, so loading neither rebuilds the index nor reads it all in memory.
+    backends:
+        tree: KD-tree (ball tree for metrics a KD-tree does not support), exact neighbours
+        ivf: inverted file over k-means lists, only the n_probe lists closest to a query are searched,
+             approximate neighbours trading recall for latency
+    Votes follow KNeighborsClassifier (uniform or distance weights).
+    """
+
+    def __init__(self, index_dir: str, classes, n_features_in: int, n_neighbors: int, weights: str, backend: str,
+                 n_probe: int = None):
+        self.index_dir = index_dir
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.backend = backend
+        self.n_probe = n_probe
+        self.arrays = {}
+        self.tree = None
+        self.tree_class = None
+        self.tree_scalar_state = None
+        self.tree_params = None
+
+    @classmethod
+    def from_estimator(cls, knn: KNeighborsClassifier, X, y, index_dir: str, backend: str = NEIGHBOR_INDEX_BACKEND_TREE,
+                       n_lists: int = None, random_state: int = 42):
+        """
+        knn: fitted KNeighborsClassifier, its neighbour count, weights and metric are kept
+        X, y: data knn was fitted on
+        n_lists: ivf lists, sqrt(n_samples) when None
+        """
+        try:
+            if not isinstance(knn, KNeighborsClassifier) or callable(knn.weights):
+                raise Exception(f"Cannot build a neighbour index for [{knn}]")
+            if backend not in NEIGHBOR_INDEX_BACKENDS:
+                raise Exception(f"Unknown neighbour index backend [{backend}], expected one of {NEIGHBOR_INDEX_BACKENDS}")
+            metric = knn.effective_metric_
+            if backend == NEIGHBOR_INDEX_BACKEND_IVF and metric not in IVF_METRICS:
+                logging.info(f"ivf backend needs an euclidean metric, [{metric}] served by the tree backend")
+                backend = NEIGHBOR_INDEX_BACKEND_TREE
+
+            X = _to_dense(X)
+            index = cls(index_dir=index_dir, classes=knn.classes_, n_features_in=X.shape[1],
+                        n_neighbors=knn.n_neighbors, weights=knn.weights, backend=backend)
+            arrays = {"labels": np.searchsorted(knn.classes_, np.asarray(y)).astype(np.int32)}
+            start_time = time.perf_counter()
+            if backend == NEIGHBOR_INDEX_BACKEND_TREE:
+                tree_class = KDTree if metric in KDTree.valid_metrics else BallTree
+                index.tree_params = dict(leaf_size=knn.leaf_size, metric=metric, **(knn.effective_metric_params_ or {}))
+                tree = tree_class(X, **index.tree_params)
+                # binary tree state: node arrays followed by scalars and the distance metric
+                tree_state = tree.__getstate__()
+                index.tree_class = tree_class
+                index.tree_scalar_state = {}
+                for position, value in enumerate(tree_state):
+                    if isinstance(value, np.ndarray) and value.dtype != object:
+                        arrays[f"{TREE_STATE_FILE_PREFIX}{position}"] = value
+                    else:
+                        index.tree_scalar_state[position] = value
+            else:
+                n_lists = n_lists or max(1, int(np.sqrt(X.shape[0])))
+                coarse_quantizer = KMeans(n_clusters=n_lists, n_init=1, random_state=random_state).fit(X)
+                order = np.argsort(coarse_quantizer.labels_, kind="stable")
+                arrays.update({
+                    "centroids": coarse_quantizer.cluster_centers_,
+                    "list_offsets": np.searchsorted(coarse_quantizer.labels_[order], np.arange(n_lists + 1)),
+                    "list_data": X[order],
+                    "list_rows": order.astype(np.int64)
+                })
+                index.n_probe = 1
+            build_time = time.perf_counter() - start_time
+
+            os.makedirs(index_dir, exist_ok=True)
+            for name, array in arrays.items():
+                np.save(os.path.join(index_dir, f"{name}{NUMPY_FILE_EXTENSION}"), np.ascontiguousarray(array),
+                        allow_pickle=False)
+            index.load_arrays()
+            logging.info(f"Neighbour index [{backend}] built in [{build_time:.3f}] seconds at [{index_dir}]")
+            return index
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def load_arrays(self):
+        """
+        Memory map the index arrays and restore the tree from them
+        """
+        try:
+            self.arrays = {}
+            for file_name in os.listdir(self.index_dir):
+                if file_name.endswith(NUMPY_FILE_EXTENSION):
+                    self.arrays[file_name[:-len(NUMPY_FILE_EXTENSION)]] = np.load(
+                        os.path.join(self.index_dir, file_name), mmap_mode="r", allow_pickle=False)
+            self.tree = None
+            if self.backend == NEIGHBOR_INDEX_BACKEND_TREE:
+                state_size = len(self.tree_scalar_state) + sum(name.startswith(TREE_STATE_FILE_PREFIX)
+                                                               for name in self.arrays)
+                tree_state = tuple(self.tree_scalar_state[position] if position in self.tree_scalar_state
+                                   else self.arrays[f"{TREE_STATE_FILE_PREFIX}{position}"]
+                                   for position in range(state_size))
+                tree = self.tree_class.__new__(self.tree_class)
+                try:
+                    tree.__setstate__(tree_state)
+                except Exception as e:
+                    # tree state layout is private to sklearn, rebuild from the saved data when it changed
+                    logging.info(f"Rebuilding neighbour tree, saved state not restorable: {e}")
+                    tree = self.tree_class(np.asarray(self.arrays[f"{TREE_STATE_FILE_PREFIX}0"]), **self.tree_params)
+                self.tree = tree
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # arrays live in index_dir, the pickle only keeps where they are
+        state["arrays"] = {}
+        state["tree"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.load_arrays()
+
+    def relocate(self, index_dir: str):
+        """
+        Copy index files to index_dir and serve from there, used when the model is exported
+        """
+        try:
+            if os.path.abspath(index_dir) != os.path.abspath(self.index_dir):
+                shutil.copytree(self.index_dir, index_dir, dirs_exist_ok=True)
+                self.index_dir = index_dir
+                self.load_arrays()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _ivf_kneighbors(self, X: np.ndarray, n_neighbors: int):
+        centroids, list_offsets = self.arrays["centroids"], self.arrays["list_offsets"]
+        list_data, list_rows = self.arrays["list_data"], self.arrays["list_rows"]
+        n_probe = min(self.n_probe, centroids.shape[0])
+        centroid_distances = ((X[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        probed_lists = np.argpartition(centroid_distances, n_probe - 1, axis=1)[:, :n_probe]
+
+        distances = np.full((X.shape[0], n_neighbors), np.inf)
+        indices = np.zeros((X.shape[0], n_neighbors), dtype=np.int64)
+        for row, lists in enumerate(probed_lists):
+            candidates = np.concatenate([np.arange(list_offsets[list_index], list_offsets[list_index + 1])
+                                         for list_index in lists])
+            candidate_distances = np.sqrt(((list_data[candidates] - X[row]) ** 2).sum(axis=1))
+            k = min(n_neighbors, candidates.shape[0])
+            nearest = np.argpartition(candidate_distances, k - 1)[:k] if k < candidates.shape[0] \
+                else np.arange(candidates.shape[0])
+            nearest = nearest[np.argsort(candidate_distances[nearest], kind="stable")]
+            distances[row, :k] = candidate_distances[nearest]
+            indices[row, :k] = list_rows[candidates[nearest]]
+        return distances, indices
+
+    def kneighbors(self, X, n_neighbors: int = None):
+        """
+        return: (distances, indices) of the neighbours of every row, indices refer to training rows
+        """
+        try:
+            X = _to_dense(X)
+            n_neighbors = n_neighbors or self.n_neighbors
+            if self.backend == NEIGHBOR_INDEX_BACKEND_TREE:
+                return self.tree.query(X, k=n_neighbors, return_distance=True)
+            return self._ivf_kneighbors(X, n_neighbors)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def predict_proba(self, X) -> np.ndarray:
+        try:
+            distances, indices = self.kneighbors(X)
+            neighbor_labels = np.asarray(self.arrays["labels"])[indices]
+            if self.weights == "distance":
+                with np.errstate(divide="ignore"):
+                    neighbor_weights = 1.0 / distances
+                # exact matches take all the weight, as in KNeighborsClassifier
+                has_match = np.isinf(neighbor_weights).any(axis=1)
+                neighbor_weights[has_match] = np.isinf(neighbor_weights[has_match]).astype(np.float64)
+            else:
+                neighbor_weights = np.ones_like(distances)
+            # neighbours missing from small ivf lists have an infinite distance and no vote
+            neighbor_weights[np.isinf(distances)] = 0.0
+            proba = np.zeros((indices.shape[0], self.classes_.shape[0]))
+            for class_index in range(self.classes_.shape[0]):
+                proba[:, class_index] = (neighbor_weights * (neighbor_labels == class_index)).sum(axis=1)
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            return proba / normalizer
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def predict(self, X) -> np.ndarray:
+        try:
+            return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def __repr__(self):
+        return f"{type(self).__name__}(n_neighbors={self.n_neighbors}, weights={self.weights}, " \
+               f"backend={self.backend}, n_probe={self.n_probe})"
+
+
+def get_recall(index: NeighborIndexClassifier, exact_indices: np.ndarray, X) -> float:
+    """
+    Fraction of the exact neighbours the index returns for rows of X
+    """
+    _, indices = index.kneighbors(X)
+    return float(np.mean([np.intersect1d(found, expected).shape[0] / expected.shape[0]
+                          for found, expected in zip(indices, exact_indices)]))
+
+
+def tune_n_probe(index: NeighborIndexClassifier, knn: KNeighborsClassifier, X, target_recall: float) -> float:
+    """
+    Smallest power of two n_probe of an ivf index reaching target_recall of knn neighbours on rows of X
+    return: recall reached
+    """
+    try:
+        _, exact_indices = knn.kneighbors(X)
+        n_lists = index.arrays["centroids"].shape[0]
+        index.n_probe = 1
+        recall = get_recall(index, exact_indices, X)
+        while recall < target_recall and index.n_probe < n_lists:
+            index.n_probe = min(index.n_probe * 2, n_lists)
+            recall = get_recall(index, exact_indices, X)
+        logging.info(f"ivf n_probe [{index.n_probe}/{n_lists}] reaches recall [{recall:.4f}] "
+                     f"(target [{target_recall}])")
+        return recall
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_neighbor_index_report(knn: KNeighborsClassifier, index: NeighborIndexClassifier, X, y,
+                              latency_rows: int = 50) -> dict:
+    """
+    Speed/accuracy trade-off of the neighbour index against the fitted knn on X, y:
+    recall of exact neighbours, accuracy, batch and single row latency of both
+    """
+    try:
+        report = {"backend": index.backend, "n_probe": index.n_probe, "rows": int(X.shape[0])}
+        _, exact_indices = knn.kneighbors(X)
+        report["recall"] = get_recall(index, exact_indices, X)
+        for name, model in (("knn", knn), ("index", index)):
+            start_time = time.perf_counter()
+            y_pred = model.predict(X)
+            batch_time = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            for row in range(min(latency_rows, X.shape[0])):
+                model.predict(X[row: row + 1])
+            single_row_time = (time.perf_counter() - start_time) / max(1, min(latency_rows, X.shape[0]))
+            report[name] = {"accuracy": float(np.mean(y_pred == np.asarray(y))),
+                            "batch_seconds": round(batch_time, 6),
+                            "single_row_milliseconds": round(single_row_time * 1000, 4)}
+        logging.info(f"Neighbour index report: {report}")
+        return report
+    except Exception as e:
+        raise CustomException(e, sys) from e
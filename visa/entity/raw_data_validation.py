@@ -1,18 +1,105 @@
 from visa.exception import CustomException
 from visa.logger import logging
 import os, sys
-from visa.utils.utils import read_yaml_file
+from visa.utils.utils import read_yaml_file, read_dataframe_columns, get_file_format
 import pandas as pd
 import collections
+from visa.constant import *
+
+VALIDATION_SCAN_CHUNK_SIZE = 100000
+
+FILE_NAME_CHECK = "file_name"
+COLUMN_LENGTH_CHECK = "column_length"
+COLUMN_NAMES_CHECK = "column_names"
+MISSING_WHOLE_COLUMN_CHECK = "missing_values_whole_column"
+NULL_VALUES_CHECK = "null_values"
+
+ColumnStats = collections.namedtuple("ColumnStats", ["row_count", "null_counts"])
 
 
 class IngestedDataValidation:
+    """
+    Validates one ingested file against schema.yaml.
+    Column names come from the file header/footer only, row and null counts from a single
+    scan of the file (or from parquet column statistics, without reading any data page),
+    and every check runs against those cached results.
+    """
 
     def __init__(self, validate_path, schema_path):
         try:
             self.validate_path = validate_path
             self.schema_path = schema_path
             self.data = read_yaml_file(self.schema_path)
+            self._column_names = None
+            self._column_stats = None
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_column_names(self) -> list:
+        try:
+            if self._column_names is None:
+                self._column_names = read_dataframe_columns(self.validate_path)
+            return self._column_names
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def _get_parquet_column_stats(self) -> ColumnStats:
+        import pyarrow.parquet as pq
+        metadata = pq.ParquetFile(self.validate_path).metadata
+        null_counts = dict.fromkeys(self.get_column_names(), 0)
+        for row_group_index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(row_group_index)
+            for column_index in range(row_group.num_columns):
+                column_chunk = row_group.column(column_index)
+                statistics = column_chunk.statistics
+                if statistics is None or not statistics.has_null_count:
+                    return None
+                null_counts[column_chunk.path_in_schema] += statistics.null_count
+        return ColumnStats(row_count=metadata.num_rows, null_counts=null_counts)
+
+    def _get_feather_column_stats(self) -> ColumnStats:
+        import pyarrow as pa
+        # arrow arrays carry their null count, memory mapping avoids copying column data
+        with pa.memory_map(self.validate_path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            null_counts = {column_name: table.column(column_name).null_count for column_name in table.column_names}
+            return ColumnStats(row_count=table.num_rows, null_counts=null_counts)
+
+    def _scan_column_stats(self) -> ColumnStats:
+        row_count = 0
+        null_counts = pd.Series(0, index=self.get_column_names())
+        for chunk in pd.read_csv(self.validate_path, chunksize=VALIDATION_SCAN_CHUNK_SIZE):
+            row_count += len(chunk)
+            null_counts = null_counts.add(chunk.isna().sum(), fill_value=0)
+        return ColumnStats(row_count=row_count, null_counts={column: int(count) for column, count in null_counts.items()})
+
+    def set_column_stats(self, row_count: int, null_counts: dict):
+        """
+        Use row and null counts collected by another scan of the file (row level validation)
+        instead of scanning it again
+        """
+        try:
+            null_counts = {column: int(null_counts.get(column, 0)) for column in self.get_column_names()}
+            self._column_stats = ColumnStats(row_count=row_count, null_counts=null_counts)
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_column_stats(self) -> ColumnStats:
+        """
+        Row count and per column null count of the file, computed once
+        """
+        try:
+            if self._column_stats is None:
+                file_format = get_file_format(self.validate_path)
+                column_stats = None
+                if file_format == FILE_FORMAT_PARQUET:
+                    column_stats = self._get_parquet_column_stats()
+                elif file_format == FILE_FORMAT_FEATHER:
+                    column_stats = self._get_feather_column_stats()
+                if column_stats is None:
+                    column_stats = self._scan_column_stats()
+                self._column_stats = column_stats
+            return self._column_stats
         except Exception as e:
             raise CustomException(e,sys) from e
 
@@ -22,13 +109,16 @@ class IngestedDataValidation:
             schema_file_name = self.data['FileName']
             if schema_file_name == file_name:
                 return True
+            # ingested files may be written as parquet/feather under the same base name
+            if os.path.splitext(schema_file_name)[0] == os.path.splitext(file_name)[0] \
+                    and os.path.splitext(file_name)[1] in FILE_FORMAT_EXTENSIONS.values():
+                return True
         except Exception as e:
             raise CustomException(e,sys) from e
 
     def validate_column_length(self)->bool:
         try:
-            df = pd.read_csv(self.validate_path)
-            if(df.shape[1] == self.data['NumberofColumns']):
+            if(len(self.get_column_names()) == self.data['NumberofColumns']):
                 return True
             else:
                 return False
@@ -37,30 +127,72 @@ class IngestedDataValidation:
 
     def missing_values_whole_column(self)->bool:
         try:
-            df = pd.read_csv(self.validate_path)
+            column_stats = self.get_column_stats()
             count = 0
-            for columns in df:
-                if (len(df[columns]) - df[columns].count()) == len(df[columns]):
+            for column_name, null_count in column_stats.null_counts.items():
+                if null_count == column_stats.row_count:
                     count+=1
             return True if (count == 0) else False
         except Exception as e:
             raise CustomException(e,sys) from e
 
-    def replace_null_values_with_null(self)->bool:
+    def replace_null_values_with_null(self)->dict:
+        """
+        Returns null count of every column having missing values, they are read back as NULL downstream
+        """
         try:
-            df = pd.read_csv(self.validate_path)
-            df.fillna('NULL',inplace=True)
+            column_stats = self.get_column_stats()
+            return {column_name: null_count for column_name, null_count in column_stats.null_counts.items()
+                    if null_count > 0}
         except Exception as e:
             raise CustomException(e,sys) from e
 
-    
+
     def check_column_names(self)->bool:
         try:
-            df = pd.read_csv(self.validate_path)
-            df_column_names = df.columns
+            df_column_names = self.get_column_names()
             schema_column_names = list(self.data['ColumnNames'].keys())
 
             return True if (collections.Counter(df_column_names) == collections.Counter(schema_column_names)) else False
 
         except Exception as e:
-            raise CustomException(e,sys) from e
\ No newline at end of file
+            raise CustomException(e,sys) from e
+
+    def validate(self, file_name: str) -> dict:
+        """
+        Run every check against a single read of the file
+        file_name: str name compared with schema FileName, file name check is skipped when None
+        return: dict check name -> {"status": bool, "detail": ...}
+        """
+        try:
+            column_names = self.get_column_names()
+            schema_column_names = list(self.data['ColumnNames'].keys())
+            column_stats = self.get_column_stats()
+            empty_columns = [column_name for column_name, null_count in column_stats.null_counts.items()
+                             if null_count == column_stats.row_count]
+            null_values = self.replace_null_values_with_null()
+
+            report = {}
+            if file_name is not None:
+                report[FILE_NAME_CHECK] = {
+                    "status": bool(self.validate_filename(file_name=file_name)),
+                    "detail": f"file name: {file_name}, schema file name: {self.data['FileName']}"}
+            report.update({
+                COLUMN_LENGTH_CHECK: {
+                    "status": self.validate_column_length(),
+                    "detail": f"{len(column_names)} columns, schema expects {self.data['NumberofColumns']}"},
+                COLUMN_NAMES_CHECK: {
+                    "status": self.check_column_names(),
+                    "detail": {"missing_columns": sorted(set(schema_column_names) - set(column_names)),
+                               "unexpected_columns": sorted(set(column_names) - set(schema_column_names))}},
+                MISSING_WHOLE_COLUMN_CHECK: {
+                    "status": self.missing_values_whole_column(),
+                    "detail": {"empty_columns": empty_columns, "row_count": column_stats.row_count}},
+                NULL_VALUES_CHECK: {
+                    "status": True,
+                    "detail": {"null_counts": null_values}},
+            })
+            logging.info(f"Validation report of [{self.validate_path}]: {report}")
+            return report
+        except Exception as e:
+            raise CustomException(e,sys) from e
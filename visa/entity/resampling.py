@@ -0,0 +1,81 @@
+import sys
+import time
+import numpy as np
+from collections import namedtuple
+from sklearn.neighbors import NearestNeighbors
+from visa.constant import *
+from visa.exception import CustomException
+from visa.logger import logging
+
+# neighbours used by SMOTE interpolation and ENN cleaning, imblearn defaults
+SMOTE_K_NEIGHBORS = 5
+ENN_N_NEIGHBORS = 3
+
+ResamplingSummary = namedtuple("ResamplingSummary", ["strategy", "rows_before", "rows_after", "class_counts_before",
+                                                     "class_counts_after", "resampling_time"])
+
+
+def _get_nearest_neighbors(n_neighbors: int, n_jobs: int) -> NearestNeighbors:
+    # imblearn dropped n_jobs from samplers, parallel neighbour search is set on the neighbours object
+    # (+1 as the sample itself is returned as its own nearest neighbour)
+    return NearestNeighbors(n_neighbors=n_neighbors + 1, n_jobs=n_jobs)
+
+
+def get_resampler(strategy: str, n_jobs: int = None, random_state: int = 42):
+    """
+    strategy: str one of RESAMPLING_STRATEGIES
+    n_jobs: int parallel jobs of neighbour searches (SMOTE, ENN)
+    return: imblearn sampler, None for strategies without resampling (class_weight, none)
+    """
+    try:
+        if strategy not in RESAMPLING_STRATEGIES:
+            raise Exception(f"Unknown resampling strategy [{strategy}], expected one of {RESAMPLING_STRATEGIES}")
+        if strategy == RESAMPLING_STRATEGY_SMOTEENN:
+            from imblearn.combine import SMOTEENN
+            from imblearn.over_sampling import SMOTE
+            from imblearn.under_sampling import EditedNearestNeighbours
+            return SMOTEENN(random_state=random_state, sampling_strategy='all',
+                            smote=SMOTE(sampling_strategy='all', random_state=random_state,
+                                        k_neighbors=_get_nearest_neighbors(SMOTE_K_NEIGHBORS, n_jobs)),
+                            enn=EditedNearestNeighbours(sampling_strategy='all',
+                                                        n_neighbors=_get_nearest_neighbors(ENN_N_NEIGHBORS, n_jobs)))
+        if strategy == RESAMPLING_STRATEGY_SMOTE:
+            from imblearn.over_sampling import SMOTE
+            return SMOTE(random_state=random_state,
+                         k_neighbors=_get_nearest_neighbors(SMOTE_K_NEIGHBORS, n_jobs))
+        if strategy == RESAMPLING_STRATEGY_RANDOM_UNDER:
+            from imblearn.under_sampling import RandomUnderSampler
+            return RandomUnderSampler(random_state=random_state)
+        if strategy == RESAMPLING_STRATEGY_RANDOM_OVER:
+            from imblearn.over_sampling import RandomOverSampler
+            return RandomOverSampler(random_state=random_state)
+        return None
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_class_counts(y) -> dict:
+    classes, counts = np.unique(np.asarray(y), return_counts=True)
+    return {label.item() if isinstance(label, np.generic) else label: int(count)
+            for label, count in zip(classes, counts)}
+
+
+def resample(resampler, X, y, strategy: str):
+    """
+    Resample X, y and time it, X may be dense or scipy sparse
+    return: (X, y, ResamplingSummary), X and y unchanged when resampler is None
+    """
+    try:
+        class_counts_before = get_class_counts(y)
+        start_time = time.perf_counter()
+        if resampler is not None:
+            X, y = resampler.fit_resample(X, y)
+        resampling_time = time.perf_counter() - start_time
+        summary = ResamplingSummary(strategy=strategy, rows_before=sum(class_counts_before.values()),
+                                    rows_after=X.shape[0], class_counts_before=class_counts_before,
+                                    class_counts_after=get_class_counts(y),
+                                    resampling_time=round(resampling_time, 6))
+        logging.info(f"Resampling summary: {summary}")
+        return X, y, summary
+    except Exception as e:
+        raise CustomException(e, sys) from e
@@ -0,0 +1,192 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+from visa.constant import *
+from visa.exception import CustomException
+from visa.logger import logging
+from visa.utils.utils import read_yaml_file, get_file_format
+from visa.entity.dataframe_writer import DataFrameWriter
+
+REJECT_REASON_COLUMN = "reject_reason"
+
+CONSTRAINT_ALLOWED_KEY = "allowed"
+CONSTRAINT_MIN_KEY = "min"
+CONSTRAINT_MAX_KEY = "max"
+
+# one compiled check: mask_function(chunk) -> boolean numpy array of violating rows
+ColumnRule = namedtuple("ColumnRule", ["column", "reason", "mask_function"])
+
+SchemaValidationSummary = namedtuple("SchemaValidationSummary", ["file_path", "row_count", "rejected_row_count",
+                                                                 "reason_counts", "quarantine_file_path",
+                                                                 "clean_file_path", "null_counts"])
+
+
+def _coerce_numeric(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values, errors="coerce")
+
+
+class SchemaValidator:
+    """
+    Row level validator compiled once from schema.yaml.
+    ColumnNames gives the dtype each value must be coercible to, ColumnConstraints the allowed
+    category sets and numeric min/max. Files are validated chunk by chunk with vectorized masks,
+    rejected rows are appended to a quarantine csv with the reasons they failed.
+    """
+
+    def __init__(self, schema_file_path: str, chunk_size: int = 100000):
+        try:
+            self.schema_file_path = schema_file_path
+            self.chunk_size = chunk_size
+            dataset_schema = read_yaml_file(schema_file_path)
+            self.column_dtypes: dict = dataset_schema[DATASET_SCHEMA_COLUMNS_KEY]
+            self.column_constraints: dict = dataset_schema.get(SCHEMA_COLUMN_CONSTRAINTS_KEY) or {}
+            self.rules = self.compile_rules()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def compile_rules(self) -> list:
+        try:
+            rules = []
+            for column, dtype in self.column_dtypes.items():
+                rules.append(ColumnRule(column=column, reason=f"{column} missing from file",
+                                        mask_function=lambda chunk, column=column: np.full(
+                                            len(chunk), column not in chunk.columns)))
+                if dtype in ("int", "float"):
+                    rules.append(ColumnRule(column=column, reason=f"{column} not coercible to {dtype}",
+                                            mask_function=lambda chunk, column=column, dtype=dtype:
+                                            self._get_dtype_violations(chunk, column, dtype)))
+
+                constraints = self.column_constraints.get(column) or {}
+                if CONSTRAINT_ALLOWED_KEY in constraints:
+                    allowed_values = pd.Index([str(value) for value in constraints[CONSTRAINT_ALLOWED_KEY]])
+                    rules.append(ColumnRule(column=column, reason=f"{column} not in allowed categories",
+                                            mask_function=lambda chunk, column=column, allowed_values=allowed_values:
+                                            self._get_category_violations(chunk, column, allowed_values)))
+                if CONSTRAINT_MIN_KEY in constraints:
+                    min_value = constraints[CONSTRAINT_MIN_KEY]
+                    rules.append(ColumnRule(column=column, reason=f"{column} below {min_value}",
+                                            mask_function=lambda chunk, column=column, min_value=min_value:
+                                            self._get_numeric_values(chunk, column).lt(min_value).to_numpy()))
+                if CONSTRAINT_MAX_KEY in constraints:
+                    max_value = constraints[CONSTRAINT_MAX_KEY]
+                    rules.append(ColumnRule(column=column, reason=f"{column} above {max_value}",
+                                            mask_function=lambda chunk, column=column, max_value=max_value:
+                                            self._get_numeric_values(chunk, column).gt(max_value).to_numpy()))
+            logging.info(f"Compiled [{len(rules)}] row validation rules from schema: [{self.schema_file_path}]")
+            return rules
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def _get_numeric_values(chunk: pd.DataFrame, column: str) -> pd.Series:
+        if column not in chunk.columns:
+            return pd.Series(np.nan, index=chunk.index)
+        return _coerce_numeric(chunk[column])
+
+    @staticmethod
+    def _get_dtype_violations(chunk: pd.DataFrame, column: str, dtype: str) -> np.ndarray:
+        if column not in chunk.columns:
+            return np.zeros(len(chunk), dtype=bool)
+        values = chunk[column]
+        numeric_values = _coerce_numeric(values)
+        # missing values are imputed downstream, only present but unparsable values are rejected
+        violations = values.notna() & numeric_values.isna()
+        if dtype == "int":
+            violations |= numeric_values.notna() & (numeric_values % 1 != 0)
+        return violations.to_numpy()
+
+    @staticmethod
+    def _get_category_violations(chunk: pd.DataFrame, column: str, allowed_values: pd.Index) -> np.ndarray:
+        if column not in chunk.columns:
+            return np.zeros(len(chunk), dtype=bool)
+        values = chunk[column]
+        return (values.notna() & ~values.astype(str).isin(allowed_values)).to_numpy()
+
+    def validate_chunk(self, chunk: pd.DataFrame):
+        """
+        return: (boolean mask of rejected rows, reasons of every row as pd.Series, {reason: count})
+        """
+        try:
+            reasons = pd.Series("", index=chunk.index, dtype=object)
+            reason_counts = {}
+            for rule in self.rules:
+                violations = rule.mask_function(chunk)
+                violation_count = int(violations.sum())
+                if violation_count == 0:
+                    continue
+                reason_counts[rule.reason] = violation_count
+                reasons[violations] = reasons[violations] + f"{rule.reason};"
+            return (reasons != "").to_numpy(), reasons, reason_counts
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def iter_chunks(self, file_path: str):
+        """
+        Yield the file as dataframes of at most chunk_size rows, values are kept as read (csv as text)
+        """
+        file_format = get_file_format(file_path)
+        if file_format == FILE_FORMAT_CSV:
+            yield from pd.read_csv(file_path, chunksize=self.chunk_size, dtype=str)
+        elif file_format == FILE_FORMAT_PARQUET:
+            import pyarrow.parquet as pq
+            for record_batch in pq.ParquetFile(file_path).iter_batches(batch_size=self.chunk_size):
+                yield record_batch.to_pandas()
+        else:
+            import pyarrow as pa
+            with pa.memory_map(file_path) as source:
+                reader = pa.ipc.open_file(source)
+                for batch_index in range(reader.num_record_batches):
+                    yield reader.get_batch(batch_index).to_pandas()
+
+    def validate_file(self, file_path: str, quarantine_file_path: str,
+                      clean_file_path: str = None) -> SchemaValidationSummary:
+        """
+        Validate every row of file_path in constant memory, rejected rows go to quarantine_file_path (csv).
+        Row and per column null counts are collected in the same pass for the file level checks.
+        clean_file_path: accepted rows are written there (same format as file_path), so rejected rows
+        never reach downstream stages. It is removed when no row is rejected, file_path is clean then.
+        """
+        try:
+            row_count = 0
+            rejected_row_count = 0
+            reason_counts = {}
+            null_counts = None
+            clean_writer = None
+            if clean_file_path is not None:
+                clean_writer = DataFrameWriter(clean_file_path, schema=self.column_dtypes)
+            try:
+                with DataFrameWriter(quarantine_file_path) as quarantine_writer:
+                    for chunk in self.iter_chunks(file_path):
+                        is_rejected, reasons, chunk_reason_counts = self.validate_chunk(chunk)
+                        row_count += len(chunk)
+                        chunk_null_counts = chunk.isna().sum()
+                        null_counts = chunk_null_counts if null_counts is None \
+                            else null_counts.add(chunk_null_counts, fill_value=0)
+                        for reason, count in chunk_reason_counts.items():
+                            reason_counts[reason] = reason_counts.get(reason, 0) + count
+                        if is_rejected.any():
+                            rejected_rows = chunk[is_rejected].astype(str)
+                            rejected_rows[REJECT_REASON_COLUMN] = reasons[is_rejected].str.rstrip(";")
+                            quarantine_writer.write(rejected_rows)
+                            rejected_row_count += int(is_rejected.sum())
+                        if clean_writer is not None:
+                            clean_writer.write(chunk[~is_rejected])
+            finally:
+                if clean_writer is not None:
+                    clean_writer.close()
+            if rejected_row_count == 0:
+                for written_file_path in (quarantine_file_path, clean_file_path):
+                    if written_file_path is not None and os.path.exists(written_file_path):
+                        os.remove(written_file_path)
+            summary = SchemaValidationSummary(file_path=file_path, row_count=row_count,
+                                              rejected_row_count=rejected_row_count, reason_counts=reason_counts,
+                                              quarantine_file_path=quarantine_file_path if rejected_row_count else None,
+                                              clean_file_path=clean_file_path if rejected_row_count else file_path,
+                                              null_counts={} if null_counts is None else
+                                              {column: int(count) for column, count in null_counts.items()})
+            logging.info(f"Row level schema validation: {summary}")
+            return summary
+        except Exception as e:
+            raise CustomException(e, sys) from e
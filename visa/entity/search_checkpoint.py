@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import dill
+from visa.exception import CustomException
+from visa.logger import logging
+from visa.entity.transformation_cache import describe_estimator
+from visa.entity.fold_result_cache import get_library_versions
+
+SEARCH_CHECKPOINT_VERSION = 1
+CHECKPOINT_FOLD_RESULT_DIR = "folds"
+CHECKPOINT_MODEL_FILE_EXTENSION = ".pkl"
+
+
+class SearchCheckpoint:
+    """
+    Progress of a model search persisted as it completes, so an interrupted search resumes
+    where it stopped instead of starting over.
+    A run directory is keyed by the training data fingerprint, the model config and the class weight:
+    rerunning with the same config and data reuses it, any change starts a new one.
+    Every finished model search (scores, best parameters, fitted best estimator) is saved in it,
+    fold scores of candidates are saved in its fold result directory.
+    """
+
+    def __init__(self, checkpoint_dir: str, data_fingerprint: str, model_config: dict, class_weight=None):
+        try:
+            run_key = hashlib.sha256(json.dumps({
+                "version": SEARCH_CHECKPOINT_VERSION,
+                "data": data_fingerprint,
+                "model_config": describe_estimator(model_config),
+                "class_weight": describe_estimator(class_weight),
+                "versions": get_library_versions()
+            }, sort_keys=True).encode("utf-8")).hexdigest()
+            self.checkpoint_dir = checkpoint_dir
+            self.run_dir = os.path.join(checkpoint_dir, run_key)
+            self.fold_result_dir = os.path.join(self.run_dir, CHECKPOINT_FOLD_RESULT_DIR)
+            os.makedirs(self.run_dir, exist_ok=True)
+            logging.info(f"Model search checkpoint directory: [{self.run_dir}]")
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_model_file_path(self, model_serial_number: str) -> str:
+        return os.path.join(self.run_dir, f"{model_serial_number}{CHECKPOINT_MODEL_FILE_EXTENSION}")
+
+    def load(self, model_serial_number: str):
+        """
+        return: checkpointed search result of the model, None when the model was not searched yet
+        """
+        try:
+            file_path = self.get_model_file_path(model_serial_number)
+            if not os.path.exists(file_path):
+                return None
+            with open(file_path, "rb") as file_obj:
+                return dill.load(file_obj)
+        except Exception as e:
+            logging.info(f"Ignoring unreadable checkpoint of [{model_serial_number}]: {e}")
+            return None
+
+    def save(self, model_serial_number: str, search_result):
+        """
+        Write search_result to a temporary file renamed into place, a checkpoint is never half written
+        """
+        try:
+            fd, tmp_file_path = tempfile.mkstemp(dir=self.run_dir, suffix=".part")
+            with os.fdopen(fd, "wb") as file_obj:
+                dill.dump(search_result, file_obj)
+            os.replace(tmp_file_path, self.get_model_file_path(model_serial_number))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def clear(self):
+        """
+        Remove the run directory once its search results are persisted elsewhere
+        """
+        try:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+            logging.info(f"Model search checkpoint removed: [{self.run_dir}]")
+        except Exception as e:
+            raise CustomException(e, sys) from e
@@ -0,0 +1,315 @@
+import os
+import sys
+import queue
+import secrets
+import itertools
+import time
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.managers import BaseManager, DictProxy
+from joblib import Parallel, delayed
+from visa.exception import CustomException
+from visa.logger import logging
+
+SEARCH_EXECUTOR_IN_PROCESS = "in_process"
+SEARCH_EXECUTOR_PROCESS_POOL = "process_pool"
+SEARCH_EXECUTOR_DISTRIBUTED = "distributed"
+SEARCH_EXECUTORS = [SEARCH_EXECUTOR_IN_PROCESS, SEARCH_EXECUTOR_PROCESS_POOL, SEARCH_EXECUTOR_DISTRIBUTED]
+
+# authkey shared by the coordinator and its workers, a random one is used when not set (local workers only)
+SEARCH_AUTHKEY_ENV_KEY = "VISA_SEARCH_AUTHKEY"
+SEARCH_WORKER_MODULE = "visa.entity.search_worker"
+# directory holding the visa package, local workers import it from there when it is not installed
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TASK_STATUS_OK = "ok"
+TASK_STATUS_ERROR = "error"
+# worker messages on the result queue: task taken by a worker, worker alive
+TASK_STATUS_STARTED = "started"
+WORKER_STATUS_HEARTBEAT = "heartbeat"
+# seconds between heartbeats of a worker, and between liveness checks of the coordinator
+HEARTBEAT_SECONDS = 2.0
+# a task is run at most that many times, tasks of a lost worker are requeued until then
+MAX_TASK_ATTEMPTS = 2
+
+
+class SearchExecutor(ABC):
+    """
+    Runs search tasks function(X, y, *args) on the training data X, y.
+    The data is set once with set_data and shipped to each worker once, tasks only carry their arguments.
+    map can be called from several threads at the same time, results keep the task order.
+    """
+    runs_in_process = False
+
+    @abstractmethod
+    def set_data(self, X, y, data_key: str = None):
+        pass
+
+    @abstractmethod
+    def map(self, function, tasks: list, n_jobs: int = None) -> list:
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class InProcessSearchExecutor(SearchExecutor):
+    """
+    Tasks run in the calling process, n_jobs joblib workers per map call
+    """
+    runs_in_process = True
+
+    def __init__(self):
+        self.X, self.y = None, None
+
+    def set_data(self, X, y, data_key: str = None):
+        self.X, self.y = X, y
+
+    def map(self, function, tasks: list, n_jobs: int = None) -> list:
+        try:
+            return Parallel(n_jobs=n_jobs)(delayed(function)(self.X, self.y, *task) for task in tasks)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+
+# training data of a process pool worker, received once through the pool initializer
+_WORKER_DATA = {}
+
+
+def _set_worker_data(X, y):
+    _WORKER_DATA["X"], _WORKER_DATA["y"] = X, y
+
+
+def _run_with_worker_data(function, task):
+    return function(_WORKER_DATA["X"], _WORKER_DATA["y"], *task)
+
+
+class ProcessPoolSearchExecutor(SearchExecutor):
+    """
+    Tasks run in a pool of n_workers local processes, the data is passed to each of them at start up
+    """
+
+    def __init__(self, n_workers: int = None):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.pool = None
+
+    def set_data(self, X, y, data_key: str = None):
+        try:
+            self.close()
+            self.pool = ProcessPoolExecutor(max_workers=self.n_workers, initializer=_set_worker_data,
+                                            initargs=(X, y))
+            logging.info(f"Process pool search executor started with [{self.n_workers}] workers")
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def map(self, function, tasks: list, n_jobs: int = None) -> list:
+        try:
+            futures = [self.pool.submit(_run_with_worker_data, function, task) for task in tasks]
+            return [future.result() for future in futures]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+
+
+class SearchQueueManager(BaseManager):
+    """
+    Queue protocol between the coordinator and search workers:
+        task queue: (task_id, data_key, function, args), None asks a worker to stop
+        result queue: (task_id, started, worker_id) when a worker takes a task,
+                      (task_id, ok / error, result or error message) when it is done,
+                      (None, heartbeat, worker_id) every HEARTBEAT_SECONDS
+        data store: data_key -> (X, y), fetched once by every worker
+    """
+
+
+class DistributedSearchExecutor(SearchExecutor):
+    """
+    Tasks are published on a task queue served by the coordinator, search workers on any machine
+    reaching address connect to it (python -m visa.entity.search_worker --address host:port with
+    VISA_SEARCH_AUTHKEY set). local_workers workers are launched as subprocesses, a local stand-in
+    for worker nodes.
+    A worker is lost when its process exits (local workers) or no heartbeat came from it for
+    worker_timeout seconds, its tasks are requeued up to MAX_TASK_ATTEMPTS runs then failed.
+    Pending tasks fail when no worker is alive for worker_timeout seconds, e.g. local_workers is 0
+    and no remote worker connects.
+    """
+
+    def __init__(self, address: str = "127.0.0.1:0", local_workers: int = 2, worker_timeout: float = 30.0):
+        try:
+            host, port = address.rsplit(":", 1)
+            self.authkey = os.environ.get(SEARCH_AUTHKEY_ENV_KEY) or secrets.token_hex(16)
+            self.worker_timeout = worker_timeout
+            self.task_queue, self.result_queue, self.data_store = queue.Queue(), queue.Queue(), {}
+            # register on a subclass of its own, the queues of another executor are not rebound
+            manager_class = type("_SearchQueueManager", (SearchQueueManager,), {})
+            manager_class.register("get_task_queue", callable=lambda: self.task_queue)
+            manager_class.register("get_result_queue", callable=lambda: self.result_queue)
+            manager_class.register("get_data_store", callable=lambda: self.data_store, proxytype=DictProxy)
+            manager = manager_class(address=(host, int(port)), authkey=self.authkey.encode("utf-8"))
+            self.server = manager.get_server()
+            self.address = f"{self.server.address[0]}:{self.server.address[1]}"
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+            self.data_key = None
+            self.task_ids = itertools.count()
+            # task_id -> [future, task message, attempts, worker_id running it or None]
+            self.pending_tasks = {}
+            # worker_id -> time of its last message
+            self.worker_last_seen = {}
+            self.no_worker_since = time.time()
+            self.lock = threading.Lock()
+            self.closed = False
+            self.collector = threading.Thread(target=self.collect_results, daemon=True)
+            self.collector.start()
+
+            python_path = os.pathsep.join(filter(None, [PACKAGE_ROOT, os.environ.get("PYTHONPATH")]))
+            worker_env = {**os.environ, SEARCH_AUTHKEY_ENV_KEY: self.authkey, "PYTHONPATH": python_path}
+            # worker_id -> local worker process
+            self.processes = {
+                f"local-{index}": subprocess.Popen([sys.executable, "-m", SEARCH_WORKER_MODULE,
+                                                    "--address", self.address, "--worker-id", f"local-{index}"],
+                                                   env=worker_env)
+                for index in range(local_workers)}
+            logging.info(f"Distributed search executor listening on [{self.address}], "
+                         f"local workers: [{len(self.processes)}]")
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def set_data(self, X, y, data_key: str = None):
+        # workers keep the data of the last key they fetched, a new key makes them fetch once more
+        self.data_key = data_key or secrets.token_hex(8)
+        self.data_store.clear()
+        self.data_store[self.data_key] = (X, y)
+
+    def is_worker_alive(self, worker_id: str, now: float) -> bool:
+        process = self.processes.get(worker_id)
+        if process is not None:
+            return process.poll() is None
+        return now - self.worker_last_seen.get(worker_id, -float("inf")) <= self.worker_timeout
+
+    def check_workers(self):
+        """
+        Requeue or fail tasks of lost workers, fail every pending task when no worker is alive for too long
+        """
+        now = time.time()
+        with self.lock:
+            worker_ids = set(self.processes) | set(self.worker_last_seen)
+            alive_worker_ids = {worker_id for worker_id in worker_ids if self.is_worker_alive(worker_id, now)}
+            for task_id, pending_task in list(self.pending_tasks.items()):
+                future, message, attempts, worker_id = pending_task
+                if worker_id is None or worker_id in alive_worker_ids:
+                    continue
+                if attempts < MAX_TASK_ATTEMPTS:
+                    logging.info(f"Search worker [{worker_id}] lost, requeueing task [{task_id}]")
+                    pending_task[3] = None
+                    self.task_queue.put(message)
+                else:
+                    del self.pending_tasks[task_id]
+                    future.set_exception(Exception(f"Search task [{task_id}] lost with worker [{worker_id}] "
+                                                   f"after {attempts} attempts"))
+            if alive_worker_ids:
+                self.no_worker_since = None
+                return
+            if self.no_worker_since is None:
+                self.no_worker_since = now
+            if self.pending_tasks and now - self.no_worker_since > self.worker_timeout:
+                pending_tasks, self.pending_tasks = self.pending_tasks, {}
+                for future, _, _, _ in pending_tasks.values():
+                    future.set_exception(Exception(f"No search worker alive on [{self.address}] "
+                                                   f"for {self.worker_timeout} seconds"))
+
+    def collect_results(self):
+        """
+        Route results to the futures of their tasks, track which worker runs which task
+        """
+        last_check = time.time()
+        while not self.closed:
+            try:
+                task_id, status, payload = self.result_queue.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                task_id, status, payload = None, None, None
+            if status == WORKER_STATUS_HEARTBEAT:
+                self.worker_last_seen[payload] = time.time()
+            elif status == TASK_STATUS_STARTED:
+                self.worker_last_seen[payload] = time.time()
+                with self.lock:
+                    pending_task = self.pending_tasks.get(task_id)
+                    if pending_task is not None:
+                        pending_task[2] += 1
+                        pending_task[3] = payload
+            elif status is not None:
+                with self.lock:
+                    pending_task = self.pending_tasks.pop(task_id, None)
+                if pending_task is not None:
+                    if status == TASK_STATUS_OK:
+                        pending_task[0].set_result(payload)
+                    else:
+                        pending_task[0].set_exception(
+                            Exception(f"Search task [{task_id}] failed on worker: {payload}"))
+            if time.time() - last_check >= HEARTBEAT_SECONDS:
+                self.check_workers()
+                last_check = time.time()
+
+    def map(self, function, tasks: list, n_jobs: int = None) -> list:
+        try:
+            futures = []
+            for task in tasks:
+                task_id, future = next(self.task_ids), Future()
+                message = (task_id, self.data_key, function, task)
+                with self.lock:
+                    self.pending_tasks[task_id] = [future, message, 0, None]
+                self.task_queue.put(message)
+                futures.append(future)
+            return [future.result() for future in futures]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def close(self):
+        if self.closed:
+            return
+        for _ in self.processes:
+            self.task_queue.put(None)
+        for process in self.processes.values():
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.closed = True
+        self.server.stop_event.set()
+        self.server.listener.close()
+        logging.info(f"Distributed search executor on [{self.address}] closed")
+
+
+def get_search_executor(executor_config: dict) -> SearchExecutor:
+    """
+    executor_config: search_execution.executor section of model.yaml
+        backend: in_process (default) / process_pool / distributed
+        n_workers: process pool size
+        address, local_workers: distributed coordinator address and local worker subprocesses
+        worker_timeout: seconds without heartbeat after which a distributed worker is lost
+    """
+    try:
+        executor_config = executor_config or {}
+        backend = executor_config.get("backend") or SEARCH_EXECUTOR_IN_PROCESS
+        if backend == SEARCH_EXECUTOR_IN_PROCESS:
+            return InProcessSearchExecutor()
+        if backend == SEARCH_EXECUTOR_PROCESS_POOL:
+            return ProcessPoolSearchExecutor(n_workers=executor_config.get("n_workers"))
+        if backend == SEARCH_EXECUTOR_DISTRIBUTED:
+            return DistributedSearchExecutor(address=executor_config.get("address") or "127.0.0.1:0",
+                                             local_workers=executor_config.get("local_workers", 2),
+                                             worker_timeout=executor_config.get("worker_timeout") or 30.0)
+        raise Exception(f"Unknown search executor [{backend}], expected one of {SEARCH_EXECUTORS}")
+    except Exception as e:
+        raise CustomException(e, sys) from e
@@ -0,0 +1,78 @@
+"""
+Search worker of the distributed search executor.
+
+Connects to the coordinator queues, fetches the training data once per data key and runs tasks
+until it receives a stop message. A heartbeat is sent every HEARTBEAT_SECONDS so the coordinator
+requeues the tasks of a worker that stopped answering.
+
+usage (VISA_SEARCH_AUTHKEY set to the coordinator authkey):
+    python -m visa.entity.search_worker --address <coordinator host>:<port> [--worker-id <id>]
+"""
+import os
+import sys
+import socket
+import argparse
+import threading
+import traceback
+from visa.entity.search_executor import SearchQueueManager, SEARCH_AUTHKEY_ENV_KEY, TASK_STATUS_OK, \
+    TASK_STATUS_ERROR, TASK_STATUS_STARTED, WORKER_STATUS_HEARTBEAT, HEARTBEAT_SECONDS
+from visa.logger import logging
+
+
+def send_heartbeats(result_queue, worker_id: str, stop_event: threading.Event):
+    while not stop_event.wait(HEARTBEAT_SECONDS):
+        try:
+            result_queue.put((None, WORKER_STATUS_HEARTBEAT, worker_id))
+        except Exception:
+            break
+
+
+def run_worker(address: str, authkey: str, worker_id: str = None):
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    host, port = address.rsplit(":", 1)
+    manager_class = type("_SearchQueueManager", (SearchQueueManager,), {})
+    manager_class.register("get_task_queue")
+    manager_class.register("get_result_queue")
+    manager_class.register("get_data_store")
+    manager = manager_class(address=(host, int(port)), authkey=authkey.encode("utf-8"))
+    manager.connect()
+    task_queue, result_queue, data_store = manager.get_task_queue(), manager.get_result_queue(), \
+        manager.get_data_store()
+    logging.info(f"Search worker [{worker_id}] connected to [{address}]")
+
+    result_queue.put((None, WORKER_STATUS_HEARTBEAT, worker_id))
+    stop_event = threading.Event()
+    threading.Thread(target=send_heartbeats, args=(manager.get_result_queue(), worker_id, stop_event),
+                     daemon=True).start()
+    data_key, X, y = None, None, None
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, task_data_key, function, args = task
+        result_queue.put((task_id, TASK_STATUS_STARTED, worker_id))
+        try:
+            if task_data_key != data_key:
+                X, y = data_store.get(task_data_key)
+                data_key = task_data_key
+                logging.info(f"Search worker [{worker_id}] received training data [{data_key}]")
+            result_queue.put((task_id, TASK_STATUS_OK, function(X, y, *args)))
+        except Exception:
+            result_queue.put((task_id, TASK_STATUS_ERROR, traceback.format_exc()))
+    stop_event.set()
+    logging.info(f"Search worker [{worker_id}] stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run tasks of a distributed model search")
+    parser.add_argument("--address", required=True, help="coordinator host:port")
+    parser.add_argument("--worker-id", default=None, help="worker name reported to the coordinator, host:pid by default")
+    args = parser.parse_args()
+    authkey = os.environ.get(SEARCH_AUTHKEY_ENV_KEY)
+    if not authkey:
+        sys.exit(f"{SEARCH_AUTHKEY_ENV_KEY} is not set")
+    run_worker(address=args.address, authkey=authkey, worker_id=args.worker_id)
+
+
+if __name__ == "__main__":
+    main()
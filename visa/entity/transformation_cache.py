@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import stat
+import shutil
+import hashlib
+import tempfile
+from visa.exception import CustomException
+from visa.logger import logging
+from visa.utils.utils import get_file_sha256, link_or_copy_file
+
+CACHE_MANIFEST_FILE_NAME = "manifest.json"
+
+# bump when the transformation code changes in a way settings do not capture
+TRANSFORMATION_CACHE_VERSION = 2
+
+
+def describe_estimator(value):
+    """
+    JSON serializable description of an estimator and all its nested parameters.
+    Unlike repr, it is never abbreviated, so it can be hashed.
+    """
+    if hasattr(value, "get_params") and not isinstance(value, type):
+        return {"class": f"{type(value).__module__}.{type(value).__qualname__}",
+                "params": {name: describe_estimator(param)
+                           for name, param in sorted(value.get_params(deep=False).items())}}
+    if isinstance(value, (list, tuple)):
+        return [describe_estimator(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): describe_estimator(item) for key, item in sorted(value.items())}
+    return repr(value)
+
+
+class TransformationCache:
+    """
+    Cache of fitted preprocessing outputs shared by all runs.
+    An entry is keyed by the content hash of the input files and the transformer settings
+    and holds the files produced by the transformation (arrays, pickled preprocessor).
+    Entries are written to a temporary directory and renamed into place, the manifest
+    lists every file of a complete entry.
+    """
+
+    def __init__(self, cache_dir: str):
+        try:
+            self.cache_dir = cache_dir
+            os.makedirs(cache_dir, exist_ok=True)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_cache_key(self, file_paths: list, settings) -> str:
+        """
+        file_paths: list input files whose content the outputs depend on
+        settings: json serializable description of transformer settings
+        """
+        try:
+            cache_key = hashlib.sha256()
+            cache_key.update(f"version:{TRANSFORMATION_CACHE_VERSION}".encode("utf-8"))
+            for file_path in file_paths:
+                cache_key.update(get_file_sha256(file_path).encode("utf-8"))
+            cache_key.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+            return cache_key.hexdigest()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_entry_dir(self, cache_key: str) -> str:
+        return os.path.join(self.cache_dir, cache_key)
+
+    def load(self, cache_key: str, dst_file_paths: dict) -> bool:
+        """
+        Link cached files of cache_key to dst_file_paths (name -> destination path)
+        return: True on cache hit, False when the entry is missing or incomplete
+        """
+        try:
+            entry_dir = self.get_entry_dir(cache_key)
+            manifest_file_path = os.path.join(entry_dir, CACHE_MANIFEST_FILE_NAME)
+            if not os.path.exists(manifest_file_path):
+                return False
+            with open(manifest_file_path) as manifest_file:
+                manifest = json.load(manifest_file)
+            if not set(dst_file_paths).issubset(manifest) \
+                    or not all(os.path.exists(os.path.join(entry_dir, manifest[name])) for name in dst_file_paths):
+                logging.info(f"Transformation cache entry [{entry_dir}] is incomplete, ignoring it")
+                return False
+            for name, dst_file_path in dst_file_paths.items():
+                link_or_copy_file(src_file_path=os.path.join(entry_dir, manifest[name]), dst_file_path=dst_file_path)
+            logging.info(f"Transformation cache hit: [{entry_dir}]")
+            return True
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def store(self, cache_key: str, src_file_paths: dict):
+        """
+        Store src_file_paths (name -> produced file) under cache_key
+        """
+        try:
+            entry_dir = self.get_entry_dir(cache_key)
+            if os.path.exists(os.path.join(entry_dir, CACHE_MANIFEST_FILE_NAME)):
+                return
+            tmp_entry_dir = tempfile.mkdtemp(dir=self.cache_dir, suffix=".part")
+            os.chmod(tmp_entry_dir, 0o755)
+            manifest = {}
+            for name, src_file_path in src_file_paths.items():
+                file_name = f"{name}{os.path.splitext(src_file_path)[1]}"
+                cached_file_path = link_or_copy_file(src_file_path=src_file_path,
+                                                     dst_file_path=os.path.join(tmp_entry_dir, file_name))
+                # cached files are shared through hard links, protect them against in place edits
+                os.chmod(cached_file_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                manifest[name] = file_name
+            with open(os.path.join(tmp_entry_dir, CACHE_MANIFEST_FILE_NAME), "w") as manifest_file:
+                json.dump(manifest, manifest_file, indent=2)
+            if os.path.exists(entry_dir):
+                shutil.rmtree(entry_dir)
+            os.replace(tmp_entry_dir, entry_dir)
+            logging.info(f"Transformation outputs stored in cache: [{entry_dir}]")
+        except Exception as e:
+            raise CustomException(e, sys) from e
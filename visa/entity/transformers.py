@@ -0,0 +1,67 @@
+import sys
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin, OneToOneFeatureMixin
+from sklearn.utils.validation import check_is_fitted, validate_data
+from visa.exception import CustomException
+
+
+class OutlierCapper(OneToOneFeatureMixin, TransformerMixin, BaseEstimator):
+    """
+    Caps values outside [Q1 - factor * IQR, Q3 + factor * IQR].
+    Limits of all columns are computed in one vectorized pass at fit time and saved with
+    the estimator, so training and serving clip with the same limits.
+    factor: float IQR multiplier
+    min_unique_values: int columns with fewer distinct values are treated as discrete and left as is
+    """
+
+    def __init__(self, factor: float = 1.5, min_unique_values: int = 25):
+        self.factor = factor
+        self.min_unique_values = min_unique_values
+
+    def fit(self, X, y=None):
+        try:
+            X = validate_data(self, X, dtype=[np.float64, np.float32], ensure_all_finite="allow-nan")
+            percentile25, percentile75 = np.nanpercentile(X, [25, 75], axis=0)
+            iqr = percentile75 - percentile25
+            self.lower_limits_ = percentile25 - self.factor * iqr
+            self.upper_limits_ = percentile75 + self.factor * iqr
+
+            sorted_X = np.sort(X, axis=0)
+            # distinct non missing values per column, missing values are sorted last
+            unique_counts = ((np.diff(sorted_X, axis=0) != 0) & ~np.isnan(sorted_X[1:])).sum(axis=0) + 1
+            is_discrete = unique_counts < self.min_unique_values
+            self.lower_limits_[is_discrete] = -np.inf
+            self.upper_limits_[is_discrete] = np.inf
+            return self
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def transform(self, X):
+        try:
+            check_is_fitted(self, ["lower_limits_", "upper_limits_"])
+            X = validate_data(self, X, dtype=[np.float64, np.float32], ensure_all_finite="allow-nan", reset=False)
+            # missing values stay missing, the imputer after this step fills them
+            return np.clip(X, self.lower_limits_, self.upper_limits_)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+
+class DtypeCaster(OneToOneFeatureMixin, TransformerMixin, BaseEstimator):
+    """
+    Casts dense or sparse features to dtype, used as last preprocessing step
+    so models are trained and served on the same (compact) dtype.
+    dtype: str numpy dtype name
+    """
+
+    def __init__(self, dtype: str = "float32"):
+        self.dtype = dtype
+
+    def fit(self, X, y=None):
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def transform(self, X):
+        try:
+            return X.astype(self.dtype, copy=False)
+        except Exception as e:
+            raise CustomException(e, sys) from e
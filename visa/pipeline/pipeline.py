@@ -9,9 +9,11 @@ from typing import List
 
 from multiprocessing import Process
 from visa.entity.artifact_entity import DataIngestionArtifact
+from visa.entity.artifact_entity import DataDriftArtifact
 from visa.entity.artifact_entity import DataValidationArtifact, DataTransformationArtifact, ModelTrainerArtifact, ModelEvaluationArtifact, ModelPusherArtifact
 from visa.components.data_ingestion import DataIngestion
 from visa.components.data_validation import DataValidation
+from visa.components.data_drift import DataDrift
 from visa.components.data_transformation import DataTransformation
 from visa.components.model_trainer import ModelTrainer
 from visa.components.model_evaluation import ModelEvaluation
@@ -46,6 +48,15 @@ class Pipeline():
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def start_data_drift(self, data_ingestion_artifact: DataIngestionArtifact,
+                         data_validation_artifact: DataValidationArtifact) -> DataDriftArtifact:
+        try:
+            data_drift = DataDrift(data_drift_config=self.config.get_data_drift_config(),
+                                   data_ingestion_artifact=data_ingestion_artifact,
+                                   data_validation_artifact=data_validation_artifact)
+            return data_drift.initiate_data_drift()
+        except Exception as e:
+            raise CustomException(e, sys) from e
 
     def start_data_transformation(self,
                                   data_ingestion_artifact: DataIngestionArtifact,
@@ -61,10 +72,12 @@ class Pipeline():
         except Exception as e:
             raise CustomException(e, sys) from e
 
-    def start_model_trainer(self, data_transformation_artifact: DataTransformationArtifact) -> ModelTrainerArtifact:
+    def start_model_trainer(self, data_transformation_artifact: DataTransformationArtifact,
+                            data_drift_artifact: DataDriftArtifact = None) -> ModelTrainerArtifact:
         try:
             model_trainer = ModelTrainer(model_trainer_config=self.config.get_model_trainer_config(),
-                                         data_transformation_artifact=data_transformation_artifact
+                                         data_transformation_artifact=data_transformation_artifact,
+                                         data_drift_artifact=data_drift_artifact
                                          )
             return model_trainer.initiate_model_trainer()
         except Exception as e:
@@ -99,9 +112,12 @@ class Pipeline():
 
             data_ingestion_artifact = self.start_data_ingestion()
             data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
+            data_drift_artifact = self.start_data_drift(data_ingestion_artifact=data_ingestion_artifact,
+                                                        data_validation_artifact=data_validation_artifact)
             data_transfromation_artifact = self.start_data_transformation(data_ingestion_artifact=data_ingestion_artifact,
                                                                           data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transfromation_artifact)
+            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transfromation_artifact,
+                                                              data_drift_artifact=data_drift_artifact)
             model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
                                                                     data_validation_artifact=data_validation_artifact,
                                                                     model_trainer_artifact=model_trainer_artifact)
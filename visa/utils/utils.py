@@ -3,7 +3,10 @@ import numpy as np
 import os, sys
 import numpy as np
 import dill
+import hashlib
+import shutil
 import pandas as pd
+import scipy.sparse
 from visa.constant import *
 from visa.exception import CustomException
 
@@ -37,13 +40,13 @@ def save_numpy_array_data(file_path: str, array: np.array):
     """
     Save numpy array data to file
     file_path: str location of file to save
-    array: np.array data to save
+    array: np.array data to save, object arrays are rejected as they would need pickle
     """
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
         with open(file_path, 'wb') as file_obj:
-            np.save(file_obj, array)
+            np.save(file_obj, array, allow_pickle=False)
     except Exception as e:
         raise CustomException(e, sys) from e
     
@@ -61,19 +64,177 @@ def save_object(file_path: str, obj):
     except Exception as e:
         raise CustomException(e, sys) from e
     
-def load_data(file_path: str, schema_file_path: str) -> pd.DataFrame:
+def get_file_format(file_path: str) -> str:
+    """
+    Returns file format (csv, parquet, feather) of a data file based on its extension
+    file_path: str
+    """
+    try:
+        file_extension = os.path.splitext(file_path)[1]
+        for file_format, extension in FILE_FORMAT_EXTENSIONS.items():
+            if extension == file_extension:
+                return file_format
+        raise Exception(f"Unsupported data file extension: [{file_extension}] of file: [{file_path}]")
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def apply_schema_dtypes(dataframe: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """
+    Cast dataframe columns to dtypes of schema.yaml ColumnNames, columns absent from schema are kept as is
+    dataframe: pd.DataFrame
+    schema: dict column name -> dtype (category, int, float)
+    """
+    try:
+        column_dtypes = {column: schema[column] for column in dataframe.columns if column in schema}
+        return dataframe.astype(column_dtypes)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def write_dataframe(dataframe: pd.DataFrame, file_path: str, schema: dict = None):
+    """
+    Write dataframe as csv, parquet or feather depending on file extension.
+    Columnar files are typed from schema, category columns are stored dictionary encoded.
+    file_path: str
+    schema: dict column name -> dtype
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        file_format = get_file_format(file_path)
+        if file_format == FILE_FORMAT_CSV:
+            dataframe.to_csv(file_path, index=False)
+            return
+        if schema is not None:
+            dataframe = apply_schema_dtypes(dataframe, schema)
+        dataframe = dataframe.reset_index(drop=True)
+        if file_format == FILE_FORMAT_PARQUET:
+            dataframe.to_parquet(file_path, index=False)
+        else:
+            dataframe.to_feather(file_path)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def read_dataframe_columns(file_path: str) -> list:
+    """
+    Returns column names of a data file reading only its header/footer metadata
+    file_path: str
+    """
+    try:
+        file_format = get_file_format(file_path)
+        if file_format == FILE_FORMAT_CSV:
+            return list(pd.read_csv(file_path, nrows=0).columns)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if file_format == FILE_FORMAT_PARQUET:
+            return list(pq.read_schema(file_path).names)
+        with pa.memory_map(file_path) as source:
+            return list(pa.ipc.open_file(source).schema.names)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def read_dataframe(file_path: str, columns: list = None, csv_dtypes: dict = None) -> pd.DataFrame:
+    """
+    Read csv, parquet or feather file depending on file extension
+    file_path: str
+    columns: list of columns to read, all columns when None
+    csv_dtypes: dict column -> dtype used while parsing csv files, columnar files are already typed
+    """
+    try:
+        file_format = get_file_format(file_path)
+        if file_format == FILE_FORMAT_CSV:
+            return pd.read_csv(file_path, usecols=columns, dtype=csv_dtypes)
+        if file_format == FILE_FORMAT_PARQUET:
+            return pd.read_parquet(file_path, columns=columns)
+        return pd.read_feather(file_path, columns=columns)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def append_data_file(src_file_path: str, dst_file_path: str, schema: dict = None) -> str:
+    """
+    Append rows of src data file to dst data file of the same format, dst is created when missing.
+    csv rows are appended in place without parsing, columnar files are rewritten with both parts.
+    src_file_path: str
+    dst_file_path: str
+    schema: dict column name -> dtype
+    """
+    try:
+        if not os.path.exists(dst_file_path):
+            os.makedirs(os.path.dirname(dst_file_path), exist_ok=True)
+            shutil.copyfile(src_file_path, dst_file_path)
+            return dst_file_path
+        if get_file_format(dst_file_path) == FILE_FORMAT_CSV:
+            with open(src_file_path, "rb") as src_file, open(dst_file_path, "ab") as dst_file:
+                src_file.readline()  # header is already present in dst file
+                shutil.copyfileobj(src_file, dst_file)
+            return dst_file_path
+        dataframe = pd.concat([read_dataframe(dst_file_path), read_dataframe(src_file_path)], ignore_index=True)
+        tmp_file_path = f"{dst_file_path}.tmp{os.path.splitext(dst_file_path)[1]}"
+        write_dataframe(dataframe, file_path=tmp_file_path, schema=schema)
+        os.replace(tmp_file_path, dst_file_path)
+        return dst_file_path
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_compact_dtype(dtype: str) -> str:
+    """
+    Smallest dtype family used in compact mode for a schema dtype, ints are downcast per column
+    """
+    return {"category": "category", "float": "float32"}.get(dtype)
+
+
+def _restore_numeric_categories(values: pd.Series) -> pd.Series:
+    # csv columns parsed as category get text categories, numeric labels (e.g. 0/1 target)
+    # are converted back once per category instead of once per row
+    categories = values.cat.categories
+    if categories.dtype == object and len(categories) > 0:
+        numeric_categories = pd.to_numeric(categories, errors="coerce")
+        if not numeric_categories.isna().any() and numeric_categories.is_unique:
+            return values.cat.rename_categories(numeric_categories)
+    return values
+
+
+def load_data(file_path: str, schema_file_path: str, columns: list = None, compact: bool = False) -> pd.DataFrame:
+    """
+    Load ingested data file (csv, parquet or feather) after checking its columns against schema
+    file_path: str
+    schema_file_path: str
+    columns: list of columns to read, all columns of the file when None
+    compact: bool categories parsed directly as pandas category, ints downcast to the smallest
+    integer type holding their values and floats read as float32
+    """
     try:
         dataset_schema = read_yaml_file(schema_file_path)
 
         schema = dataset_schema[DATASET_SCHEMA_COLUMNS_KEY]
 
-        dataframe = pd.read_csv(file_path)
+        file_columns = read_dataframe_columns(file_path)
+
+        csv_dtypes = None
+        if compact:
+            csv_dtypes = {column: get_compact_dtype(dtype) for column, dtype in schema.items()
+                          if column in file_columns and get_compact_dtype(dtype) is not None}
+
+        dataframe = read_dataframe(file_path, columns=columns, csv_dtypes=csv_dtypes)
 
         error_message = ""
 
-        for column in dataframe.columns:
+        for column in file_columns:
             if column in list(schema.keys()):
-                dataframe[column].astype(schema[column])
+                if column in dataframe.columns:
+                    if compact and schema[column] == "int":
+                        dataframe[column] = pd.to_numeric(dataframe[column].astype(schema[column]),
+                                                          downcast="integer")
+                    elif compact and get_compact_dtype(schema[column]) is not None:
+                        dataframe[column] = dataframe[column].astype(get_compact_dtype(schema[column]))
+                        if schema[column] == "category":
+                            dataframe[column] = _restore_numeric_categories(dataframe[column])
+                    else:
+                        dataframe[column] = dataframe[column].astype(schema[column])
             else:
                 error_message = f"{error_message} \nColumn: [{column}] is not in the schema."
         if len(error_message) > 0:
@@ -83,18 +244,50 @@ def load_data(file_path: str, schema_file_path: str) -> pd.DataFrame:
     except Exception as e:
         raise CustomException(e, sys) from e
     
-def load_numpy_array_data(file_path: str) -> np.array:
+def load_numpy_array_data(file_path: str, mmap_mode: str = None) -> np.array:
     """
     load numpy array data from file
     file_path: str location of file to load
+    mmap_mode: str None reads the array in memory, 'r' maps it read-only so every
+    process loading the file shares the same pages through the page cache
     return: np.array data loaded
     """
     try:
-        with open(file_path, 'rb') as file_obj:
-            return np.load(file_obj, allow_pickle=True)
+        return np.load(file_path, mmap_mode=mmap_mode, allow_pickle=False)
     except Exception as e:
         raise CustomException(e, sys) from e
     
+def save_feature_matrix(file_path: str, matrix):
+    """
+    Save input features, scipy sparse matrices as sparse .npz and numpy arrays as .npy
+    file_path: str location of file to save
+    matrix: scipy.sparse matrix or np.array
+    """
+    try:
+        dir_path = os.path.dirname(file_path)
+        os.makedirs(dir_path, exist_ok=True)
+        if scipy.sparse.issparse(matrix):
+            scipy.sparse.save_npz(file_path, matrix.tocsr(), compressed=False)
+        else:
+            save_numpy_array_data(file_path=file_path, array=matrix)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def load_feature_matrix(file_path: str, mmap_mode: str = None):
+    """
+    Load input features saved by save_feature_matrix, sparse matrices stay sparse (CSR)
+    file_path: str location of file to load
+    mmap_mode: str memory map mode of dense .npy features, sparse .npz archives are always read in memory
+    """
+    try:
+        if os.path.splitext(file_path)[1] == SPARSE_MATRIX_FILE_EXTENSION:
+            return scipy.sparse.load_npz(file_path).tocsr()
+        return load_numpy_array_data(file_path=file_path, mmap_mode=mmap_mode)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
 def load_object(file_path:str):
     """
     file_path: str
@@ -103,4 +296,41 @@ def load_object(file_path:str):
         with open(file_path, "rb") as file_obj:
             return dill.load(file_obj)
     except Exception as e:
-        raise CustomException(e, sys) from e
\ No newline at end of file
+        raise CustomException(e, sys) from e
+
+
+def get_file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Compute sha256 hex digest of a file without loading it fully in memory
+    file_path: str location of file to hash
+    block_size: int number of bytes read per iteration
+    """
+    try:
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(block_size), b""):
+                sha256.update(block)
+        return sha256.hexdigest()
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def link_or_copy_file(src_file_path: str, dst_file_path: str) -> str:
+    """
+    Hard link src file at dst location, falls back to copy when
+    hard link is not possible (different file system, unsupported os)
+    src_file_path: str existing file
+    dst_file_path: str location of link/copy
+    return: dst_file_path
+    """
+    try:
+        os.makedirs(os.path.dirname(dst_file_path), exist_ok=True)
+        if os.path.exists(dst_file_path):
+            os.remove(dst_file_path)
+        try:
+            os.link(src_file_path, dst_file_path)
+        except OSError:
+            shutil.copy2(src_file_path, dst_file_path)
+        return dst_file_path
+    except Exception as e:
+        raise CustomException(e, sys) from e